@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""Benchmarks for the load, populate, search, edit and save hot paths
+
+    python bench.py                                   # every case on medium documents
+    python bench.py --size large --save-baseline bench_baseline.json
+    python bench.py --compare bench_baseline.json     # exit status 1 on a regression
+
+Every case runs in a subprocess of its own, so the reported peak RSS belongs to
+that case alone. Cases that need Tk use a withdrawn root window; without
+$DISPLAY an Xvfb server is started if one is installed, otherwise they are
+skipped. Xvfb is the only extra requirement (the system package, e.g. xvfb on
+Debian); bench.py drives it directly, no Python wrapper is needed.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SIZES = {"small": 1_000, "medium": 20_000, "large": 200_000}
+NEEDLE = "needle"
+
+# Synthetische Dokumente; gleicher Seed, gleiche Daten
+
+def make_wide(n, rng):
+    return {f"key_{i}": rng.choice([i, f"value {i}", i / 7, True, None]) for i in range(n)}
+
+def make_deep(n, rng):
+    # json and the tree code recurse per level, so depth stays far below the recursion limit
+    depth = min(200, max(10, n // 100))
+    width = max(1, n // depth)
+    node = {"leaf": NEEDLE}
+    for level in range(depth):
+        node = {f"level_{level}": node, "siblings": [f"s{i}" for i in range(width)]}
+    return node
+
+def make_array(n, rng):
+    return {"items": [{"id": i, "name": f"item {i}", "tags": ["a", "b"], "value": rng.random(),
+                       "note": NEEDLE if i % 1000 == 0 else ""} for i in range(n)]}
+
+def make_strings(n, rng):
+    count = max(1, n // 100)
+    return {"texts": ["".join(rng.choice("abcdefgh ") for _ in range(10_000)) + (NEEDLE if i == count // 2 else "")
+                      for i in range(count)]}
+
+def make_template(n, rng):
+    """Copies of template.json, the shape the editor is mostly used with"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "template.json"), encoding="utf-8") as f:
+        template = json.load(f)
+    return {f"spec_{i}": template for i in range(max(1, n // 100))}
+
+SHAPES = {"wide": make_wide, "deep": make_deep, "array": make_array, "strings": make_strings,
+          "template": make_template}
+
+def scalar_paths(data, limit, rng):
+    """Up to limit random paths of scalar values"""
+    paths = []
+    stack = [((), data)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend((path + (key,), child) for key, child in value.items())
+        elif isinstance(value, list):
+            stack.extend((path + (index,), child) for index, child in enumerate(value))
+        elif path:
+            paths.append(path)
+    rng.shuffle(paths)
+    return paths[:limit]
+
+# Cases: case_x(filename) does the setup and returns run(), which is timed and returns extra numbers
+
+def case_load(filename):
+    from jsoncore import JSONDocument
+    return lambda: {"containers": len(JSONDocument(filename).load().baseline_hashes)}
+
+def case_query(filename):
+    from jsoncore import JSONDocument
+    document = JSONDocument(filename).load()
+    document.get_search_index()
+    return lambda: {"hits": sum(1 for _ in document.query(NEEDLE))}
+
+def case_index(filename):
+    from jsoncore import JSONDocument, SearchIndex
+    document = JSONDocument(filename).load()
+    return lambda: {"entries": len(SearchIndex(document.data).parent)}
+
+def case_get_path(filename):
+    from jsoncore import JSONDocument, get_value_at
+    document = JSONDocument(filename).load()
+    paths = scalar_paths(document.data, 10_000, random.Random(1))
+
+    def run():
+        for path in paths:
+            get_value_at(document.data, path)
+        return {"paths": len(paths)}
+    return run
+
+def case_edit(filename):
+    from jsoncore import JSONDocument
+    document = JSONDocument(filename).load()
+    document.get_search_index()
+    paths = scalar_paths(document.data, 1_000, random.Random(2))
+
+    def run():
+        for path in paths:
+            document.edit('replace', path, "edited")
+        while document.undo():
+            pass
+        return {"edits": len(paths)}
+    return run
+
+def case_diff(filename):
+    from jsoncore import JSONDocument
+    document = JSONDocument(filename).load()
+    other = JSONDocument(filename).load()
+    for path in scalar_paths(other.data, 10, random.Random(3)):
+        other.edit('replace', path, "changed")
+    return lambda: {"operations": len(document.diff(other.data, other.hash_cache))}
+
+def case_save(filename):
+    from jsoncore import JSONDocument
+    document = JSONDocument(filename).load()
+    paths = scalar_paths(document.data, 1, random.Random(4))
+
+    def run():
+        document.edit('replace', paths[0], time.time())  # a changed digest forces a real write
+        document.save()
+        return {}
+    return run
+
+def open_viewer(filename):
+    """A JSONViewer with a withdrawn window, after its document finished loading"""
+    import j
+    for name in ("showinfo", "showwarning", "showerror"):
+        setattr(j.messagebox, name, lambda *args, **kwargs: None)
+    j.messagebox.askyesno = lambda *args, **kwargs: False  # no modal dialog may block a benchmark
+    viewer = j.JSONViewer(filename, backend="full")
+    viewer.root.withdraw()
+    while viewer.load_cancel is not None:
+        viewer.root.update()
+        time.sleep(0.01)
+    return viewer
+
+def tk_counts(viewer):
+    """Treeview rows and raw editor lines that exist as Tk items right now"""
+    rows = 0
+    stack = list(viewer.tree.get_children())
+    while stack:
+        rows += 1
+        stack.extend(viewer.tree.get_children(stack.pop()))
+    lines = int(viewer.raw_text.index('end-1c').split('.')[0])
+    return {"tree_items": rows, "text_lines": lines}
+
+def case_populate(filename):
+    viewer = open_viewer(filename)
+    return lambda: (viewer.populate_tree(), tk_counts(viewer))[1]
+
+def case_refresh_views(filename):
+    viewer = open_viewer(filename)
+    return lambda: (viewer.refresh_views(), tk_counts(viewer))[1]
+
+def case_search_tree(filename):
+    viewer = open_viewer(filename)
+    viewer.document.get_search_index()
+    return lambda: (viewer.search_tree(NEEDLE), tk_counts(viewer))[1]
+
+def case_apply_edit(filename):
+    viewer = open_viewer(filename)
+    paths = scalar_paths(viewer.document.data, 200, random.Random(5))
+
+    def run():
+        for path in paths:
+            viewer.apply_edit('replace', path, "edited")
+        viewer.root.update_idletasks()
+        return tk_counts(viewer)
+    return run
+
+def case_save_json(filename):
+    viewer = open_viewer(filename)
+    paths = scalar_paths(viewer.document.data, 1, random.Random(6))
+
+    def run():
+        viewer.apply_edit('replace', paths[0], time.time())
+        viewer.save_json()
+        return {}
+    return run
+
+CASES = {"load": case_load, "index": case_index, "query": case_query, "get_path": case_get_path,
+         "edit": case_edit, "diff": case_diff, "save": case_save}
+TK_CASES = {"populate": case_populate, "refresh_views": case_refresh_views, "search_tree": case_search_tree,
+            "apply_edit": case_apply_edit, "save_json": case_save_json}
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)  # bytes on macOS, KiB elsewhere
+
+def run_case(case, filename, repeat):
+    """Child process: time one case on a private copy of filename and print the result as JSON"""
+    work = f"{filename}.{case}.json"
+    shutil.copyfile(filename, work)
+    try:
+        run = {**CASES, **TK_CASES}[case](work)
+        times, extra = [], {}
+        for _ in range(repeat):
+            started = time.perf_counter()
+            extra = run() or {}
+            times.append(time.perf_counter() - started)
+    finally:
+        for leftover in (work, work + '.journal'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    print(json.dumps({"seconds": min(times), "peak_rss_mb": peak_rss_mb(), **extra}))
+
+def start_display():
+    """(process, environment) with a virtual X display, or (None, None) if there is none to be had"""
+    if sys.platform in ("win32", "darwin") or os.environ.get("DISPLAY"):
+        return None, dict(os.environ)
+    if shutil.which("Xvfb") is None:
+        return None, None
+    display = f":{random.randint(100, 999)}"
+    server = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    return server, dict(os.environ, DISPLAY=display)
+
+def compare(results, baseline, threshold):
+    """Lines describing cases that got slower than threshold times their baseline"""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old and "seconds" in result and result["seconds"] > old["seconds"] * threshold:
+            regressions.append(f"{key}: {old['seconds']:.3f}s -> {result['seconds']:.3f}s "
+                               f"({result['seconds'] / old['seconds']:.2f}x)")
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the JSON editor's hot paths")
+    parser.add_argument('--size', choices=SIZES, default="medium")
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=list(SHAPES))
+    parser.add_argument('--cases', nargs='+', choices=list(CASES) + list(TK_CASES),
+                        default=list(CASES) + list(TK_CASES))
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case; the fastest counts")
+    parser.add_argument('--save-baseline', metavar='FILE', help="store the results as the new baseline")
+    parser.add_argument('--compare', metavar='FILE', help="fail if a case is slower than in this baseline")
+    parser.add_argument('--threshold', type=float, default=1.3, help="allowed slowdown factor for --compare")
+    parser.add_argument('-o', '--output', metavar='FILE', help="also write the report to FILE")
+    parser.add_argument('--run', nargs=2, metavar=('CASE', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        run_case(args.run[0], args.run[1], args.repeat)
+        return 0
+
+    server, tk_environment = (None, None)
+    if any(case in TK_CASES for case in args.cases):
+        server, tk_environment = start_display()
+    results = {}
+    lines = []
+
+    def report(line):
+        print(line, flush=True)
+        lines.append(line)
+
+    workdir = tempfile.mkdtemp(prefix="jbench")
+    try:
+        for shape in args.shapes:
+            filename = os.path.join(workdir, f"{shape}.json")
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(SHAPES[shape](SIZES[args.size], random.Random(0)), f, indent=2, ensure_ascii=False)
+            report(f"{shape} ({os.path.getsize(filename) / 1e6:.1f} MB)")
+            for case in args.cases:
+                key = f"{case}/{shape}/{args.size}"
+                environment = tk_environment if case in TK_CASES else dict(os.environ)
+                if environment is None:
+                    report(f"  {case:14} skipped (no display and no Xvfb)")
+                    continue
+                child = subprocess.run([sys.executable, os.path.abspath(__file__), '--repeat', str(args.repeat),
+                                        '--run', case, filename], capture_output=True, text=True, env=environment)
+                if child.returncode != 0:
+                    report(f"  {case:14} failed: {child.stderr.strip().splitlines()[-1:]}")
+                    continue
+                result = json.loads(child.stdout.strip().splitlines()[-1])
+                results[key] = result
+                extra = ", ".join(f"{name}={value}" for name, value in result.items()
+                                  if name not in ("seconds", "peak_rss_mb"))
+                report(f"  {case:14} {result['seconds'] * 1000:10.1f} ms  {result['peak_rss_mb']} MB peak  {extra}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if server is not None:
+            server.terminate()
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            report(f"REGRESSION {line}")
+        report(f"{len(regressions)} regressions against {args.compare}")
+        status = 1 if regressions else 0
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,384 +1,539 @@
 #!/usr/bin/env python3
+import sys
+import jsoncore
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in jsoncore.COMMANDS:
+    # Kommandozeilenbefehle brauchen kein Tk
+    sys.exit(jsoncore.main(sys.argv[1:]))
+
+import copy
 import json
+import re
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, simpledialog
-import sys
+from tkinter import ttk, messagebox, simpledialog
+from tkinter import font as tkfont
 import os
+import argparse
+import threading
+import queue
+import concurrent.futures
+import multiprocessing
+import time
+import tempfile
+import functools
+import cProfile
+from collections import ChainMap, deque
+from jsoncore import (
+    get_value_at, content_hash, render_member, is_last_member,
+    LoadCancelled, read_json_file, write_atomic, EditError, convert_value, format_decode_error, TEMPLATES,
+    find_syntax_error,
+    parse_pointer, merge_json, LazyNode, json_default, JSONStreamIndex, format_path, SearchIndex,
+    FileWatcher, JSONDocument
+)
+
+class VirtualText:
+    """Text pane that keeps the document as a list of lines and only puts a window of them into Tk"""
+    WINDOW_LINES = 2000
+    
+    def __init__(self, master, **options):
+        self.frame = ttk.Frame(master)
+        self.text = tk.Text(self.frame, **options)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.text.configure(yscrollcommand=self.on_text_scroll)
+        self.text.bind('<<Modified>>', self.on_modified)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.lines = ['']
+        self.start = 0      # first document line (0-based) inside the widget
+        self.count = 1      # number of document lines inside the widget
+        self.recenter_pending = False
+        self.dirty = False      # the window holds typed edits not yet in self.lines
+        self.on_edit = None
+        self.marks = {}         # tag -> (line, column) in document coordinates
+        self.version = 0        # bumped on every change of self.lines
+    
+    def on_modified(self, event):
+        # <<Modified>> only fires when the flag flips, so re-arm it for the next keystroke
+        if not self.text.edit_modified():
+            return
+        self.dirty = True
+        self.text.edit_modified(False)
+        if self.on_edit:
+            self.on_edit()
+    
+    def set_text(self, text):
+        self.lines = text.split('\n')
+        self.version += 1
+        self.render(0, 0)
+    
+    def get_text(self):
+        self.sync()
+        return '\n'.join(self.lines)
+    
+    def snapshot(self):
+        """(version, copy of the line list) without joining the text"""
+        self.sync()
+        return self.version, list(self.lines)
+    
+    def line_count(self):
+        self.sync()
+        return len(self.lines)
+    
+    def get_line(self, line):
+        """1-based document line"""
+        self.sync()
+        return self.lines[line - 1]
+    
+    def replace_lines(self, first, count, text):
+        """Replace count document lines starting at 1-based line first; text None just deletes them"""
+        self.sync()
+        new = [] if text is None else text.split('\n')
+        self.lines[first - 1:first - 1 + count] = new
+        if not self.lines:
+            self.lines = ['']
+        self.version += 1
+        if first - 1 < self.start + self.count:
+            # The window shows or follows the changed lines: refill it at the same place
+            self.render(self.start, None)
+    
+    def sync(self):
+        """Splice edits typed into the window back into the document"""
+        if not (self.dirty or self.text.edit_modified()):
+            return
+        window = self.text.get('1.0', 'end-1c').split('\n')
+        self.lines[self.start:self.start + self.count] = window
+        self.count = len(window)
+        self.version += 1
+        self.dirty = False
+        self.text.edit_modified(False)
+    
+    def render(self, start, top):
+        """Fill the widget with the window starting at start; top is the document line to scroll to"""
+        if top is None:
+            top = self.start + round(float(self.text.yview()[0]) * self.count)
+        insert = self.text.index('insert').split('.')
+        insert_line = self.start + int(insert[0]) - 1
+        
+        start = max(0, min(start, len(self.lines) - self.WINDOW_LINES))
+        window = self.lines[start:start + self.WINDOW_LINES]
+        state = self.text.cget('state')
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', '\n'.join(window))
+        self.text.configure(state=state)
+        self.text.edit_reset()  # Tk's own undo only covers typing inside the current window
+        self.dirty = False
+        self.text.edit_modified(False)
+        self.start, self.count = start, len(window)
+        
+        if start <= insert_line < start + self.count:
+            self.text.mark_set('insert', f"{insert_line - start + 1}.{insert[1]}")
+        for tag in self.marks:
+            self.apply_mark(tag)
+        self.text.yview_moveto((top - start) / self.count)
+    
+    def mark(self, tag, line, column):
+        """Tag a 1-based document line from column on; kept across window moves"""
+        self.unmark(tag)
+        self.marks[tag] = (line, column)
+        self.apply_mark(tag)
+    
+    def unmark(self, tag):
+        if self.marks.pop(tag, None) is not None:
+            self.text.tag_remove(tag, '1.0', tk.END)
+    
+    def apply_mark(self, tag):
+        line, column = self.marks[tag]
+        if self.start < line <= self.start + self.count:
+            row = line - self.start
+            self.text.tag_add(tag, f"{row}.{column}", f"{row}.end")
+    
+    def recenter(self, top):
+        self.sync()
+        self.render(top - self.WINDOW_LINES // 2, top)
+    
+    def schedule_recenter(self):
+        if not self.recenter_pending:
+            self.recenter_pending = True
+            self.text.after_idle(self.recenter_view)
+    
+    def recenter_view(self):
+        """Move the window if the viewport still sits near one of its edges"""
+        self.recenter_pending = False
+        first, last = self.text.yview()
+        if self.near_edge(first, last):
+            self.recenter(int(self.start + first * self.count))
+    
+    def near_edge(self, first, last):
+        return (first < 0.25 and self.start > 0) or \
+               (last > 0.75 and self.start + self.count < len(self.lines))
+    
+    def see(self, line):
+        """Scroll 1-based document line into view and return its widget line"""
+        self.sync()
+        if not self.start < line <= self.start + self.count:
+            self.recenter(line - 1)
+        self.text.see(f"{line - self.start}.0")
+        return line - self.start
+    
+    def on_text_scroll(self, first, last):
+        """Map the widget's scroll position onto the whole document"""
+        first, last = float(first), float(last)
+        total = len(self.lines)
+        self.scrollbar.set((self.start + first * self.count) / total,
+                           (self.start + last * self.count) / total)
+        if self.near_edge(first, last):
+            self.schedule_recenter()
+    
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            top = int(float(args[1]) * len(self.lines))
+            if self.start <= top < self.start + self.count:
+                self.text.yview_moveto((top - self.start) / self.count)
+            else:
+                self.recenter(top)
+        else:
+            self.text.yview(*args)
+
+class CountingTk:
+    """Stands in for root.tk and counts the Tcl commands the widgets send through it"""
+    
+    def __init__(self, tk):
+        self._tk = tk
+        self.calls = 0
+    
+    COUNTED = ('eval', 'getvar', 'setvar', 'globalgetvar', 'globalsetvar')  # besides call
+    
+    def call(self, *args):
+        self.calls += 1
+        return self._tk.call(*args)
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._tk, name)
+        if name not in self.COUNTED:
+            return attribute
+        
+        def counted(*args):
+            self.calls += 1
+            return attribute(*args)
+        return counted
+
+class ActionProfiler:
+    """Opt-in instrumentation of the action handlers: wall time, Tk calls, a JSON log
+    and a cProfile dump of every action slower than slow_ms"""
+    HISTORY = 200  # actions kept for the stats window
+    
+    def __init__(self, directory, slow_ms=200):
+        self.directory = directory
+        self.slow_ms = slow_ms
+        self.history = deque(maxlen=self.HISTORY)
+        self.tk = None
+        self.depth = 0
+        self.dumps = 0
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "actions.jsonl")
+        self.log = open(self.log_path, 'a', encoding='utf-8')
+    
+    def attach(self, root):
+        """Count root's Tcl calls; must run before the first widget copies root.tk"""
+        self.tk = root.tk = CountingTk(root.tk)
+    
+    def wrap(self, name, handler):
+        @functools.wraps(handler)
+        def timed(*args, **kwargs):
+            return self.run(name, handler, args, kwargs)
+        return timed
+    
+    def run(self, name, handler, args, kwargs):
+        # Nur die äußerste Aktion läuft unter cProfile, verschachtelte werden nur gemessen
+        profile = None
+        if self.depth == 0:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is already active
+                profile = None
+        calls = self.tk.calls if self.tk else 0
+        self.depth += 1
+        started = time.perf_counter()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.depth -= 1
+            if profile is not None:
+                profile.disable()
+            self.record(name, elapsed, (self.tk.calls if self.tk else 0) - calls, profile)
+    
+    def record(self, name, elapsed, tk_calls, profile):
+        entry = {"time": round(time.time(), 3), "action": name, "ms": round(elapsed, 2),
+                 "tk_calls": tk_calls, "depth": self.depth, "profile": None}
+        if profile is not None and elapsed >= self.slow_ms:
+            self.dumps += 1
+            entry["profile"] = os.path.join(self.directory,
+                                            f"{time.strftime('%Y%m%d-%H%M%S')}-{self.dumps}-{name}.prof")
+            profile.dump_stats(entry["profile"])
+            print(f"🐢 {name}: {elapsed:.0f} ms, {tk_calls} Tk calls -> {entry['profile']}")
+        self.history.append(entry)
+        self.log.write(json.dumps(entry) + "\n")
+        self.log.flush()
+    
+    def summary(self):
+        """action -> (count, average ms, max ms) over the kept history"""
+        times = {}
+        for entry in self.history:
+            times.setdefault(entry["action"], []).append(entry["ms"])
+        return {name: (len(ms), sum(ms) / len(ms), max(ms)) for name, ms in times.items()}
+    
+    def close(self):
+        self.log.close()
 
 class JSONViewer:
-    def __init__(self, filename):
+    AUTOSAVE_INTERVAL = 5000  # ms between journal fsyncs
+    JOURNAL_COMPACT_OPS = 1000  # logged operations before the journal is folded into a snapshot
+    VALIDATE_DELAY = 400  # ms without typing before the raw editor is parsed in the background
+    VALIDATE_PROCESS_LINES = 100000  # larger buffers are parsed in a worker process, not a thread
+    MAX_SEARCH_HITS = 1000  # results listed per search
+    SEARCH_DELAY = 250  # ms without typing before the search bar queries the index
+    SEARCH_SCOPES = ('all', 'keys', 'values', 'path')
+    WATCH_POLL = 1000  # ms between checks for changes reported by the file watcher
+    PROFILED_ACTIONS = ('add_item', 'edit_item', 'delete_item', 'refresh_views', 'search_tree',
+                        'start_search', 'save_json', 'change_language', 'toggle_dark_mode')
+    PROFILE_REFRESH = 1000  # ms between updates of an open stats window
+    LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+    FALLBACK_LANGUAGE = "en"
+    
+    def __init__(self, filename, lazy_tree=True, array_page_size=1000,
+                 backend="auto", stream_threshold=256 << 20, use_mmap=False, readonly=False,
+                 profiler=None):
         self.filename = filename
         self.modified = False
         self.dark_mode = False
         self.language = "en"  # Default: English
         
-        # Track expanded nodes
-        self.expanded_nodes = set()
-        
-        # Sprachdefinitionen
-        self.translations = {
-            "de": self.get_german_translations(),
-            "en": self.get_english_translations(),
-            "es": self.get_spanish_translations(),
-            "zh": self.get_chinese_translations(),
-            "ja": self.get_japanese_translations(),
-            "ko": self.get_korean_translations()
-        }
-        
-        if self.load_json():
-            self.setup_gui()
-    
-    def get_german_translations(self):
-        return {
-            "title": "JSON Editor",
-            "structure": "📁 JSON Struktur",
-            "raw_editor": "📝 Raw JSON Editor", 
-            "templates": "🚀 Schnell-Templates",
-            "add": "➕ Hinzufügen",
-            "edit": "✏️ Bearbeiten",
-            "delete": "🗑️ Löschen",
-            "search": "🔍 Suchen",
-            "save": "💾 Speichern",
-            "reload": "🔄 Neu laden",
-            "validate": "✅ Validieren",
-            "format": "🧹 Formatieren",
-            "ready": "✅ Bereit",
-            "modified": "✏️ Geändert",
-            "saved": "✅ Gespeichert",
-            "project_spec": "📋 Projekt Spec",
-            "api_design": "🔌 API Design",
-            "test_cases": "🧪 Test Cases",
-            "config": "⚙️ Config",
-            "data_model": "📊 Datenmodell",
-            "settings": "⚙️ Einstellungen",
-            "dark_mode": "🌙 Dark Mode",
-            "language": "🌐 Sprache",
-            "file_not_found": "Datei nicht gefunden",
-            "syntax_error": "JSON Syntax Fehler",
-            "save_success": "Datei erfolgreich gespeichert!",
-            "validation_ok": "✅ JSON ist syntaktisch korrekt!",
-            "validation_error": "❌ JSON Fehler",
-            "unsaved_changes": "Ungespeicherte Änderungen",
-            "confirm_close": "Ungespeicherte Änderungen gehen verloren. Wirklich schließen?",
-            "confirm_reload": "Ungespeicherte Änderungen gehen verloren. Fortfahren?",
-            "confirm_delete": "Wirklich löschen?",
-            "select_node": "Bitte wählen Sie einen Knoten aus!",
-            "select_item": "Bitte wählen Sie einen Eintrag aus!",
-            "key_prompt": "Schlüssel/Name:",
-            "type_prompt": "Typ (string/number/boolean/object/array):",
-            "value_prompt": "Wert:",
-            "search_prompt": "Suchbegriff:",
-            "template_prompt": "Template Name:",
-            "edit_prompt": "Aktueller Wert: {}\nNeuer Wert:",
-            "context_add": "➕ Hinzufügen",
-            "context_edit": "✏️ Bearbeiten", 
-            "context_delete": "🗑️ Löschen",
-            "context_copy": "📋 In Editor kopieren",
-            "context_scroll": "🎯 Zu diesem Punkt scrollen",
-            "object_edit_info": "Objekte und Arrays können nur über Raw-Editor bearbeitet werden.",
-            "tree_key": "Schlüssel / Eigenschaft",
-            "tree_type": "Typ",
-            "tree_value": "Wert"
-        }
-    
-    def get_english_translations(self):
-        return {
-            "title": "JSON Editor",
-            "structure": "📁 JSON Structure", 
-            "raw_editor": "📝 Raw JSON Editor",
-            "templates": "🚀 Quick Templates",
-            "add": "➕ Add",
-            "edit": "✏️ Edit",
-            "delete": "🗑️ Delete",
-            "search": "🔍 Search",
-            "save": "💾 Save",
-            "reload": "🔄 Reload",
-            "validate": "✅ Validate",
-            "format": "🧹 Format",
-            "ready": "✅ Ready",
-            "modified": "✏️ Modified",
-            "saved": "✅ Saved",
-            "project_spec": "📋 Project Spec",
-            "api_design": "🔌 API Design",
-            "test_cases": "🧪 Test Cases",
-            "config": "⚙️ Config",
-            "data_model": "📊 Data Model",
-            "settings": "⚙️ Settings",
-            "dark_mode": "🌙 Dark Mode",
-            "language": "🌐 Language",
-            "file_not_found": "File not found",
-            "syntax_error": "JSON Syntax Error",
-            "save_success": "File saved successfully!",
-            "validation_ok": "✅ JSON is syntactically correct!",
-            "validation_error": "❌ JSON Error",
-            "unsaved_changes": "Unsaved changes",
-            "confirm_close": "Unsaved changes will be lost. Really close?",
-            "confirm_reload": "Unsaved changes will be lost. Continue?",
-            "confirm_delete": "Really delete?",
-            "select_node": "Please select a node!",
-            "select_item": "Please select an item!",
-            "key_prompt": "Key/Name:",
-            "type_prompt": "Type (string/number/boolean/object/array):",
-            "value_prompt": "Value:",
-            "search_prompt": "Search term:",
-            "template_prompt": "Template name:",
-            "edit_prompt": "Current value: {}\nNew value:",
-            "context_add": "➕ Add",
-            "context_edit": "✏️ Edit",
-            "context_delete": "🗑️ Delete",
-            "context_copy": "📋 Copy to editor",
-            "context_scroll": "🎯 Scroll to this point",
-            "object_edit_info": "Objects and arrays can only be edited via Raw Editor.",
-            "tree_key": "Key / Property",
-            "tree_type": "Type", 
-            "tree_value": "Value"
-        }
-    
-    def get_spanish_translations(self):
-        return {
-            "title": "Editor JSON",
-            "structure": "📁 Estructura JSON",
-            "raw_editor": "📝 Editor JSON Raw",
-            "templates": "🚀 Plantillas Rápidas",
-            "add": "➕ Añadir",
-            "edit": "✏️ Editar",
-            "delete": "🗑️ Eliminar",
-            "search": "🔍 Buscar",
-            "save": "💾 Guardar",
-            "reload": "🔄 Recargar",
-            "validate": "✅ Validar",
-            "format": "🧹 Formatear",
-            "ready": "✅ Listo",
-            "modified": "✏️ Modificado",
-            "saved": "✅ Guardado",
-            "project_spec": "📋 Especificación Proyecto",
-            "api_design": "🔌 Diseño API",
-            "test_cases": "🧪 Casos Prueba",
-            "config": "⚙️ Configuración",
-            "data_model": "📊 Modelo Datos",
-            "settings": "⚙️ Ajustes",
-            "dark_mode": "🌙 Modo Oscuro",
-            "language": "🌐 Idioma",
-            "file_not_found": "Archivo no encontrado",
-            "syntax_error": "Error de sintaxis JSON",
-            "save_success": "¡Archivo guardado exitosamente!",
-            "validation_ok": "✅ ¡JSON es sintácticamente correcto!",
-            "validation_error": "❌ Error JSON",
-            "unsaved_changes": "Cambios no guardados",
-            "confirm_close": "Los cambios no guardados se perderán. ¿Realmente cerrar?",
-            "confirm_reload": "Los cambios no guardados se perderán. ¿Continuar?",
-            "confirm_delete": "¿Realmente eliminar?",
-            "select_node": "¡Por favor seleccione un nodo!",
-            "select_item": "¡Por favor seleccione un elemento!",
-            "key_prompt": "Clave/Nombre:",
-            "type_prompt": "Tipo (string/number/boolean/object/array):",
-            "value_prompt": "Valor:",
-            "search_prompt": "Término de búsqueda:",
-            "template_prompt": "Nombre plantilla:",
-            "edit_prompt": "Valor actual: {}\nNuevo valor:",
-            "context_add": "➕ Añadir",
-            "context_edit": "✏️ Editar",
-            "context_delete": "🗑️ Eliminar",
-            "context_copy": "📋 Copiar al editor",
-            "context_scroll": "🎯 Desplazar a este punto",
-            "object_edit_info": "Objetos y arrays solo pueden editarse mediante Editor Raw.",
-            "tree_key": "Clave / Propiedad",
-            "tree_type": "Tipo",
-            "tree_value": "Valor"
-        }
-    
-    def get_chinese_translations(self):
-        return {
-            "title": "JSON 编辑器",
-            "structure": "📁 JSON 结构",
-            "raw_editor": "📝 原始 JSON 编辑器",
-            "templates": "🚀 快速模板",
-            "add": "➕ 添加",
-            "edit": "✏️ 编辑",
-            "delete": "🗑️ 删除",
-            "search": "🔍 搜索",
-            "save": "💾 保存",
-            "reload": "🔄 重新加载",
-            "validate": "✅ 验证",
-            "format": "🧹 格式化",
-            "ready": "✅ 就绪",
-            "modified": "✏️ 已修改",
-            "saved": "✅ 已保存",
-            "project_spec": "📋 项目规范",
-            "api_design": "🔌 API 设计",
-            "test_cases": "🧪 测试用例",
-            "config": "⚙️ 配置",
-            "data_model": "📊 数据模型",
-            "settings": "⚙️ 设置",
-            "dark_mode": "🌙 暗黑模式",
-            "language": "🌐 语言",
-            "file_not_found": "文件未找到",
-            "syntax_error": "JSON 语法错误",
-            "save_success": "文件保存成功！",
-            "validation_ok": "✅ JSON 语法正确！",
-            "validation_error": "❌ JSON 错误",
-            "unsaved_changes": "未保存的更改",
-            "confirm_close": "未保存的更改将丢失。确定关闭？",
-            "confirm_reload": "未保存的更改将丢失。继续？",
-            "confirm_delete": "确定删除？",
-            "select_node": "请选择一个节点！",
-            "select_item": "请选择一个项目！",
-            "key_prompt": "键/名称：",
-            "type_prompt": "类型 (string/number/boolean/object/array)：",
-            "value_prompt": "值：",
-            "search_prompt": "搜索词：",
-            "template_prompt": "模板名称：",
-            "edit_prompt": "当前值：{}\n新值：",
-            "context_add": "➕ 添加",
-            "context_edit": "✏️ 编辑",
-            "context_delete": "🗑️ 删除",
-            "context_copy": "📋 复制到编辑器",
-            "context_scroll": "🎯 滚动到此点",
-            "object_edit_info": "对象和数组只能通过原始编辑器编辑。",
-            "tree_key": "键 / 属性",
-            "tree_type": "类型",
-            "tree_value": "值"
-        }
-    
-    def get_japanese_translations(self):
-        return {
-            "title": "JSON エディタ",
-            "structure": "📁 JSON 構造",
-            "raw_editor": "📝 生JSONエディタ",
-            "templates": "🚀 クイックテンプレート",
-            "add": "➕ 追加",
-            "edit": "✏️ 編集",
-            "delete": "🗑️ 削除",
-            "search": "🔍 検索",
-            "save": "💾 保存",
-            "reload": "🔄 再読み込み",
-            "validate": "✅ 検証",
-            "format": "🧹 フォーマット",
-            "ready": "✅ 準備完了",
-            "modified": "✏️ 変更済み",
-            "saved": "✅ 保存済み",
-            "project_spec": "📋 プロジェクト仕様",
-            "api_design": "🔌 API設計",
-            "test_cases": "🧪 テストケース",
-            "config": "⚙️ 設定",
-            "data_model": "📊 データモデル",
-            "settings": "⚙️ 設定",
-            "dark_mode": "🌙 ダークモード",
-            "language": "🌐 言語",
-            "file_not_found": "ファイルが見つかりません",
-            "syntax_error": "JSON構文エラー",
-            "save_success": "ファイルの保存に成功しました！",
-            "validation_ok": "✅ JSONは構文的に正しいです！",
-            "validation_error": "❌ JSONエラー",
-            "unsaved_changes": "未保存の変更",
-            "confirm_close": "未保存の変更は失われます。本当に閉じますか？",
-            "confirm_reload": "未保存の変更は失われます。続行しますか？",
-            "confirm_delete": "本当に削除しますか？",
-            "select_node": "ノードを選択してください！",
-            "select_item": "項目を選択してください！",
-            "key_prompt": "キー/名前：",
-            "type_prompt": "タイプ (string/number/boolean/object/array)：",
-            "value_prompt": "値：",
-            "search_prompt": "検索語：",
-            "template_prompt": "テンプレート名：",
-            "edit_prompt": "現在の値：{}\n新しい値：",
-            "context_add": "➕ 追加",
-            "context_edit": "✏️ 編集",
-            "context_delete": "🗑️ 削除",
-            "context_copy": "📋 エディタにコピー",
-            "context_scroll": "🎯 このポイントにスクロール",
-            "object_edit_info": "オブジェクトと配列はRawエディタでのみ編集できます。",
-            "tree_key": "キー / プロパティ",
-            "tree_type": "タイプ",
-            "tree_value": "値"
-        }
-    
-    def get_korean_translations(self):
-        return {
-            "title": "JSON 편집기",
-            "structure": "📁 JSON 구조",
-            "raw_editor": "📝 원본 JSON 편집기",
-            "templates": "🚀 빠른 템플릿",
-            "add": "➕ 추가",
-            "edit": "✏️ 편집",
-            "delete": "🗑️ 삭제",
-            "search": "🔍 검색",
-            "save": "💾 저장",
-            "reload": "🔄 다시 로드",
-            "validate": "✅ 검증",
-            "format": "🧹 포맷",
-            "ready": "✅ 준비됨",
-            "modified": "✏️ 수정됨",
-            "saved": "✅ 저장됨",
-            "project_spec": "📋 프로젝트 사양",
-            "api_design": "🔌 API 설계",
-            "test_cases": "🧪 테스트 케이스",
-            "config": "⚙️ 설정",
-            "data_model": "📊 데이터 모델",
-            "settings": "⚙️ 설정",
-            "dark_mode": "🌙 다크 모드",
-            "language": "🌐 언어",
-            "file_not_found": "파일을 찾을 수 없습니다",
-            "syntax_error": "JSON 구문 오류",
-            "save_success": "파일이 성공적으로 저장되었습니다!",
-            "validation_ok": "✅ JSON이 구문적으로 올바릅니다!",
-            "validation_error": "❌ JSON 오류",
-            "unsaved_changes": "저장되지 않은 변경 사항",
-            "confirm_close": "저장되지 않은 변경 사항이 손실됩니다. 정말 닫으시겠습니까?",
-            "confirm_reload": "저장되지 않은 변경 사항이 손실됩니다. 계속하시겠습니까?",
-            "confirm_delete": "정말 삭제하시겠습니까?",
-            "select_node": "노드를 선택해 주세요!",
-            "select_item": "항목을 선택해 주세요!",
-            "key_prompt": "키/이름:",
-            "type_prompt": "유형 (string/number/boolean/object/array):",
-            "value_prompt": "값:",
-            "search_prompt": "검색어:",
-            "template_prompt": "템플릿 이름:",
-            "edit_prompt": "현재 값: {}\n새 값:",
-            "context_add": "➕ 추가",
-            "context_edit": "✏️ 편집",
-            "context_delete": "🗑️ 삭제",
-            "context_copy": "📋 편집기에 복사",
-            "context_scroll": "🎯 이 지점으로 스크롤",
-            "object_edit_info": "객체와 배열은 Raw 편집기를 통해서만 편집할 수 있습니다.",
-            "tree_key": "키 / 속성",
-            "tree_type": "유형",
-            "tree_value": "값"
-        }
+        # Track expanded nodes by JSON path; open range buckets add their (start, stop) as last step
+        self.expanded_paths = set()
+        
+        # Lazy mode: insert container children only when a node is expanded
+        self.lazy_tree = lazy_tree
+        
+        # Arrays longer than this are shown as expandable "[0..999]" range buckets
+        self.array_page_size = max(2, array_page_size)
+        self.array_buckets = {}
+        
+        # Treeview item id -> (parent container, key/index); the root maps to (None, None)
+        self.node_index = {}
+        self.item_index = {}  # (id(container), key) -> item, the reverse of node_index
+        
+        # "full" parses the whole file, "stream" decodes containers on expand,
+        # "auto" streams files larger than stream_threshold bytes
+        self.backend = backend
+        self.stream_threshold = stream_threshold
+        self.stream_index = None
+        self.use_mmap = use_mmap or readonly
+        
+        # Read-only mode browses a memory-mapped file: decoded levels are only held by
+        # the rows showing them and never written back into self.document.data
+        self.readonly = readonly
+        if readonly:
+            self.backend = "stream"
+        self.member_spans = {}
+        self.decoded_rows = {}
+        
+        # Raw editor mirrors json.dumps(self.document.data, indent=2) until the user types in it
+        self.raw_synced = True
+        self.raw_edit_job = None
+        
+        # Background validation of the raw editor: pending timer, run counter, last good parse
+        self.validate_job = None
+        self.validate_generation = 0
+        self.validate_future = None
+        self.validate_pool = None  # worker process for large buffers, started on first use
+        self.last_parse = None  # (raw_view.version, data)
+        
+        # Language catalogs: locales/<lang>.json is loaded on first use,
+        # only the English fallback is read up front
+        self.translations = {}
+        self.fallback = self.load_catalog(self.FALLBACK_LANGUAGE)
+        
+        # Open the window right away; the document is parsed on a worker thread.
+        # The model, its history, journal, hashes and search index live in self.document
+        self.document = JSONDocument(filename)
+        self.load_cancel = None
+        
+        # Rows marked as changed against the version on disk
+        self.dirty_items = set()
+        self.dirty_job = None
+        
+        # Changes by other programs, merged against self.document.base_bytes
+        self.watcher = FileWatcher(filename)
+        self.ignored_digest = None
+        
+        # Search bar: debounce timer, query counter, streamed result paths, highlighted rows
+        self.search_active = False
+        self.search_job = None
+        self.search_generation = 0
+        self.search_results = []
+        self.search_position = -1
+        self.found_items = set()
+        self.search_index_pending = False  # the index is only built once the search bar is used
+        
+        # Opt-in instrumentation: the action handlers are replaced by timed wrappers
+        # before setup_gui binds them to buttons and events
+        self.profiler = profiler
+        if profiler:
+            for name in self.PROFILED_ACTIONS:
+                setattr(self, name, profiler.wrap(name, getattr(self, name)))
+        self.setup_gui()
+        self.load_json_async(initial=True)
+        self.root.after(self.AUTOSAVE_INTERVAL, self.autosave)
+        self.root.after(self.WATCH_POLL, self.poll_file_changes)
+    
+    def load_catalog(self, language):
+        """Translations for language from locales/<language>.json, read on first use and then cached"""
+        if language not in self.translations:
+            try:
+                with open(os.path.join(self.LOCALES_DIR, f"{language}.json"), encoding='utf-8') as f:
+                    self.translations[language] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Language catalog '{language}' could not be loaded: {e}")
+                self.translations[language] = {}
+        return self.translations[language]
+    
+    def available_languages(self):
+        """Languages that have a catalog in LOCALES_DIR"""
+        try:
+            return sorted(name[:-5] for name in os.listdir(self.LOCALES_DIR) if name.endswith('.json'))
+        except OSError:
+            return [self.FALLBACK_LANGUAGE]
     
     def t(self, key):
-        """Get translation for current language"""
-        return self.translations[self.language].get(key, key)
+        """Get translation for current language, falling back to English"""
+        text = self.load_catalog(self.language).get(key)
+        return text if text is not None else self.fallback.get(key, key)
     
-    def load_json(self):
-        if not os.path.exists(self.filename):
+    def show_load_error(self, e):
+        if isinstance(e, FileNotFoundError):
             messagebox.showerror(self.t("file_not_found"), f"{self.t('file_not_found')}: '{self.filename}'")
-            return False
-            
-        try:
-            with open(self.filename, 'r', encoding='utf-8') as f:
-                content = f.read()
-                self.data = json.loads(content)
-            print(f"✅ JSON file '{self.filename}' loaded successfully!")
-            self.modified = False
-            return True
-        except json.JSONDecodeError as e:
-            error_msg = f"{self.t('syntax_error')}:\n{e}\n\n"
-            error_msg += f"Position: Line {e.lineno}, Column {e.colno}\n"
-            
-            lines = content.split('\n')
-            if e.lineno <= len(lines):
-                error_msg += f"Error line:\n{lines[e.lineno-1]}\n"
-                error_msg += " " * (e.colno - 1) + "^\n"
-            
+        elif isinstance(e, json.JSONDecodeError):
+            error_msg = f"{self.t('syntax_error')}:\n{e}\n\n" + format_decode_error(e)
             messagebox.showerror(self.t("syntax_error"), error_msg)
-            return False
-        except Exception as e:
+        else:
             messagebox.showerror("Error", f"Loading error: {e}")
-            return False
+    
+    def load_json_async(self, initial=False):
+        """Read and parse self.filename on a worker thread, reporting progress in the status bar"""
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+        cancel = threading.Event()
+        self.load_cancel = cancel
+        results = queue.Queue()
+        
+        def worker():
+            index = None
+            try:
+                progress = lambda done, total: results.put(('progress', done, total))
+                spans = {}
+                document = JSONDocument(self.filename)
+                if self.use_streaming():
+                    index = JSONStreamIndex(self.filename, self.use_mmap)
+                    document.data = index.load_root(progress, cancel, spans)
+                else:
+                    document.load(progress, cancel)
+                results.put(('done', document, index, spans))
+                return
+            except LoadCancelled:
+                results.put(('cancelled',))
+            except Exception as e:
+                results.put(('error', e))
+            if index is not None:
+                index.close()
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.update_save_button()
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+        self.status_label.config(text=self.t("loading"), foreground="orange")
+        self.root.after(50, self.poll_loading, results, cancel, initial)
+    
+    def poll_loading(self, results, cancel, initial):
+        """Drain worker messages on the Tk thread; Tk must not be touched from the worker"""
+        if cancel is not self.load_cancel:
+            return
+        
+        message = None
+        try:
+            while True:
+                message = results.get_nowait()
+                if message[0] != 'progress':
+                    break
+        except queue.Empty:
+            pass
+        
+        if message is None or message[0] == 'progress':
+            if message is not None:
+                done, total = message[1], message[2]
+                if total is None:
+                    self.status_label.config(text=self.t("parsing"))
+                else:
+                    self.status_label.config(
+                        text=f"{self.t('loading')} {done / 1e6:.1f}/{total / 1e6:.1f} MB ({done * 100 // max(total, 1)}%)")
+            self.root.after(50, self.poll_loading, results, cancel, initial)
+            return
+        
+        self.load_cancel = None
+        self.cancel_button.pack_forget()
+        if message[0] != 'done':
+            self.update_save_button()  # a cancelled reload keeps the previous document
+        if message[0] == 'done':
+            if self.stream_index is not None:
+                self.stream_index.close()
+            # Reloading throws away this session's edits; a crashed session's journal stays
+            self.document.journal.release()
+            self.document, self.stream_index = message[1], message[2]
+            self.watcher.watch(self.document.saved_digest)
+            self.ignored_digest = None
+            self.member_spans.clear()
+            if self.stream_index is not None:
+                self.member_spans[id(self.document.data)] = (self.document.data, message[3])
+            print(f"✅ JSON file '{self.filename}' loaded successfully!")
+            self.update_save_button()
+            self.refresh_views()
+            self.set_modified(False)
+            self.status_label.config(text=self.t("readonly_mode" if self.readonly else "ready"))
+            if initial:
+                self.offer_recovery()
+        elif message[0] == 'cancelled':
+            self.status_label.config(text=self.t("load_cancelled"), foreground="orange")
+        else:
+            self.show_load_error(message[1])
+            if initial:
+                # Same as before: a file that cannot be loaded does not get a window
+                self.root.destroy()
+            else:
+                self.set_modified(self.modified)
+    
+    def use_streaming(self):
+        if self.backend == "auto":
+            return os.path.getsize(self.filename) > self.stream_threshold
+        return self.backend == "stream"
+    
+    def can_save(self):
+        """False while a load runs or when no load succeeded yet, so save_json cannot write null"""
+        return self.load_cancel is None and (self.document.data is not None or self.document.saved_digest is not None)
+    
+    def update_save_button(self):
+        self.save_button.configure(state=tk.NORMAL if self.can_save() else tk.DISABLED)
+    
+    def cancel_loading(self):
+        if self.load_cancel is not None:
+            self.load_cancel.set()
     
     def setup_gui(self):
         self.root = tk.Tk()
+        self.translated_widgets = []  # (widget, translation key, suffix) for change_language
+        if self.profiler:
+            self.profiler.attach(self.root)
+            self.root.bind('<Control-Shift-P>', self.show_profile_stats)
         self.update_title()
         self.root.geometry("1600x1000")
         
@@ -398,25 +553,64 @@ class JSONViewer:
         main_paned.add(right_frame, weight=1)
         
         # === LINKE SEITE: STRUKTUR-ANSICHT ===
-        tree_frame = ttk.LabelFrame(left_frame, text=self.t("structure"))
+        tree_frame = self.translatable(ttk.LabelFrame(left_frame), "structure")
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=(0,5))
         
         # Edit-Buttons über dem Baum
         edit_button_frame = ttk.Frame(tree_frame)
         edit_button_frame.pack(fill=tk.X, padx=5, pady=5)
         
-        ttk.Button(edit_button_frame, text=self.t("add"), 
-                  command=self.add_item, width=14).pack(side=tk.LEFT, padx=2)
-        ttk.Button(edit_button_frame, text=self.t("edit"), 
-                  command=self.edit_item, width=14).pack(side=tk.LEFT, padx=2)
-        ttk.Button(edit_button_frame, text=self.t("delete"), 
-                  command=self.delete_item, width=14).pack(side=tk.LEFT, padx=2)
-        ttk.Button(edit_button_frame, text=self.t("search"), 
-                  command=self.search_dialog, width=14).pack(side=tk.LEFT, padx=2)
+        for key, command in (("add", self.add_item),
+                             ("edit", self.edit_item),
+                             ("delete", self.delete_item),
+                             ("search", self.show_search_bar)):
+            button = ttk.Button(edit_button_frame, command=command, width=14)
+            self.translatable(button, key).pack(side=tk.LEFT, padx=2)
+        
+        # Suchleiste (nicht modal), wird erst bei Bedarf eingeblendet
+        self.search_frame = ttk.Frame(tree_frame)
+        search_bar = ttk.Frame(self.search_frame)
+        search_bar.pack(fill=tk.X)
+        self.translatable(ttk.Label(search_bar), "search_prompt").pack(side=tk.LEFT, padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', self.on_search_change)
+        self.search_entry = ttk.Entry(search_bar, textvariable=self.search_var, width=30)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind('<Return>', self.search_next)
+        self.search_entry.bind('<Shift-Return>', self.search_prev)
+        self.search_entry.bind('<Escape>', self.hide_search_bar)
+        self.search_scope = ttk.Combobox(search_bar, state='readonly', width=10,
+                                         values=[self.t(f"search_{scope}") for scope in self.SEARCH_SCOPES])
+        self.search_scope.current(0)
+        self.search_scope.pack(side=tk.LEFT, padx=2)
+        self.search_scope.bind('<<ComboboxSelected>>', self.on_search_change)
+        self.search_regex = tk.BooleanVar(value=False)
+        self.search_regex_check = self.translatable(ttk.Checkbutton(search_bar, variable=self.search_regex,
+                                                                    command=self.on_search_change), "search_regex")
+        self.search_regex_check.pack(side=tk.LEFT, padx=2)
+        ttk.Button(search_bar, text="▲", width=3, command=self.search_prev).pack(side=tk.LEFT)
+        ttk.Button(search_bar, text="▼", width=3, command=self.search_next).pack(side=tk.LEFT)
+        self.search_count_label = ttk.Label(search_bar, text="", width=12)
+        self.search_count_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_bar, text="✖", width=3, command=self.hide_search_bar).pack(side=tk.LEFT)
+        
+        result_frame = ttk.Frame(self.search_frame)
+        result_frame.pack(fill=tk.X, pady=(5, 0))
+        self.search_listbox = tk.Listbox(result_frame, height=6, font=('Consolas', 9))
+        result_scroll = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.search_listbox.yview)
+        self.search_listbox.configure(yscrollcommand=result_scroll.set)
+        self.search_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        result_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.search_listbox.bind('<<ListboxSelect>>', self.on_search_result_select)
+        self.root.bind('<Control-f>', self.show_search_bar)
+        self.root.bind('<Control-z>', self.undo)
+        self.root.bind('<Control-y>', self.redo)
+        self.root.bind('<Control-Shift-Z>', self.redo)
         
         # Baum mit besserem Styling
         tree_container = ttk.Frame(tree_frame)
         tree_container.pack(fill=tk.BOTH, expand=True)
+        self.tree_container = tree_container
         
         self.tree = ttk.Treeview(tree_container, columns=('type', 'value'), show='tree headings', height=25)
         self.tree.heading('#0', text=self.t("tree_key"))
@@ -442,72 +636,79 @@ class JSONViewer:
         
         # Bind events
         self.tree.bind('<Double-1>', self.toggle_node)
+        self.tree.bind('<<TreeviewOpen>>', self.on_tree_open)
+        self.tree.bind('<<TreeviewClose>>', self.on_tree_close)
+        self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
         
         # NEW: Bind in-place editing for ALL columns
         self.tree.bind('<ButtonRelease-1>', self.on_tree_click)
         
         # === RECHTE SEITE: RAW EDITOR ===
-        raw_frame = ttk.LabelFrame(right_frame, text=self.t("raw_editor"))
+        raw_frame = self.translatable(ttk.LabelFrame(right_frame), "raw_editor")
         raw_frame.pack(fill=tk.BOTH, expand=True, padx=(5,0))
         
         # Control Buttons über Raw Editor
         raw_control_frame = ttk.Frame(raw_frame)
         raw_control_frame.pack(fill=tk.X, padx=5, pady=5)
         
-        ttk.Button(raw_control_frame, text=self.t("save"), 
-                  command=self.save_json, width=12).pack(side=tk.LEFT, padx=2)
-        ttk.Button(raw_control_frame, text=self.t("reload"), 
-                  command=self.reload_json, width=12).pack(side=tk.LEFT, padx=2)
-        ttk.Button(raw_control_frame, text=self.t("validate"), 
-                  command=self.validate_json, width=12).pack(side=tk.LEFT, padx=2)
-        ttk.Button(raw_control_frame, text=self.t("format"), 
-                  command=self.format_json, width=12).pack(side=tk.LEFT, padx=2)
-        
-        self.raw_text = scrolledtext.ScrolledText(raw_frame, wrap=tk.NONE, font=('Consolas', 10))
-        self.raw_text.pack(fill=tk.BOTH, expand=True)
-        self.raw_text.insert(tk.END, json.dumps(self.data, indent=2, ensure_ascii=False))
-        self.raw_text.bind('<KeyRelease>', self.on_raw_edit)
+        for key, command in (("save", self.save_json),
+                             ("reload", self.reload_json),
+                             ("diff", self.diff_with_disk),
+                             ("validate", self.validate_json),
+                             ("format", self.format_json)):
+            button = ttk.Button(raw_control_frame, command=command, width=12)
+            self.translatable(button, key).pack(side=tk.LEFT, padx=2)
+            if key == "save":
+                # Enabled once a load succeeded, see update_save_button
+                self.save_button = button
+                button.configure(state=tk.DISABLED)
+        
+        # Nur ein Fenster von Zeilen liegt im Text-Widget, der Rest in raw_view.lines
+        self.raw_view = VirtualText(raw_frame, wrap=tk.NONE, font=('Consolas', 10), undo=True)
+        self.raw_view.frame.pack(fill=tk.BOTH, expand=True)
+        self.raw_text = self.raw_view.text
+        self.raw_view.on_edit = self.on_raw_edit
+        self.raw_text.tag_configure('json_error', background='#ffb3b3', foreground='black', underline=True)
         
         # === UNTERE LEISTE: TEMPLATES & EINSTELLUNGEN ===
         bottom_frame = ttk.Frame(self.root)
         bottom_frame.pack(fill=tk.X, padx=10, pady=(0,10))
         
         # Template Buttons
-        template_frame = ttk.LabelFrame(bottom_frame, text=self.t("templates"))
+        template_frame = self.translatable(ttk.LabelFrame(bottom_frame), "templates")
         template_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0,10))
         
         template_buttons = [
-            (self.t("project_spec"), "projekt_spec"),
-            (self.t("api_design"), "api_design"),
-            (self.t("test_cases"), "test_cases"),
-            (self.t("config"), "config"),
-            (self.t("data_model"), "datenmodell")
+            ("project_spec", "projekt_spec"),
+            ("api_design", "api_design"),
+            ("test_cases", "test_cases"),
+            ("config", "config"),
+            ("data_model", "datenmodell")
         ]
         
-        for text, template_type in template_buttons:
-            ttk.Button(template_frame, text=text, 
-                      command=lambda t=template_type: self.add_template(t),
-                      width=15).pack(side=tk.LEFT, padx=2, pady=2)
+        for key, template_type in template_buttons:
+            self.translatable(ttk.Button(template_frame, 
+                                         command=lambda t=template_type: self.add_template(t),
+                                         width=15), key).pack(side=tk.LEFT, padx=2, pady=2)
         
         # Settings Buttons
-        settings_frame = ttk.LabelFrame(bottom_frame, text=self.t("settings"))
+        settings_frame = self.translatable(ttk.LabelFrame(bottom_frame), "settings")
         settings_frame.pack(side=tk.RIGHT)
         
         # Dark Mode Toggle
         self.dark_mode_var = tk.BooleanVar(value=self.dark_mode)
-        ttk.Checkbutton(settings_frame, text=self.t("dark_mode"), 
-                       variable=self.dark_mode_var,
-                       command=self.toggle_dark_mode).pack(side=tk.LEFT, padx=5)
+        self.translatable(ttk.Checkbutton(settings_frame, variable=self.dark_mode_var,
+                                          command=self.toggle_dark_mode), "dark_mode").pack(side=tk.LEFT, padx=5)
         
         # Language Selector
         lang_frame = ttk.Frame(settings_frame)
         lang_frame.pack(side=tk.LEFT, padx=10)
         
-        ttk.Label(lang_frame, text=self.t("language") + ":").pack(side=tk.LEFT)
+        self.translatable(ttk.Label(lang_frame), "language", ":").pack(side=tk.LEFT)
         
         self.lang_var = tk.StringVar(value=self.language)
         lang_combo = ttk.Combobox(lang_frame, textvariable=self.lang_var, 
-                                 values=["de", "en", "es", "zh", "ja", "ko"],
+                                 values=self.available_languages(),
                                  state="readonly", width=8)
         lang_combo.pack(side=tk.LEFT, padx=5)
         lang_combo.bind('<<ComboboxSelected>>', self.change_language)
@@ -516,6 +717,10 @@ class JSONViewer:
         self.status_label = ttk.Label(settings_frame, text=self.t("ready"), foreground="green")
         self.status_label.pack(side=tk.LEFT, padx=(20,0))
         
+        # Only shown while a file is being loaded
+        self.cancel_button = self.translatable(ttk.Button(settings_frame, command=self.cancel_loading,
+                                                          width=12), "cancel")
+        
         # Jetzt erst das Theme anwenden, nachdem alle Widgets erstellt sind
         self.apply_theme()
         
@@ -523,8 +728,14 @@ class JSONViewer:
     
     def setup_tree_tags(self):
         """Setup tree tags for light/dark mode"""
+        # Teilbäume, die sich seit dem Laden geändert haben
+        if not hasattr(self, 'dirty_font'):
+            self.dirty_font = tkfont.nametofont('TkDefaultFont').copy()
+            self.dirty_font.configure(weight='bold', slant='italic')
+        self.tree.tag_configure('dirty', font=self.dirty_font)
         if self.dark_mode:
-            # Dark mode colors
+            # Dark mode colors; 'found' is created first so it wins over the level backgrounds
+            self.tree.tag_configure('found', background='#555500')
             self.tree.tag_configure('level_0', background='#2d2d2d', foreground='#ffffff')
             self.tree.tag_configure('level_1', background='#3d3d3d', foreground='#ffffff')
             self.tree.tag_configure('level_2', background='#4d4d4d', foreground='#ffffff')
@@ -533,9 +744,9 @@ class JSONViewer:
             self.tree.tag_configure('object', foreground='#66ccff')
             self.tree.tag_configure('array', foreground='#ff9966')
             self.tree.tag_configure('value', foreground='#cccccc')
-            self.tree.tag_configure('found', background='#555500')
         else:
             # Light mode colors - FIXED: Ensure proper colors in light mode
+            self.tree.tag_configure('found', background='yellow')
             self.tree.tag_configure('level_0', background='#f0f8ff', foreground='#000000')
             self.tree.tag_configure('level_1', background='#fff0f5', foreground='#000000')
             self.tree.tag_configure('level_2', background='#f0fff0', foreground='#000000')
@@ -544,7 +755,6 @@ class JSONViewer:
             self.tree.tag_configure('object', foreground='#0066cc')
             self.tree.tag_configure('array', foreground='#cc6600')
             self.tree.tag_configure('value', foreground='#333333')
-            self.tree.tag_configure('found', background='yellow')
     
     def apply_theme(self):
         """Apply light/dark theme to the application - FIXED version"""
@@ -624,9 +834,13 @@ class JSONViewer:
         self.tree.heading('type', text=self.t("tree_type"))
         self.tree.heading('value', text=self.t("tree_value"))
         
-        # Update all frame labels
-        for widget in self.root.winfo_children():
-            self._update_widget_texts_recursive(widget)
+        # Labels, frames and buttons registered by translatable()
+        for widget, key, suffix in self.translated_widgets:
+            widget.configure(text=self.t(key) + suffix)
+        
+        # Search scope names live in the combobox values
+        self.search_scope.configure(values=[self.t(f"search_{scope}") for scope in self.SEARCH_SCOPES])
+        self.search_scope.current(self.search_scope.current())
         
         # Update status
         if self.modified:
@@ -634,45 +848,11 @@ class JSONViewer:
         else:
             self.status_label.config(text=self.t("saved"), foreground="green")
     
-    def _update_widget_texts_recursive(self, widget):
-        """Recursively update all widget texts"""
-        try:
-            # Update widget text based on type
-            if isinstance(widget, (ttk.LabelFrame, ttk.Frame)):
-                # Try to get original text and translate it
-                try:
-                    current_text = widget.cget('text')
-                    if current_text:
-                        # Find translation key for this text
-                        for key, trans_dict in self.translations.items():
-                            for trans_key, trans_text in trans_dict.items():
-                                if trans_text == current_text:
-                                    widget.config(text=self.t(trans_key))
-                                    break
-                except:
-                    pass
-                    
-            elif isinstance(widget, (ttk.Button, ttk.Label)):
-                # Try to get original text and translate it
-                try:
-                    current_text = widget.cget('text')
-                    if current_text:
-                        # Find translation key for this text
-                        for key, trans_dict in self.translations.items():
-                            for trans_key, trans_text in trans_dict.items():
-                                if trans_text == current_text:
-                                    widget.config(text=self.t(trans_key))
-                                    break
-                except:
-                    pass
-            
-            # Recursively process children
-            for child in widget.winfo_children():
-                self._update_widget_texts_recursive(child)
-                
-        except Exception as e:
-            # Ignore errors in recursive processing
-            pass
+    def translatable(self, widget, key, suffix=""):
+        """Give widget the text for key and register it, so change_language can set it again"""
+        widget.configure(text=self.t(key) + suffix)
+        self.translated_widgets.append((widget, key, suffix))
+        return widget
     
     def update_title(self):
         """Update window title"""
@@ -681,80 +861,218 @@ class JSONViewer:
             title += " *"
         self.root.title(title)
     
-    def populate_tree(self, parent='', json_dict=None, level=0):
-        # Save expanded state before refreshing
-        self.save_expanded_state()
-        
-        if json_dict is None:
-            json_dict = self.data
-            # Clear the tree
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-                
-            root_node = self.tree.insert('', 'end', text=self.filename, 
-                                       values=('📁 ROOT', ''), 
-                                       tags=('level_0', 'object'))
-            parent = root_node
-            level = 1
-            
-        for key, value in json_dict.items():
-            tag = f'level_{min(level, 4)}'
+    def populate_tree(self):
+        """Rebuild the tree; containers are only filled in when expanded"""
+        # Clear the tree
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        self.array_buckets.clear()
+        self.node_index.clear()
+        self.item_index.clear()
+        self.decoded_rows.clear()
             
-            if isinstance(value, dict):
-                node = self.tree.insert(parent, 'end', text=str(key), 
-                                      values=('📁 OBJECT', f'{len(value)} items'),
-                                      tags=(tag, 'object'))
-                self.populate_tree(node, value, level + 1)
-            elif isinstance(value, list):
-                node = self.tree.insert(parent, 'end', text=str(key), 
-                                      values=('📋 ARRAY', f'{len(value)} items'),
-                                      tags=(tag, 'array'))
-                for i, item in enumerate(value):
-                    item_tag = f'level_{min(level + 1, 4)}'
-                    if isinstance(item, (dict, list)):
-                        item_type = '📁 OBJECT' if isinstance(item, dict) else '📋 ARRAY'
-                        item_text = f"[{i}]"
-                        sub_node = self.tree.insert(node, 'end', text=item_text,
-                                                  values=(item_type, '...'),
-                                                  tags=(item_tag, 'object' if isinstance(item, dict) else 'array'))
-                        self.populate_tree(sub_node, item if isinstance(item, dict) else {f"[{i}]": item}, level + 2)
-                    else:
-                        self.tree.insert(node, 'end', text=f"[{i}]", 
-                                       values=('📄 VALUE', self.truncate_value(item)),
-                                       tags=(item_tag, 'value'))
-            else:
-                value_type = '📄 STRING' if isinstance(value, str) else '🔢 NUMBER' if isinstance(value, (int, float)) else '⚡ BOOLEAN' if isinstance(value, bool) else '❓ OTHER'
-                self.tree.insert(parent, 'end', text=str(key), 
-                               values=(value_type, self.truncate_value(value)),
-                               tags=(tag, 'value'))
+        root_node = self.tree.insert('', 'end', text=self.filename, 
+                                   values=('📁 ROOT', ''), 
+                                   tags=('level_0', 'object'))
+        self.node_index[root_node] = (None, None)
+        self.insert_children(root_node, self.document.data, 1)
         
         # Restore expanded state after populating
         self.restore_expanded_state()
     
-    def save_expanded_state(self):
-        """Save which nodes are expanded"""
-        self.expanded_nodes.clear()
-        for item in self.tree.get_children(''):
-            self._save_expanded_recursive(item)
+    def insert_children(self, parent, value, level):
+        """Insert the direct children of a dict or list below parent"""
+        if isinstance(value, dict):
+            for key in value:
+                self.insert_node(parent, value, key, level)
+        elif isinstance(value, list):
+            self.insert_array_range(parent, value, 0, len(value), level)
     
-    def _save_expanded_recursive(self, item):
-        """Recursively save expanded nodes"""
-        if self.tree.item(item, 'open'):
-            self.expanded_nodes.add(item)
-        for child in self.tree.get_children(item):
-            self._save_expanded_recursive(child)
+    def insert_array_range(self, parent, value, start, stop, level):
+        """Insert value[start:stop]; long ranges are split into range buckets"""
+        count = stop - start
+        if count <= self.array_page_size:
+            for i in range(start, stop):
+                self.insert_node(parent, value, i, level)
+            return
+        
+        # Bucket size grows by page size per nesting step, so no node gets more than ~page size rows
+        span = self.array_page_size
+        while span * self.array_page_size < count:
+            span *= self.array_page_size
+        
+        for first in range(start, stop, span):
+            last = min(first + span, stop)
+            node = self.tree.insert(parent, 'end', text=f"[{first}..{last - 1}]",
+                                  values=('📋 RANGE', f'{last - first} items'),
+                                  tags=(f'level_{min(level, 4)}', 'array', 'bucket'))
+            self.array_buckets[node] = (first, last)
+            if self.lazy_tree:
+                self.tree.insert(node, 'end', text='…', tags=('placeholder',))
+            else:
+                self.insert_array_range(node, value, first, last, level + 1)
     
-    def restore_expanded_state(self):
-        """Restore expanded nodes"""
-        for item in self.tree.get_children(''):
-            self._restore_expanded_recursive(item)
+    def insert_node(self, parent, container, key, level):
+        """Insert the row for container[key]; non-empty containers get a placeholder child in lazy mode"""
+        value = container[key]
+        text = f"[{key}]" if isinstance(container, list) else str(key)
+        values, kind = self.row_values(value)
+        node = self.tree.insert(parent, 'end', text=text, values=values,
+                              tags=(f'level_{min(level, 4)}', kind))
+        self.node_index[node] = (container, key)
+        self.item_index[(id(container), key)] = node
+        
+        if self.has_children(value):
+            if self.lazy_tree or isinstance(value, LazyNode):
+                self.tree.insert(node, 'end', text='…', tags=('placeholder',))
+            else:
+                self.insert_children(node, value, level + 1)
+        return node
     
-    def _restore_expanded_recursive(self, item):
-        """Recursively restore expanded nodes"""
-        if item in self.expanded_nodes:
-            self.tree.item(item, open=True)
-        for child in self.tree.get_children(item):
-            self._restore_expanded_recursive(child)
+    def has_children(self, value):
+        return isinstance(value, LazyNode) or (isinstance(value, (dict, list)) and bool(value))
+    
+    def row_values(self, value):
+        """Return the (type, value) columns and the kind tag for a JSON value"""
+        if isinstance(value, LazyNode):
+            # Not decoded yet, so the member count is unknown
+            return (('📁 OBJECT', '…'), 'object') if value.is_object else (('📋 ARRAY', '…'), 'array')
+        if isinstance(value, dict):
+            return ('📁 OBJECT', f'{len(value)} items'), 'object'
+        if isinstance(value, list):
+            return ('📋 ARRAY', f'{len(value)} items'), 'array'
+        value_type = '⚡ BOOLEAN' if isinstance(value, bool) else '📄 STRING' if isinstance(value, str) else '🔢 NUMBER' if isinstance(value, (int, float)) else '❓ OTHER'
+        return (value_type, self.truncate_value(value)), 'value'
+    
+    def is_placeholder(self, item):
+        return 'placeholder' in self.tree.item(item, 'tags')
+    
+    def is_synthetic(self, item):
+        """Placeholder rows and array range buckets have no JSON value of their own"""
+        return item in self.array_buckets or self.is_placeholder(item)
+    
+    def expand_node(self, item):
+        """Replace the placeholder of a lazily inserted container with its real children"""
+        children = self.tree.get_children(item)
+        if len(children) != 1 or not self.is_placeholder(children[0]):
+            return
+        
+        self.tree.delete(children[0])
+        value = self.get_item_data(item)
+        if isinstance(value, LazyNode):
+            # Streaming backend: decode this level and keep it in the document
+            spans = {}
+            value = value.load(spans)
+            self.member_spans[id(value)] = (value, spans)
+            if self.readonly:
+                self.decoded_rows[item] = value
+            else:
+                # Same content, now decoded: nothing to undo or journal
+                self.document.edit('replace', self.get_item_json_path(item), value, record=False)
+                if self.search_active:
+                    self.on_search_change()
+            self.tree.item(item, values=self.row_values(value)[0])
+        level = self.get_item_level(item) + 1
+        if item in self.array_buckets:
+            start, stop = self.array_buckets[item]
+            self.insert_array_range(item, value, start, stop, level)
+        else:
+            self.insert_children(item, value, level)
+    
+    def get_item_level(self, item):
+        level = 0
+        while self.tree.parent(item):
+            item = self.tree.parent(item)
+            level += 1
+        return level
+    
+    def on_tree_open(self, event):
+        """<<TreeviewOpen>> fires before the item opens, so children are in place in time"""
+        item = self.tree.focus()
+        if item:
+            self.expand_node(item)
+            self.expanded_paths.add(self.expansion_key(item))
+    
+    def on_tree_select(self, event):
+        """In read-only mode the raw pane shows the selected value straight from the mapped file"""
+        selection = self.tree.selection()
+        if self.readonly and self.stream_index is not None and selection:
+            self.show_excerpt(selection[0])
+    
+    def show_excerpt(self, item, limit=64 << 10):
+        while item in self.array_buckets:
+            item = self.tree.parent(item)
+        container, key = self.node_index.get(item, (None, None))
+        if container is None:
+            start, end = 0, self.stream_index.size
+        else:
+            value = container[key]
+            owner, spans = self.member_spans.get(id(container), (None, {}))
+            if isinstance(value, LazyNode):
+                start, end = value.start, value.end
+            elif owner is container and key in spans:
+                start, end = spans[key]
+            else:
+                return
+        
+        text = self.stream_index.read(start, min(end, start + limit)).decode('utf-8', errors='replace')
+        if end - start > limit:
+            text += "\n…"
+        self.raw_text.configure(state=tk.DISABLED)
+        self.raw_view.set_text(text)
+    
+    def on_tree_close(self, event):
+        item = self.tree.focus()
+        if item:
+            self.expanded_paths.discard(self.expansion_key(item))
+    
+    def expansion_key(self, item):
+        path = self.get_item_json_path(item)
+        if item in self.array_buckets:
+            path += (self.array_buckets[item],)
+        return path
+    
+    def set_item_open(self, item, is_open):
+        """Open or close a row from code, keeping expanded_paths in step"""
+        if is_open:
+            self.expand_node(item)
+            self.expanded_paths.add(self.expansion_key(item))
+        else:
+            self.expanded_paths.discard(self.expansion_key(item))
+        self.tree.item(item, open=is_open)
+    
+    def restore_expanded_state(self, under=()):
+        """Reopen the expanded paths below a path; only rows on those paths are materialized"""
+        for path in sorted((p for p in self.expanded_paths if p[:len(under)] == under), key=len):
+            item = self.find_item(path, materialize=True)
+            if item is None:
+                self.expanded_paths.discard(path)
+            else:
+                self.expand_node(item)
+                self.tree.item(item, open=True)
+    
+    def shift_expanded_paths(self, op, path, new_key=None):
+        """Keep expanded paths pointing at the same values after an edit at path"""
+        parent_path, key = path[:-1], path[-1]
+        depth = len(path)
+        shifted = set()
+        for expanded in self.expanded_paths:
+            if len(expanded) < depth or expanded[:depth - 1] != parent_path or isinstance(expanded[depth - 1], tuple):
+                shifted.add(expanded)
+                continue
+            step = expanded[depth - 1]
+            if step == key and op == 'rename':
+                expanded = parent_path + (new_key,) + expanded[depth:]
+            elif step == key and op == 'replace':
+                if len(expanded) > depth:
+                    continue
+            elif step == key and op == 'remove':
+                continue
+            elif isinstance(key, int) and op in ('add', 'remove') and step >= key:
+                step += 1 if op == 'add' else -1
+                expanded = parent_path + (step,) + expanded[depth:]
+            shifted.add(expanded)
+        self.expanded_paths = shifted
     
     def truncate_value(self, value, max_length=60):
         str_value = str(value)
@@ -764,14 +1082,14 @@ class JSONViewer:
     
     def toggle_node(self, event):
         item = self.tree.selection()[0]
-        self.tree.item(item, open=not self.tree.item(item, 'open'))
+        self.set_item_open(item, not self.tree.item(item, 'open'))
     
     def on_tree_click(self, event):
         """Handle tree clicks for in-place editing"""
         item = self.tree.identify_row(event.y)
         column = self.tree.identify_column(event.x)
         
-        if item and column in ('#1', '#2', '#3'):  # Key, Type or Value column
+        if item and not self.readonly and not self.is_synthetic(item) and column in ('#1', '#2', '#3'):  # Key, Type or Value column
             self.start_edit(item, column)
     
     def start_edit(self, item, column):
@@ -821,21 +1139,13 @@ class JSONViewer:
     
     def update_key_in_tree(self, item, new_key):
         """Update key name in tree and data"""
-        item_path = self.get_item_path(item)
-        current_data = self.get_data_at_path(item_path)
-        
-        if current_data is None:
-            return
-        
-        # Get parent data
-        parent_path = '/'.join(item_path.split('/')[:-1])
-        parent_data = self.get_data_at_path(parent_path)
+        parent_data, old_key = self.node_index[item]
         
         if isinstance(parent_data, dict):
-            # For dictionaries: remove old key and add new key
-            old_key = item_path.split('/')[-1]
-            parent_data[new_key] = parent_data.pop(old_key)
-            self.tree.item(item, text=new_key)
+            # For dictionaries: rename the key in place, keeping its position
+            if new_key != old_key and new_key in parent_data:
+                return
+            self.apply_edit('rename', self.get_item_json_path(item), new_key)
         elif isinstance(parent_data, list):
             # For arrays: update index (not really a key change for arrays)
             try:
@@ -847,11 +1157,7 @@ class JSONViewer:
     
     def update_value_in_tree(self, item, col_index, new_value):
         """Update value in tree and data"""
-        item_path = self.get_item_path(item)
-        current_data = self.get_data_at_path(item_path)
-        
-        if current_data is None:
-            return
+        current_data = self.get_item_data(item)
         
         if col_index == 0:  # Type column
             # Type changes are complex, so we'll just update the display
@@ -859,101 +1165,39 @@ class JSONViewer:
             values[0] = new_value
             self.tree.item(item, values=tuple(values))
         elif col_index == 1:  # Value column
-            if isinstance(current_data, (dict, list)):
+            if isinstance(current_data, (dict, list, LazyNode)):
                 messagebox.showinfo("Info", self.t("object_edit_info"))
                 return
             
-            try:
-                # Try to convert to appropriate type
-                if isinstance(current_data, bool):
-                    converted_value = new_value.lower() in ['true', '1', 'yes', 'ja']
-                elif isinstance(current_data, (int, float)):
-                    converted_value = float(new_value) if '.' in new_value else int(new_value)
-                elif isinstance(current_data, str):
-                    converted_value = str(new_value)
-                else:
-                    converted_value = new_value
-                
-                # Update the data
-                self.set_data_at_path(item_path, converted_value)
-                
-                # Update the tree display
-                values = list(self.tree.item(item, 'values'))
-                values[1] = self.truncate_value(converted_value)
-                self.tree.item(item, values=tuple(values))
-                
-            except ValueError:
-                # If conversion fails, keep as string
-                self.set_data_at_path(item_path, new_value)
-                values = list(self.tree.item(item, 'values'))
-                values[1] = self.truncate_value(new_value)
-                self.tree.item(item, values=tuple(values))
+            # Update the data, the row and the raw editor lines
+            self.apply_edit('replace', self.get_item_json_path(item), convert_value(current_data, new_value))
     
     def add_template(self, template_type):
-        templates = {
-            "projekt_spec": {
-                "project_basics": {
-                    "name": "Project_Name",
-                    "goal": "Short_Description",
-                    "type": "Web_App/Mobile_App/Desktop_App",
-                    "target_systems": ["linux", "windows", "macos"]
-                }
-            },
-            "api_design": {
-                "base_url": "https://api.example.com/v1",
-                "endpoints": [
-                    {
-                        "path": "/users",
-                        "method": "GET",
-                        "description": "List_of_Users"
-                    }
-                ]
-            },
-            "test_cases": {
-                "test_suite": "My_Test_Suite",
-                "test_cases": [
-                    {
-                        "name": "Test_Case_1",
-                        "description": "Test_Case_Description"
-                    }
-                ]
-            },
-            "config": {
-                "app_name": "My_App",
-                "version": "1.0.0",
-                "settings": {
-                    "debug": True,
-                    "port": 3000
-                }
-            },
-            "datenmodell": {
-                "entities": [
-                    {
-                        "name": "User",
-                        "attributes": {
-                            "id": "UUID",
-                            "email": "string"
-                        }
-                    }
-                ]
-            }
-        }
-        
-        if template_type in templates:
+        if template_type in TEMPLATES and self.check_writable():
             key_name = simpledialog.askstring(self.t("templates"), self.t("template_prompt"))
             if key_name:
-                self.data[key_name] = templates[template_type]
-                self.refresh_views()
+                try:
+                    self.apply_edit('add', (key_name,), copy.deepcopy(TEMPLATES[template_type]))
+                except EditError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
                 self.set_modified(True)
     
+    def check_writable(self):
+        if self.readonly:
+            messagebox.showinfo("Info", self.t("readonly_mode"))
+            return False
+        return True
+    
     def add_item(self):
+        if not self.check_writable():
+            return
         item = self.tree.selection()
         if not item:
             messagebox.showwarning("Warning", self.t("select_node"))
             return
         
         parent_item = item[0]
-        parent_path = self.get_item_path(parent_item)
         
         key = simpledialog.askstring(self.t("add"), self.t("key_prompt"))
         if not key:
@@ -974,153 +1218,577 @@ class JSONViewer:
             value = {} if value_type == "object" else []
         
         if value is not None:
-            target = self.get_data_at_path(parent_path)
+            self.expand_node(parent_item)
+            target = self.get_item_data(parent_item)
             if isinstance(target, dict):
-                target[key] = value
+                self.apply_edit('add', self.get_item_json_path(parent_item) + (key,), value)
             elif isinstance(target, list):
                 try:
                     index = int(key)
-                    if 0 <= index <= len(target):
-                        target.insert(index, value)
-                    else:
-                        target.append(value)
+                    if not 0 <= index <= len(target):
+                        index = len(target)
                 except ValueError:
-                    target.append(value)
+                    index = len(target)
+                self.apply_edit('add', self.get_item_json_path(parent_item) + (index,), value)
+            else:
+                return
             
-            self.refresh_views()
             self.set_modified(True)
     
     def edit_item(self):
+        if not self.check_writable():
+            return
         item = self.tree.selection()
         if not item:
             messagebox.showwarning("Warning", self.t("select_item"))
             return
         
-        item_path = self.get_item_path(item[0])
-        current_data = self.get_data_at_path(item_path)
+        current_data = self.get_item_data(item[0])
         
-        if isinstance(current_data, (dict, list)):
+        if isinstance(current_data, (dict, list, LazyNode)):
             messagebox.showinfo("Info", self.t("object_edit_info"))
             return
         
         new_value = simpledialog.askstring(self.t("edit"), self.t("edit_prompt").format(current_data))
         if new_value is not None:
-            try:
-                if isinstance(current_data, bool):
-                    new_value = new_value.lower() in ['true', '1', 'yes', 'ja']
-                elif isinstance(current_data, (int, float)):
-                    new_value = float(new_value) if '.' in new_value else int(new_value)
-            except ValueError:
-                pass
-            
-            self.set_data_at_path(item_path, new_value)
-            self.refresh_views()
+            self.apply_edit('replace', self.get_item_json_path(item[0]), convert_value(current_data, new_value))
             self.set_modified(True)
     
     def delete_item(self):
+        if not self.check_writable():
+            return
         item = self.tree.selection()
-        if not item:
+        if not item or self.is_synthetic(item[0]):
             return
         
         if messagebox.askyesno(self.t("delete"), self.t("confirm_delete")):
-            item_path = self.get_item_path(item[0])
-            parent_path = '/'.join(item_path.split('/')[:-1])
-            key = item_path.split('/')[-1]
-            
-            parent_data = self.get_data_at_path(parent_path)
-            if isinstance(parent_data, dict):
-                del parent_data[key]
-            elif isinstance(parent_data, list):
-                try:
-                    index = int(key.strip('[]'))
-                    parent_data.pop(index)
-                except (ValueError, IndexError):
-                    pass
+            path = self.get_item_json_path(item[0])
+            if not path:
+                return
             
-            self.refresh_views()
+            self.apply_edit('remove', path)
             self.set_modified(True)
     
-    def search_dialog(self):
-        search_term = simpledialog.askstring(self.t("search"), self.t("search_prompt"))
-        if search_term:
-            self.search_tree(search_term.lower())
+    def build_search_index(self):
+        """Index self.document.data on a worker thread; edits made in the meantime make the result stale"""
+        if self.search_index_pending:
+            return
+        self.search_index_pending = True
+        data, version = self.document.data, self.document.edit_version
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                results.put(SearchIndex(data))
+            except RuntimeError:
+                results.put(None)  # an object changed size while it was walked
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(100, self.poll_search_index, results, data, version)
+    
+    def poll_search_index(self, results, data, version):
+        try:
+            index = results.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self.poll_search_index, results, data, version)
+            return
+        self.search_index_pending = False
+        if index is not None and data is self.document.data and version == self.document.edit_version:
+            self.document.search_index = index
+        if self.search_active and self.search_var.get():
+            self.start_search()  # the query waited for the index, or the index is stale again
     
     def search_tree(self, search_term):
-        for item in self.tree.get_children():
-            self.tree.item(item, tags=())
+        """Highlight every match of search_term, expanding the rows down to it"""
+        self.clear_found()
+        # Matches come from the index, so collapsed and not yet inserted subtrees are found too
+        for path in self.document.get_search_index().search(search_term, limit=self.MAX_SEARCH_HITS):
+            item = self.find_item(path, materialize=True)
+            if item is not None:
+                self.mark_found(item)
+                self._expand_parents(item)
+    
+    def mark_found(self, item):
+        # 'found' is an extra tag next to the level/kind tags, so clearing it restores the colouring
+        tags = tuple(self.tree.item(item, 'tags'))
+        if 'found' not in tags:
+            self.tree.item(item, tags=tags + ('found',))
+        self.found_items.add(item)
+    
+    def clear_found(self):
+        for item in self.found_items:
+            if self.tree.exists(item):
+                self.tree.item(item, tags=tuple(tag for tag in self.tree.item(item, 'tags') if tag != 'found'))
+        self.found_items.clear()
+    
+    def show_search_bar(self, event=None):
+        if not self.search_active:
+            self.search_active = True
+            self.search_frame.pack(fill=tk.X, padx=5, pady=(0, 5), before=self.tree_container)
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
+    
+    def hide_search_bar(self, event=None):
+        self.search_active = False
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
+        self.search_generation += 1
+        self.clear_found()
+        self.search_frame.pack_forget()
+    
+    def on_search_change(self, *args):
+        """Restart the debounce timer; the query runs once typing pauses"""
+        if self.document.data is not None and not self.document.has_search_index():
+            self.build_search_index()  # first use: index while the user is still typing
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(self.SEARCH_DELAY, self.start_search)
+    
+    def start_search(self):
+        self.search_job = None
+        self.search_generation += 1
+        generation = self.search_generation
+        self.clear_found()
+        self.search_results = []
+        self.search_position = -1
+        self.search_listbox.delete(0, tk.END)
+        self.search_count_label.config(text="")
+        
+        term = self.search_var.get()
+        if not term or self.document.data is None:
+            return
+        if not self.document.has_search_index():
+            # poll_search_index starts the query again once the worker is done
+            self.search_count_label.config(text=self.t("indexing"))
+            self.build_search_index()
+            return
+        scope = self.SEARCH_SCOPES[self.search_scope.current()]
+        regex = self.search_regex.get()
+        index = self.document.search_index
+        version = self.document.edit_version
+        results = queue.Queue()
         
-        for item in self.tree.get_children(''):
-            self._search_in_children(item, search_term)
+        def worker():
+            try:
+                for batch in index.query(term, scope, regex):
+                    if generation != self.search_generation:
+                        return
+                    results.put(('batch', batch))
+                results.put(('done',))
+            except re.error as e:
+                results.put(('error', e))
+            except (RuntimeError, KeyError, IndexError):
+                results.put(('stale',))  # the document was edited while the index was read
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(50, self.poll_search, results, generation, version)
     
-    def _search_in_children(self, parent, search_term):
-        for child in self.tree.get_children(parent):
-            text = self.tree.item(child, 'text').lower()
-            values = self.tree.item(child, 'values')
-            value_str = ' '.join(str(v) for v in values).lower()
-            
-            if search_term in text or search_term in value_str:
-                self.tree.item(child, tags=('found',))
-                self._expand_parents(child)
-            
-            self._search_in_children(child, search_term)
+    def poll_search(self, results, generation, version):
+        if generation != self.search_generation:
+            return
+        if version != self.document.edit_version:
+            self.start_search()
+            return
+        try:
+            while True:
+                message = results.get_nowait()
+                if message[0] == 'batch':
+                    if not self.add_search_results(message[1]):
+                        return
+                elif message[0] == 'error':
+                    self.search_count_label.config(text=f"⚠️ {message[1]}")
+                    return
+                elif message[0] == 'stale':
+                    self.start_search()
+                    return
+                else:
+                    self.update_search_count()
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(50, self.poll_search, results, generation, version)
+    
+    def add_search_results(self, batch):
+        """Append streamed matches; returns False once the result list is full"""
+        batch = batch[:self.MAX_SEARCH_HITS - len(self.search_results)]
+        self.search_results.extend(batch)
+        self.search_listbox.insert(tk.END, *(format_path(path) for path in batch))
+        for path in batch:
+            # Only rows that already exist are highlighted; navigating materializes the rest
+            item = self.find_item(path)
+            if item is not None:
+                self.mark_found(item)
+        self.update_search_count()
+        if len(self.search_results) >= self.MAX_SEARCH_HITS:
+            self.search_generation += 1  # stops the worker
+            return False
+        return True
+    
+    def update_search_count(self):
+        total = len(self.search_results)
+        suffix = "+" if total >= self.MAX_SEARCH_HITS else ""
+        if self.search_position >= 0:
+            self.search_count_label.config(text=f"{self.search_position + 1}/{total}{suffix}")
+        else:
+            self.search_count_label.config(text=f"{total}{suffix}")
+    
+    def search_next(self, event=None):
+        self.goto_search_result(self.search_position + 1)
+    
+    def search_prev(self, event=None):
+        self.goto_search_result(self.search_position - 1)
+    
+    def on_search_result_select(self, event):
+        selection = self.search_listbox.curselection()
+        if selection:
+            self.goto_search_result(selection[0])
+    
+    def goto_search_result(self, position):
+        if not self.search_results:
+            return
+        self.search_position = position % len(self.search_results)
+        item = self.find_item(self.search_results[self.search_position], materialize=True)
+        if item is not None:
+            self._expand_parents(item)
+            self.mark_found(item)
+            self.tree.selection_set(item)
+            self.tree.focus(item)
+            self.tree.see(item)
+        self.search_listbox.selection_clear(0, tk.END)
+        self.search_listbox.selection_set(self.search_position)
+        self.search_listbox.see(self.search_position)
+        self.update_search_count()
     
     def _expand_parents(self, item):
         parent = self.tree.parent(item)
         if parent:
-            self.tree.item(parent, open=True)
+            self.set_item_open(parent, True)
             self._expand_parents(parent)
     
-    def get_item_path(self, item):
+    def get_item_data(self, item):
+        """Return the JSON value shown by a tree row"""
+        # Range buckets show a slice of the array row above them
+        while item in self.array_buckets:
+            item = self.tree.parent(item)
+        if item in self.decoded_rows:
+            return self.decoded_rows[item]
+        container, key = self.node_index[item]
+        if container is None:
+            return self.document.data
+        return container[key]
+    
+    def get_item_json_path(self, item):
+        """Return the keys/indices leading from the document root to a tree row"""
         path = []
         while item:
-            path.append(self.tree.item(item, 'text'))
+            # Range buckets are only a display grouping of their array's rows
+            if item not in self.array_buckets:
+                container, key = self.node_index[item]
+                if container is None:
+                    break
+                path.append(key)
             item = self.tree.parent(item)
-        return '/'.join(reversed(path))
+        return tuple(reversed(path))
+    
+    def find_item(self, path, materialize=False):
+        """Return the tree row for a path, or None if it has not been materialized
+        
+        A (start, stop) step selects a range bucket. With materialize=True, lazily
+        inserted rows along the path are filled in on the way down.
+        """
+        roots = self.tree.get_children('')
+        item = roots[0] if roots else None
+        for key in path:
+            if item is None:
+                return None
+            item = self.child_item(item, key, materialize)
+        return item
     
-    def get_data_at_path(self, path):
-        if path == self.filename:
-            return self.data
+    def child_item(self, item, key, materialize=False):
+        if materialize:
+            self.expand_node(item)
+        if not isinstance(key, tuple):
+            container = self.get_item_data(item)
+            child = self.item_index.get((id(container), key))
+            if child is not None and self.node_index.get(child, (None,))[0] is container:
+                return child
+            if not (materialize and isinstance(container, list) and len(container) > self.array_page_size):
+                return None
+        # Range buckets: walk down to the bucket holding key, filling it in when materializing
+        for child in self.tree.get_children(item):
+            if child in self.array_buckets:
+                start, stop = self.array_buckets[child]
+                if isinstance(key, tuple):
+                    if (start, stop) == key:
+                        return child
+                    if start <= key[0] and key[1] <= stop:
+                        return self.child_item(child, key, materialize)
+                elif start <= key < stop:
+                    return self.child_item(child, key, materialize)
+            elif child in self.node_index and self.node_index[child][1] == key:
+                return child
+        return None
+    
+    def forget_children(self, item):
+        """Delete the child rows of item and drop their index entries"""
+        children = self.tree.get_children(item)
+        stack = list(children)
+        while stack:
+            child = stack.pop()
+            self.forget_row(child)
+            stack.extend(self.tree.get_children(child))
+        if children:
+            self.tree.delete(*children)
+    
+    def forget_row(self, item):
+        """Drop the index entries of a row that is about to be deleted"""
+        entry = self.node_index.pop(item, None)
+        if entry is not None and self.item_index.get((id(entry[0]), entry[1])) == item:
+            del self.item_index[(id(entry[0]), entry[1])]
+        self.decoded_rows.pop(item, None)
+        self.array_buckets.pop(item, None)
+    
+    def show_row_values(self, item, value):
+        """Set the columns and tags of a row; the root row keeps its ROOT label"""
+        values, kind = self.row_values(value)
+        level_tag = f'level_{min(self.get_item_level(item), 4)}'
+        self.tree.item(item, values=values if self.node_index[item][0] is not None else ('📁 ROOT', ''),
+                       tags=(level_tag, kind))
+    
+    def refresh_row(self, item):
+        """Redraw a row from its current value; container children are rebuilt lazily"""
+        value = self.get_item_data(item)
+        self.show_row_values(item, value)
+        self.dirty_items.discard(item)
+        self.found_items.discard(item)
+        
+        children = self.tree.get_children(item)
+        if len(children) == 1 and self.is_placeholder(children[0]) and self.has_children(value):
+            return
+        self.forget_children(item)
+        if self.has_children(value):
+            if isinstance(value, LazyNode) or (self.lazy_tree and not self.tree.item(item, 'open')):
+                self.tree.insert(item, 'end', text='…', tags=('placeholder',))
+            else:
+                self.insert_children(item, value, self.get_item_level(item) + 1)
+    
+    def apply_edit(self, op, path, value=None, index=None, record=True):
+        """Apply one edit to the document, patching only the affected rows and raw editor lines
+        
+        Arguments as in JSONDocument.edit; an edit that does not fit raises EditError before anything changes.
+        """
+        op = self.document.check_edit(op, path, value, index)
+        if not path:
+            self.document.edit(op, path, value, record=record)
+            self.refresh_views()
+            return
         
-        keys = path.replace(self.filename + '/', '').split('/')
-        current = self.data
+        parent_path, key = path[:-1], path[-1]
+        container = get_value_at(self.document.data, parent_path)
+        item = self.find_item(path) if op != 'add' else None
+        
+        # Line positions have to be measured before the data changes
+        first = old_count = was_last = parent_first = None
+        if self.raw_synced:
+            if op != 'add':
+                first = self.document.line_of(path)
+                old_count = self.document.line_count(container[key])
+                was_last = is_last_member(container, key)
+            parent_first = self.document.line_of(parent_path)
+        
+        self.document.edit(op, path, value, index, record)
+        if op == 'rename':
+            key = value
+        
+        if self.raw_synced:
+            self.patch_raw(op, parent_path, container, key, first, old_count, was_last, parent_first)
+        elif self.stream_index is None:
+            self.refresh_raw()
+        
+        if self.search_active:
+            self.on_search_change()
+        self.shift_expanded_paths(op, path, key)
+        self.patch_tree(op, parent_path, container, key, item)
+        self.schedule_dirty_update()
+    
+    def autosave(self):
+        """Periodically make the journal durable and compact it once it grew long"""
+        try:
+            if self.modified and self.can_save():
+                self.document.sync_journal(self.JOURNAL_COMPACT_OPS)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Journal error: {e}")
+        self.root.after(self.AUTOSAVE_INTERVAL, self.autosave)
+    
+    def offer_recovery(self):
+        """Replay a journal left behind by a crash, if it belongs to the file just loaded"""
+        operations = self.document.recoverable_operations()
+        if not operations:
+            return
+        if not messagebox.askyesno(self.t("recover_title"), self.t("recover_prompt").format(len(operations))):
+            self.document.journal.discard()
+            return
+        self.document.recover(operations)
+        self.refresh_views()
+        self.set_modified(True)
+        self.schedule_dirty_update()
+    
+    def is_really_modified(self):
+        """Compare the model with the version on disk by root hash instead of trusting self.modified"""
+        if self.document.baseline_hashes is None:
+            return self.modified
+        if not self.raw_synced:
+            return True  # typed raw text is not part of the model yet
+        return self.document.is_modified()
+    
+    def schedule_dirty_update(self):
+        if self.dirty_job is None and self.document.baseline_hashes is not None:
+            self.dirty_job = self.root.after(300, self.update_dirty_state)
+    
+    def update_dirty_state(self):
+        """Mark changed subtrees in the tree and clear the modified flag when all edits were undone"""
+        self.dirty_job = None
+        if self.document.baseline_hashes is None:
+            return
+        if self.modified and not self.is_really_modified():
+            self.set_modified(False)
         
-        for key in keys:
-            if key.startswith('[') and key.endswith(']'):
-                try:
-                    index = int(key[1:-1])
-                    current = current[index]
-                except (ValueError, IndexError):
-                    return None
-            else:
-                current = current.get(key, None)
-                if current is None:
-                    return None
-        return current
-    
-    def set_data_at_path(self, path, value):
-        keys = path.replace(self.filename + '/', '').split('/')
-        current = self.data
-        
-        for key in keys[:-1]:
-            if key.startswith('[') and key.endswith(']'):
-                index = int(key[1:-1])
-                current = current[index]
-            else:
-                current = current[key]
+        dirty = set()
+        for item, (container, key) in self.node_index.items():
+            value = self.document.data if container is None else container[key]
+            if isinstance(value, (dict, list)) and self.document.is_dirty(value):
+                dirty.add(item)
+        for item in self.dirty_items - dirty:
+            if self.tree.exists(item):
+                self.tree.item(item, tags=tuple(tag for tag in self.tree.item(item, 'tags') if tag != 'dirty'))
+        for item in dirty - self.dirty_items:
+            self.tree.item(item, tags=tuple(self.tree.item(item, 'tags')) + ('dirty',))
+        self.dirty_items = dirty
+    
+    def undo(self, event=None):
+        self.step_history(self.document.history.pop_undo, event)
+    
+    def redo(self, event=None):
+        self.step_history(self.document.history.pop_redo, event)
+    
+    def step_history(self, pop, event):
+        if event is not None:
+            # Text fields have their own undo on the same keys
+            try:
+                if isinstance(self.root.focus_get(), (tk.Text, tk.Entry, ttk.Entry)):
+                    return
+            except KeyError:
+                pass
+        operation = pop()
+        if operation is None:
+            return
+        op, path, value, index = operation
+        self.apply_edit(op, path, value, index, record=False)
+        self.set_modified(True)
+        item = self.find_item(path if op != 'rename' else path[:-1] + (value,))
+        if item is not None:
+            self.tree.selection_set(item)
+            self.tree.see(item)
+    
+    def patch_raw(self, op, parent_path, container, key, first, old_count, was_last, parent_first):
+        """Rewrite only the raw editor lines touched by an edit"""
+        depth = len(parent_path) + 1
+        if op in ('add', 'remove') and (not container if op == 'remove' else len(container) == 1):
+            # The container switched between empty and non-empty: redraw its own lines
+            old_parent_count = 1 if op == 'add' else old_count + 2
+            if not parent_path:
+                self.refresh_raw()
+                return
+            grand = get_value_at(self.document.data, parent_path[:-1])
+            self.raw_replace_lines(parent_first, old_parent_count,
+                                   render_member(grand, parent_path[-1], depth - 1))
+        elif op in ('replace', 'rename'):
+            self.raw_replace_lines(first, old_count, render_member(container, key, depth))
+        elif op == 'add':
+            first = self.document.line_of(parent_path + (key,))
+            if is_last_member(container, key):
+                # New last member: the previous one needs a comma now
+                self.raw_set_comma(first - 1, True)
+            self.raw_replace_lines(first, 0, render_member(container, key, depth))
+        else:
+            self.raw_replace_lines(first, old_count, None)
+            if was_last:
+                self.raw_set_comma(first - 1, False)
+    
+    def raw_replace_lines(self, first, count, text):
+        """Replace count lines starting at 1-based line first; text None just deletes them"""
+        self.raw_view.replace_lines(first, count, text)
+    
+    def raw_set_comma(self, line, present):
+        text = self.raw_view.get_line(line)
+        if present and not text.endswith(','):
+            self.raw_view.replace_lines(line, 1, text + ',')
+        elif not present and text.endswith(','):
+            self.raw_view.replace_lines(line, 1, text[:-1])
+    
+    def patch_tree(self, op, parent_path, container, key, item):
+        """Update only the materialized rows affected by an edit"""
+        parent_item = self.find_item(parent_path)
+        if parent_item is None:
+            return
         
-        last_key = keys[-1]
-        if last_key.startswith('[') and last_key.endswith(']'):
-            index = int(last_key[1:-1])
-            current[index] = value
+        if op == 'rename':
+            if item is not None:
+                self.item_index.pop((id(container), self.node_index[item][1]), None)
+                self.node_index[item] = (container, key)
+                self.item_index[(id(container), key)] = item
+                self.tree.item(item, text=key)
+        elif op == 'replace':
+            if item is not None:
+                self.refresh_row(item)
+                self.restore_expanded_state(parent_path + (key,))
+        elif isinstance(container, list) or len(container) <= 1:
+            # Array indices shift and empty containers gain or lose their placeholder
+            self.refresh_row(parent_item)
+            self.restore_expanded_state(parent_path)
+        elif op == 'remove':
+            if item is not None:
+                self.forget_children(item)
+                self.forget_row(item)
+                self.tree.delete(item)
+            self.show_row_values(parent_item, container)
+        elif not is_last_member(container, key):
+            # A key put back in the middle of an object (undo of a delete): redraw in order
+            self.refresh_row(parent_item)
+            self.restore_expanded_state(parent_path)
         else:
-            current[last_key] = value
+            children = self.tree.get_children(parent_item)
+            if not (len(children) == 1 and self.is_placeholder(children[0])):
+                self.insert_node(parent_item, container, key, self.get_item_level(parent_item) + 1)
+            self.show_row_values(parent_item, container)
     
     def refresh_views(self):
         """Refresh both tree and raw editor views - IMPROVED to preserve expansion"""
         self.populate_tree()  # This now preserves expansion state
-        
-        self.raw_text.delete(1.0, tk.END)
-        self.raw_text.insert(tk.END, json.dumps(self.data, indent=2, ensure_ascii=False))
+        self.refresh_raw()
+        if self.search_active:
+            self.on_search_change()
+        self.dirty_items.clear()
+        self.schedule_dirty_update()
+    
+    def refresh_raw(self):
+        """Rewrite the whole raw editor from self.document.data"""
+        self.document.line_count_cache.clear()
+        self.document.line_offsets.clear()
+        self.cancel_validation()
+        self.last_parse = None
+        self.raw_view.unmark('json_error')
+        if self.stream_index is not None:
+            # Streamed documents are never serialized as a whole; show the start of the file read-only
+            preview = self.stream_index.read(0, 64 << 10).decode('utf-8', errors='replace')
+            self.raw_text.configure(state=tk.DISABLED)
+            self.raw_view.set_text(preview + "\n…")
+            self.raw_synced = False
+            return
+        self.raw_text.configure(state=tk.NORMAL)
+        self.raw_view.set_text('' if self.document.data is None else json.dumps(self.document.data, indent=2, ensure_ascii=False))
+        self.raw_synced = True
     
     def set_modified(self, modified):
         self.modified = modified
@@ -1130,61 +1798,423 @@ class JSONViewer:
         else:
             self.status_label.config(text=self.t("saved"), foreground="green")
     
-    def on_raw_edit(self, event):
-        self.set_modified(True)
+    def on_raw_edit(self):
+        # Tastendruck: nur vormerken, Titel und Status werden im Idle-Callback angefasst
+        self.raw_synced = False
+        if self.raw_edit_job is None:
+            self.raw_edit_job = self.root.after_idle(self.flush_raw_edit)
+        # Validate once typing pauses
+        if self.validate_job is not None:
+            self.root.after_cancel(self.validate_job)
+        self.validate_job = self.root.after(self.VALIDATE_DELAY, self.start_validation)
+    
+    def flush_raw_edit(self):
+        self.raw_edit_job = None
+        if not self.modified:
+            self.set_modified(True)
+    
+    def cancel_validation(self):
+        """Drop the pending timer and make results of running parses stale"""
+        if self.validate_job is not None:
+            self.root.after_cancel(self.validate_job)
+            self.validate_job = None
+        if self.validate_future is not None:
+            self.validate_future.cancel()
+            self.validate_future = None
+        self.validate_generation += 1
+    
+    def start_validation(self):
+        self.validate_job = None
+        if self.validate_future is not None:
+            self.validate_future.cancel()  # still queued behind an older parse: not needed anymore
+        self.validate_generation += 1
+        generation = self.validate_generation
+        # Only the line list is copied here; joining and parsing happen off the Tk thread
+        version, lines = self.raw_view.snapshot()
+        if self.last_parse is not None and self.last_parse[0] == version:
+            self.show_validation(None)
+            return
+        
+        in_process = len(lines) >= self.VALIDATE_PROCESS_LINES
+        if in_process:
+            # json.loads holds the GIL for the whole parse, which would freeze the UI in a thread.
+            # The worker process only reports the error position, so Apply parses these again.
+            if self.validate_pool is None:
+                # spawn: a forked copy of the Tk process is not safe to run
+                self.validate_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            future = self.validate_pool.submit(find_syntax_error, lines)
+        else:
+            future = concurrent.futures.Future()
+            
+            def worker():
+                try:
+                    future.set_result((None, json.loads('\n'.join(lines))))
+                except json.JSONDecodeError as e:
+                    future.set_result(((e.msg, e.lineno, e.colno), None))
+            
+            threading.Thread(target=worker, daemon=True).start()
+        self.validate_future = future
+        self.root.after(50, self.poll_validation, future, version, generation, in_process)
+    
+    def poll_validation(self, future, version, generation, in_process):
+        if generation != self.validate_generation:
+            return  # superseded by newer typing
+        if not future.done():
+            self.root.after(50, self.poll_validation, future, version, generation, in_process)
+            return
+        self.validate_future = None
+        try:
+            if in_process:
+                error, data = future.result(), None
+            else:
+                error, data = future.result()
+        except concurrent.futures.process.BrokenProcessPool:
+            self.validate_pool = None  # the worker died; the next typing pause starts a new one
+            return
+        if error is None and not in_process:
+            self.last_parse = (version, data)
+        self.show_validation(error)
+    
+    def show_validation(self, error):
+        """Mark a syntax error (msg, lineno, colno) inline and in the status bar, or clear the mark"""
+        if error is None:
+            self.raw_view.unmark('json_error')
+            self.set_modified(self.modified)
+            return
+        msg, lineno, colno = error
+        self.raw_view.mark('json_error', lineno, colno - 1)
+        self.status_label.config(text=f"{self.t('validation_error')}: {msg} ({lineno}:{colno})",
+                                 foreground="red")
+    
+    def parse_raw(self, text):
+        """Parse the raw editor text, reusing the background validation result when it is current"""
+        if self.last_parse is not None and self.last_parse[0] == self.raw_view.version:
+            data = self.last_parse[1]
+            # The model will be edited in place from now on, so it must not stay cached
+            self.last_parse = None
+            return data
+        return json.loads(text)
     
     def save_json(self):
+        if not self.check_writable():
+            return
+        if not self.can_save():
+            messagebox.showinfo(self.t("save"), self.t("nothing_loaded"))
+            return
+        # The watcher polls; check once more so a just-regenerated file is not overwritten unasked
         try:
-            new_content = self.raw_text.get(1.0, tk.END).strip()
-            json.loads(new_content)
-            
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            digest = self.watcher.changed()
+        except OSError:
+            digest = None
+        if digest is not None and digest != self.ignored_digest:
+            if not messagebox.askyesno(self.t("file_changed_title"), self.t("confirm_overwrite")):
+                return
+        if self.stream_index is not None:
+            self.save_streamed()
+            return
+        try:
+            if self.raw_synced:
+                # The raw editor shows exactly the model: stream it to disk, nothing to re-read
+                self.document.save()
+            else:
+                content = self.raw_view.get_text()
+                # Adopting the typed text is one undoable step
+                self.apply_edit('replace', (), self.parse_raw(content))
+                self.document.save(content.strip())
             
-            self.load_json()
-            self.refresh_views()
+            self.schedule_dirty_update()
             self.set_modified(False)
+            self.watcher.watch(self.document.saved_digest)
             messagebox.showinfo(self.t("save"), self.t("save_success"))
             
         except json.JSONDecodeError as e:
             messagebox.showerror(self.t("syntax_error"), f"{self.t('validation_error')}: {e}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Saving error: {e}")
+    
+    def save_streamed(self):
+        """Write a streamed document from the model; undecoded subtrees are re-read from the file"""
+        def close_index():
+            self.stream_index.close()
+            self.stream_index = None
+        
+        try:
+            encoder = json.JSONEncoder(indent=2, ensure_ascii=False, default=json_default)
+            write_atomic(self.filename, encoder.iterencode(self.document.data), before_replace=close_index)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Saving error: {e}")
+            return
+        
+        self.document.journal.discard()
+        self.set_modified(False)
+        messagebox.showinfo(self.t("save"), self.t("save_success"))
+        self.load_json_async()
     
     def reload_json(self):
         if self.modified:
             if not messagebox.askyesno(self.t("unsaved_changes"), self.t("confirm_reload")):
                 return
         
-        if self.load_json():
-            self.refresh_views()
+        self.load_json_async()
+    
+    def poll_file_changes(self):
+        """Act on changes the watcher saw; our own saves are recognized by their digest"""
+        digest = False
+        while not self.watcher.changes.empty():
+            digest = self.watcher.changes.get_nowait()
+        if (digest is not False and self.load_cancel is None and self.document.data is not None
+                and (digest is None or digest not in (self.document.saved_digest, self.ignored_digest))):
+            self.on_file_changed(digest)
+        self.root.after(self.WATCH_POLL, self.poll_file_changes)
+    
+    def on_file_changed(self, digest):
+        if not self.modified:
+            print(f"🔄 '{self.filename}' changed on disk, reloading")
+            self.load_json_async()
+            return
+        if self.stream_index is not None or self.document.base_bytes is None:
+            # Nothing to merge against: reload or keep the edits
+            if messagebox.askyesno(self.t("file_changed_title"), self.t("confirm_reload")):
+                self.load_json_async()
+            else:
+                self.ignored_digest = digest
+            return
+        if not messagebox.askyesno(self.t("file_changed_title"), self.t("file_changed_prompt")):
+            self.ignored_digest = digest
+            return
+        try:
+            ours = self.document.data if self.raw_synced else self.parse_raw(self.raw_view.get_text())
+        except json.JSONDecodeError as e:
+            messagebox.showerror(self.t("syntax_error"), f"{self.t('validation_error')}: {e}")
+            self.ignored_digest = digest
+            return
+        self.merge_with_disk(ours)
+    
+    def merge_with_disk(self, ours):
+        """Parse and hash the base and the new file on a worker, then merge on the Tk thread"""
+        base_bytes = self.document.base_bytes
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                disk = JSONDocument(self.filename).load()
+                content_hash(disk.data, disk.hash_cache)
+                base = json.loads(base_bytes)
+                base_cache = {}
+                content_hash(base, base_cache)
+                results.put((base, base_cache, disk))
+            except (OSError, ValueError) as e:
+                results.put(e)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.status_label.config(text=self.t("loading"), foreground="orange")
+        self.root.after(100, self.poll_merge, results, ours, self.document.edit_version)
+    
+    def poll_merge(self, results, ours, version):
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self.poll_merge, results, ours, version)
+            return
+        if isinstance(result, Exception):
+            self.set_modified(self.modified)
+            messagebox.showerror(self.t("file_changed_title"), str(result))
+            return
+        if version != self.document.edit_version:
+            # Edited while the worker ran: merge again from the current model
+            self.merge_with_disk(self.document.data)
+            return
+        base, base_cache, disk = result
+        theirs, theirs_cache = disk.data, disk.hash_cache
+        ours_cache = self.document.hash_cache if ours is self.document.data else {}
+        caches = (base_cache, ours_cache, theirs_cache)
+        conflicts = []
+        merged = merge_json(base, ours, theirs, caches, conflicts)
+        if conflicts:
+            answer = messagebox.askyesnocancel(self.t("file_changed_title"),
+                                               self.t("merge_conflicts").format(len(conflicts)))
+            if answer is None:
+                self.set_modified(self.modified)
+                self.ignored_digest = disk.saved_digest
+                return
+            if not answer:
+                merged = merge_json(base, ours, theirs, caches, [], prefer='theirs')
+        # Rebased edits: the patch from the new file to the merge result
+        patch = disk.diff(merged, ChainMap({}, theirs_cache, ours_cache))
+        
+        # Start from the new file as if it had been loaded, then replay the patch as normal edits,
+        # so they show up as changes, are journaled and can be undone
+        self.document.journal.release()
+        self.document = disk
+        self.watcher.watch(disk.saved_digest)
+        self.ignored_digest = None
+        self.refresh_views()
+        self.set_modified(False)
+        self.document.apply_patch(patch, self.apply_edit)
+        if patch:
+            self.set_modified(True)
+        self.status_label.config(text=self.t("merged").format(len(patch)), foreground="green")
+    
+    def diff_with_disk(self):
+        """Compare the model with the file on disk; the file is parsed and hashed on a worker"""
+        if self.stream_index is not None:
+            messagebox.showinfo(self.t("diff"), self.t("stream_mode"))
+            return
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                disk = read_json_file(self.filename)
+                disk_cache = {}
+                content_hash(disk, disk_cache)
+                results.put((disk, disk_cache))
+            except (OSError, ValueError) as e:
+                results.put(e)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(100, self.poll_disk_diff, results)
+    
+    def poll_disk_diff(self, results):
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self.poll_disk_diff, results)
+            return
+        if isinstance(result, Exception):
+            messagebox.showerror(self.t("diff"), str(result))
+            return
+        disk, disk_cache = result
+        # Die Hashes des Modells entstehen beim ersten Vergleich und bleiben danach im Cache
+        self.show_diff(self.document.diff(disk, disk_cache))
+    
+    def show_diff(self, patch, limit=200):
+        """List the JSON Patch that turns the model into the file on disk"""
+        if not patch:
+            messagebox.showinfo(self.t("diff"), self.t("no_differences"))
+            return
+        window = tk.Toplevel(self.root)
+        window.title(self.t("diff_title").format(len(patch)))
+        window.geometry("700x400")
+        listbox = tk.Listbox(window, font=('Consolas', 10))
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        listbox.pack(fill=tk.BOTH, expand=True)
+        for operation in patch:
+            line = f"{operation['op']:8} {operation['path']}"
+            if 'value' in operation:
+                value = json.dumps(operation['value'], ensure_ascii=False)
+                line += " = " + (value if len(value) <= limit else value[:limit] + "…")
+            listbox.insert(tk.END, line)
+        
+        def goto(event):
+            selection = listbox.curselection()
+            if not selection:
+                return
+            path = parse_pointer(patch[selection[0]]['path'], self.document.data)
+            # Bei 'add' existiert der Pfad im Editor noch nicht, dann den nächsten Vorfahren zeigen
+            item = None
+            while item is None and path:
+                item = self.find_item(path, materialize=True)
+                path = path[:-1]
+            if item is not None:
+                self._expand_parents(item)
+                self.tree.selection_set(item)
+                self.tree.focus(item)
+                self.tree.see(item)
+        
+        listbox.bind('<Double-Button-1>', goto)
+        listbox.bind('<Return>', goto)
+    
+    def show_profile_stats(self, event=None):
+        """Window with the last action timings, refreshed while it is open"""
+        window = tk.Toplevel(self.root)
+        window.title(self.t("profile_title"))
+        window.geometry("700x400")
+        summary = ttk.Label(window, justify=tk.LEFT, font=('Consolas', 9))
+        summary.pack(fill=tk.X, padx=5, pady=5)
+        columns = ('ms', 'tk_calls', 'profile')
+        table = ttk.Treeview(window, columns=columns, show='tree headings')
+        table.heading('#0', text=self.t("profile_action"))
+        table.heading('ms', text=self.t("profile_time"))
+        table.heading('tk_calls', text=self.t("profile_tk_calls"))
+        table.heading('profile', text=self.t("profile_dump"))
+        table.column('#0', width=160)
+        table.column('ms', width=80, anchor=tk.E)
+        table.column('tk_calls', width=80, anchor=tk.E)
+        table.column('profile', width=340)
+        table.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+        ttk.Label(window, text=self.profiler.log_path).pack(fill=tk.X, padx=5, pady=(0, 5))
+        
+        def refresh():
+            if not window.winfo_exists():
+                return
+            summary.configure(text="\n".join(
+                f"{name:18} {count:4}×  avg {average:8.1f} ms  max {longest:8.1f} ms"
+                for name, (count, average, longest) in sorted(self.profiler.summary().items())))
+            table.delete(*table.get_children())
+            for entry in reversed(self.profiler.history):
+                table.insert('', tk.END, text="  " * entry["depth"] + entry["action"],
+                             values=(f"{entry['ms']:.1f}", entry["tk_calls"], entry["profile"] or ""))
+            window.after(self.PROFILE_REFRESH, refresh)
+        refresh()
     
     def validate_json(self):
+        if self.stream_index is not None:
+            messagebox.showinfo(self.t("validate"), self.t("stream_mode"))
+            return
         try:
-            json.loads(self.raw_text.get(1.0, tk.END))
+            content = self.raw_view.get_text()
+            if self.last_parse is None or self.last_parse[0] != self.raw_view.version:
+                json.loads(content)
+            self.show_validation(None)
             messagebox.showinfo(self.t("validate"), self.t("validation_ok"))
         except json.JSONDecodeError as e:
+            self.show_validation((e.msg, e.lineno, e.colno))
             messagebox.showerror(self.t("validation_error"), f"{self.t('validation_error')}: {e}")
     
     def format_json(self):
+        if self.stream_index is not None:
+            messagebox.showinfo(self.t("format"), self.t("stream_mode"))
+            return
         try:
-            content = self.raw_text.get(1.0, tk.END)
-            parsed = json.loads(content)
+            content = self.raw_view.get_text()
+            parsed = self.parse_raw(content)
             formatted = json.dumps(parsed, indent=2, ensure_ascii=False)
-            self.raw_text.delete(1.0, tk.END)
-            self.raw_text.insert(tk.END, formatted)
+            self.raw_view.set_text(formatted)
             self.set_modified(True)
         except json.JSONDecodeError as e:
             messagebox.showerror(self.t("format"), f"{self.t('validation_error')}: {e}")
     
     def on_closing(self):
-        if self.modified:
-            if messagebox.askyesno(self.t("unsaved_changes"), self.t("confirm_close")):
-                self.root.destroy()
-        else:
-            self.root.destroy()
+        if self.modified and not messagebox.askyesno(self.t("unsaved_changes"), self.t("confirm_close")):
+            return
+        self.watcher.stop()
+        self.document.journal.release()
+        if self.validate_pool is not None:
+            self.validate_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        filename = sys.argv[1]
+    parser = argparse.ArgumentParser(description="JSON Editor")
+    parser.add_argument('filename', nargs='?', help="JSON file to open (default: first *.json in the current directory)")
+    parser.add_argument('--readonly', action='store_true',
+                        help="browse a memory-mapped file without loading or editing it")
+    parser.add_argument('--mmap', action='store_true',
+                        help="stream the file through a memory mapping instead of block reads")
+    parser.add_argument('--profile', action='store_true',
+                        default=os.environ.get('JSON_EDITOR_PROFILE', '') not in ('', '0'),
+                        help="time the action handlers, count their Tk calls and keep a cProfile dump "
+                             "of slow ones; Ctrl+Shift+P shows the stats (also JSON_EDITOR_PROFILE=1)")
+    parser.add_argument('--profile-dir', default=os.path.join(tempfile.gettempdir(), "json_editor_profile"),
+                        help="where --profile writes actions.jsonl and the .prof dumps")
+    parser.add_argument('--slow-ms', type=float, default=200,
+                        help="actions taking at least this long get a cProfile dump")
+    args = parser.parse_args()
+    
+    if args.filename:
+        filename = args.filename
     else:
         json_files = [f for f in os.listdir('.') if f.endswith('.json')]
         if json_files:
@@ -1194,5 +2224,16 @@ if __name__ == "__main__":
             print("No JSON files found!")
             sys.exit(1)
     
-    viewer = JSONViewer(filename)
+    profiler = None
+    if args.profile:
+        profiler = ActionProfiler(args.profile_dir, args.slow_ms)
+        print(f"⏱️ Profiling actions, log: {profiler.log_path}")
+    
+    if args.mmap:
+        viewer = JSONViewer(filename, backend="stream", use_mmap=True, readonly=args.readonly,
+                            profiler=profiler)
+    else:
+        viewer = JSONViewer(filename, readonly=args.readonly, profiler=profiler)
     viewer.root.mainloop()
+    if profiler:
+        profiler.close()
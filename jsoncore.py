@@ -0,0 +1,2021 @@
+#!/usr/bin/env python3
+"""JSON document model without a GUI: loading, queries, edits with undo, diff/merge and saving
+
+j.py builds the Tk editor on top of this module; batch jobs can import it
+without a display and without paying for the tkinter import.
+"""
+import concurrent.futures
+import copy
+import difflib
+import glob
+import hashlib
+import json
+import mmap
+import re
+import shutil
+import sys
+import os
+import argparse
+import bisect
+import itertools
+import threading
+import queue
+import time
+from collections import deque
+
+def rename_key(data, old_key, new_key):
+    """Rename a dict key without moving it to the end"""
+    items = list(data.items())
+    data.clear()
+    for key, value in items:
+        data[new_key if key == old_key else key] = value
+
+def insert_key(data, index, key, value):
+    """Insert a new dict key at position index"""
+    items = list(data.items())
+    items.insert(index, (key, value))
+    data.clear()
+    data.update(items)
+
+def get_value_at(data, path):
+    """Follow a tuple of keys/indices from data"""
+    for key in path:
+        data = data[key]
+    return data
+
+# Die folgenden Helfer beschreiben das Layout von json.dumps(data, indent=2),
+# damit einzelne Zeilenbereiche im Raw Editor ersetzt werden können.
+
+def count_lines(value, cache):
+    """Number of lines value spans when dumped with indent=2; containers are cached by id"""
+    if not isinstance(value, (dict, list)) or not value:
+        return 1
+    entry = cache.get(id(value))
+    if entry is not None and entry[0] is value:
+        return entry[1]
+    children = value.values() if isinstance(value, dict) else value
+    count = 2 + sum(count_lines(child, cache) for child in children)
+    cache[id(value)] = (value, count)
+    return count
+
+def scalar_bytes(value):
+    """Unambiguous byte form of a JSON scalar for hashing"""
+    if isinstance(value, str):
+        data = value.encode('utf-8', 'surrogatepass')
+        return b's%d:' % len(data) + data
+    return repr(value).encode('ascii') + b';'
+
+def content_hash(value, cache):
+    """Order-sensitive digest of a value and everything below it; containers are cached by id
+    
+    Only the edited path needs rehashing: callers drop the cache entries of
+    the changed containers and their ancestors, everything else is reused.
+    """
+    if not isinstance(value, (dict, list)):
+        return hashlib.blake2b(scalar_bytes(value), digest_size=16).digest()
+    entry = cache.get(id(value))
+    if entry is not None and entry[0] is value:
+        return entry[1]
+    digest = hash_members(value, lambda child: content_hash(child, cache))
+    cache[id(value)] = (value, digest)
+    return digest
+
+def hash_members(value, child_hash):
+    """content_hash of a container whose container members hash to child_hash(member)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    if isinstance(value, dict):
+        hasher.update(b'{')
+        for key, child in value.items():
+            hasher.update(scalar_bytes(key))
+            hasher.update(b'#' + child_hash(child) if isinstance(child, (dict, list)) else scalar_bytes(child))
+    else:
+        hasher.update(b'[')
+        for child in value:
+            hasher.update(b'#' + child_hash(child) if isinstance(child, (dict, list)) else scalar_bytes(child))
+    return hasher.digest()
+
+def evict_subtree(value, *caches):
+    """Drop the entries of value and every container below it from id-keyed caches
+    
+    Called when value leaves the document, so the caches do not keep it alive.
+    """
+    stack = [value] if isinstance(value, (dict, list)) else []
+    while stack:
+        node = stack.pop()
+        for cache in caches:
+            cache.pop(id(node), None)
+        stack.extend(child for child in (node.values() if isinstance(node, dict) else node)
+                     if isinstance(child, (dict, list)))
+
+def render_member(container, key, depth):
+    """Text of container[key] as it appears at the given depth, including key and trailing comma"""
+    indent = '  ' * depth
+    text = json.dumps(container[key], indent=2, ensure_ascii=False).replace('\n', '\n' + indent)
+    if isinstance(container, dict):
+        text = json.dumps(key, ensure_ascii=False) + ': ' + text
+    return indent + text + ('' if is_last_member(container, key) else ',')
+
+def is_last_member(container, key):
+    if isinstance(container, list):
+        return key == len(container) - 1
+    return key == next(reversed(container))
+
+class LoadCancelled(Exception):
+    pass
+
+def read_json_file(filename, progress=None, cancelled=None, chunk_size=1 << 20, hasher=None, raw=None):
+    """Read and parse a JSON file in chunks
+    
+    progress(bytes_read, total) is called after every chunk and once with
+    total=None when parsing starts; cancelled is a threading.Event checked
+    between chunks and after parsing. hasher (e.g. hashlib.sha256()) is fed
+    the raw bytes; raw, a list, receives them as one bytes object.
+    """
+    total = os.path.getsize(filename)
+    chunks = []
+    done = 0
+    with open(filename, 'rb') as f:
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                raise LoadCancelled()
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if hasher is not None:
+                hasher.update(chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+    
+    content = b''.join(chunks)
+    del chunks
+    if raw is not None:
+        raw.append(content)
+    content = content.decode('utf-8')
+    if progress:
+        progress(done, None)
+    data = json.loads(content)
+    if cancelled is not None and cancelled.is_set():
+        raise LoadCancelled()
+    return data
+
+def sync_directory(path):
+    """fsync a directory so a rename inside it survives a crash; not possible on Windows"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def file_digest(filename, size=None):
+    """sha256 of a file, or None if it does not exist or (with size) has another length"""
+    try:
+        if size is not None and os.path.getsize(filename) != size:
+            return None
+        hasher = hashlib.sha256()
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+    except FileNotFoundError:
+        return None
+    return hasher.digest()
+
+def encode_chunks(chunks, buffer_size):
+    """UTF-8 blocks of about buffer_size bytes from many small text chunks"""
+    pending, size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield ''.join(pending).encode('utf-8')
+            pending, size = [], 0
+    yield ''.join(pending).encode('utf-8')
+
+def write_atomic(filename, chunks, skip_unchanged=False, before_replace=None, buffer_size=1 << 16, raw=None):
+    """Write text chunks to filename through a synced temp file and a rename
+    
+    Returns the sha256 digest of the written bytes. With skip_unchanged the
+    content is encoded and hashed before any temp file exists, and filename
+    is not touched if it already holds exactly these bytes. A symlink is
+    followed, so the link stays and its target gets the new content; the
+    file keeps its permission bits. before_replace is called right before
+    the rename, e.g. to close readers of the old file. raw, a list,
+    receives the written bytes as one bytes object, so callers need not
+    read the file back.
+    """
+    filename = os.path.realpath(filename)
+    temp_name = filename + '.tmp'
+    blocks = encode_chunks(chunks, buffer_size)
+    digest = None
+    if raw is not None:
+        blocks = [b''.join(blocks)]
+        raw.append(blocks[0])
+    elif skip_unchanged:
+        blocks = list(blocks)
+    if skip_unchanged:
+        hasher = hashlib.sha256()
+        for block in blocks:
+            hasher.update(block)
+        digest = hasher.digest()
+        # Compare with the file as it is now, not as it was last loaded: another program may have changed it
+        if file_digest(filename, sum(map(len, blocks))) == digest:
+            return digest
+    hasher = hashlib.sha256()
+    try:
+        with open(temp_name, 'wb') as f:
+            for block in blocks:
+                if digest is None:
+                    hasher.update(block)
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, temp_name)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+    
+    if before_replace is not None:
+        before_replace()
+    os.replace(temp_name, filename)
+    sync_directory(os.path.dirname(filename))
+    return digest if digest is not None else hasher.digest()
+
+class EditError(ValueError):
+    """An edit that does not fit the document, e.g. an object key on an array"""
+
+def apply_operation(data, op, path, value=None, index=None):
+    """Apply one apply_edit operation to plain data and return the (possibly new) root"""
+    if not path:
+        return value
+    container, key = get_value_at(data, path[:-1]), path[-1]
+    if op == 'replace':
+        container[key] = value
+    elif op == 'rename':
+        rename_key(container, key, value)
+    elif op == 'add':
+        if isinstance(container, list):
+            container.insert(key, value)
+        elif index is not None and key not in container:
+            insert_key(container, index, key, value)
+        else:
+            container[key] = value
+    else:
+        del container[key]
+    return data
+
+def convert_value(current, text):
+    """Convert typed text to the type of the value it replaces; text that does not fit stays a string"""
+    try:
+        if isinstance(current, bool):
+            return text.lower() in ['true', '1', 'yes', 'ja']
+        if isinstance(current, (int, float)):
+            return float(text) if '.' in text else int(text)
+    except ValueError:
+        pass
+    return text
+
+def format_decode_error(e):
+    """Position, offending line and a caret under the column of a json.JSONDecodeError"""
+    # Cut the error line out of the document instead of splitting all of it
+    start = e.doc.rfind('\n', 0, e.pos) + 1
+    end = e.doc.find('\n', e.pos)
+    message = f"Position: Line {e.lineno}, Column {e.colno}\n"
+    message += f"Error line:\n{e.doc[start:end if end != -1 else len(e.doc)]}\n"
+    message += " " * (e.colno - 1) + "^\n"
+    return message
+
+def find_syntax_error(lines):
+    """Parse the lines joined by newlines; (msg, lineno, colno) of the first syntax error or None"""
+    # Runs in a worker process: only the position travels back, neither the text nor the parsed data
+    try:
+        json.loads('\n'.join(lines))
+    except json.JSONDecodeError as e:
+        return e.msg, e.lineno, e.colno
+    return None
+
+TEMPLATES = {
+    "projekt_spec": {
+        "project_basics": {
+            "name": "Project_Name",
+            "goal": "Short_Description",
+            "type": "Web_App/Mobile_App/Desktop_App",
+            "target_systems": ["linux", "windows", "macos"]
+        }
+    },
+    "api_design": {
+        "base_url": "https://api.example.com/v1",
+        "endpoints": [
+            {
+                "path": "/users",
+                "method": "GET",
+                "description": "List_of_Users"
+            }
+        ]
+    },
+    "test_cases": {
+        "test_suite": "My_Test_Suite",
+        "test_cases": [
+            {
+                "name": "Test_Case_1",
+                "description": "Test_Case_Description"
+            }
+        ]
+    },
+    "config": {
+        "app_name": "My_App",
+        "version": "1.0.0",
+        "settings": {
+            "debug": True,
+            "port": 3000
+        }
+    },
+    "datenmodell": {
+        "entities": [
+            {
+                "name": "User",
+                "attributes": {
+                    "id": "UUID",
+                    "email": "string"
+                }
+            }
+        ]
+    }
+}
+
+# JSON Patch (RFC 6902) zwischen zwei Dokumenten; gleiche Teilbäume werden über
+# content_hash übersprungen, Arrays per Sequenzabgleich bzw. über Schlüsselfelder gepaart.
+
+ARRAY_KEY_FIELDS = ('id', '_id', 'key', 'name', 'uuid')
+
+def json_pointer(path):
+    """RFC 6901 pointer for a path tuple"""
+    return ''.join('/' + str(key).replace('~', '~0').replace('/', '~1') for key in path)
+
+def parse_pointer(pointer, data):
+    """Path tuple for a pointer; array steps become ints ('-' stays as the append marker)"""
+    path = []
+    for token in (pointer.split('/')[1:] if pointer else []):
+        token = token.replace('~1', '/').replace('~0', '~')
+        if isinstance(data, list) and token != '-':
+            token = int(token)
+        path.append(token)
+        try:
+            data = data[token]
+        except (KeyError, IndexError, TypeError):
+            data = None  # only the last step of an 'add' may point past the data
+    return tuple(path)
+
+def array_key_field(old, new):
+    """Field that identifies the objects of both arrays, if every element has a unique one"""
+    for field in ARRAY_KEY_FIELDS:
+        keys = []
+        for element in itertools.chain(old, new):
+            if not isinstance(element, dict) or field not in element or isinstance(element[field], (dict, list)):
+                break
+            keys.append(element[field])
+        else:
+            if len(set(map(scalar_bytes, keys[:len(old)]))) == len(old) and \
+               len(set(map(scalar_bytes, keys[len(old):]))) == len(new):
+                return field
+    return None
+
+SMALL_GAP = 1 << 14  # gaps with fewer token pairs than this are matched exactly by difflib
+ANCHOR_RUN = 8  # tokens per run when single tokens are too repetitive to anchor on
+MAX_GAP_EDITS = 64  # edits a Myers diff may need for a gap without anchors
+
+def unique_anchors(a, b, alo, ahi, blo, bhi, run):
+    """(i, j) pairs whose run of tokens occurs exactly once in a[alo:ahi] and b[blo:bhi], in order of i"""
+    def runs(tokens, lo, hi):
+        counts, first = {}, {}
+        for i in range(lo, hi):
+            token = tokens[i] if run == 1 else tuple(tokens[i:min(i + run, hi)])
+            counts[token] = counts.get(token, 0) + 1
+            first.setdefault(token, i)
+        return {token: first[token] for token, count in counts.items() if count == 1}
+    a_unique, b_unique = runs(a, alo, ahi), runs(b, blo, bhi)
+    return sorted((i, b_unique[token]) for token, i in a_unique.items() if token in b_unique)
+
+def longest_increasing(pairs):
+    """Longest chain of pairs whose j increases along with i (patience sorting)"""
+    tails, tail_j, previous = [], [], {}
+    for pair in pairs:
+        k = bisect.bisect_left(tail_j, pair[1])
+        previous[pair] = tails[k - 1] if k else None
+        if k == len(tails):
+            tails.append(pair)
+            tail_j.append(pair[1])
+        else:
+            tails[k] = pair
+            tail_j[k] = pair[1]
+    chain = []
+    pair = tails[-1] if tails else None
+    while pair is not None:
+        chain.append(pair)
+        pair = previous[pair]
+    return chain[::-1]
+
+def shortest_edit_matches(a, b, alo, ahi, blo, bhi, max_edits):
+    """(i, j) pairs of a shortest edit script between the slices (Myers), or None beyond max_edits edits"""
+    n, m = ahi - alo, bhi - blo
+    furthest = {1: 0}
+    trace = []
+    for d in range(max_edits + 1):
+        trace.append(dict(furthest))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and furthest[k - 1] < furthest[k + 1]):
+                x = furthest[k + 1]
+            else:
+                x = furthest[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            furthest[k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            continue
+        # Rückwärts durch die Runden: jede Diagonale endet mit einem Stück Übereinstimmung
+        pairs = []
+        x, y = n, m
+        for d in range(len(trace) - 1, 0, -1):
+            before, k = trace[d], x - y
+            previous_k = k + 1 if k == -d or (k != d and before[k - 1] < before[k + 1]) else k - 1
+            previous_x = before[previous_k]
+            previous_y = previous_x - previous_k
+            while x > previous_x and y > previous_y:
+                x -= 1
+                y -= 1
+                pairs.append((alo + x, blo + y))
+            x, y = previous_x, previous_y
+        while x > 0 and y > 0:
+            x -= 1
+            y -= 1
+            pairs.append((alo + x, blo + y))
+        return pairs
+    return None
+
+def matching_blocks(a, b):
+    """Matching (i, j, size) blocks of two token lists, like SequenceMatcher.get_matching_blocks
+    
+    Patience diff: tokens that occur once on both sides anchor the match and the
+    gaps between anchors are matched the same way. Repetitive gaps anchor on runs
+    of tokens instead, small ones go to difflib. A large gap without any anchor
+    gets a Myers diff if it needs at most MAX_GAP_EDITS edits and is otherwise
+    left unmatched, so its elements are paired by position. That keeps the cost
+    near linear where difflib is quadratic in the number of repeated tokens.
+    """
+    matches = []
+    gaps = [(0, len(a), 0, len(b))]
+    while gaps:
+        alo, ahi, blo, bhi = gaps.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        if (ahi - alo) * (bhi - blo) <= SMALL_GAP:
+            matcher = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            for i, j, size in matcher.get_matching_blocks():
+                matches.extend((alo + i + k, blo + j + k) for k in range(size))
+            continue
+        for run in (1, ANCHOR_RUN):
+            anchors = longest_increasing(unique_anchors(a, b, alo, ahi, blo, bhi, run))
+            if anchors:
+                break
+        for i, j in anchors:
+            matches.append((i, j))
+            gaps.append((alo, i, blo, j))
+            alo, blo = i + 1, j + 1
+        if anchors:
+            gaps.append((alo, ahi, blo, bhi))
+        else:
+            matches.extend(shortest_edit_matches(a, b, alo, ahi, blo, bhi, MAX_GAP_EDITS) or ())
+    
+    blocks = []
+    for i, j in sorted(matches):
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1][2] += 1
+        else:
+            blocks.append([i, j, 1])
+    blocks = [tuple(block) for block in blocks]
+    blocks.append((len(a), len(b), 0))
+    return blocks
+
+def array_opcodes(a, b):
+    """SequenceMatcher.get_opcodes for matching_blocks(a, b)"""
+    opcodes = []
+    i = j = 0
+    for ai, bj, size in matching_blocks(a, b):
+        if i < ai and j < bj:
+            opcodes.append(('replace', i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(('delete', i, ai, j, j))
+        elif j < bj:
+            opcodes.append(('insert', i, i, j, bj))
+        if size:
+            opcodes.append(('equal', ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+def diff_json(old, new, old_cache=None, new_cache=None, path=()):
+    """List of JSON Patch operations that turn old into new"""
+    old_cache = {} if old_cache is None else old_cache
+    new_cache = {} if new_cache is None else new_cache
+    patch = []
+    diff_into(old, new, old_cache, new_cache, path, patch)
+    return patch
+
+def diff_into(old, new, old_cache, new_cache, path, patch):
+    if content_hash(old, old_cache) == content_hash(new, new_cache):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                patch.append({"op": "remove", "path": json_pointer(path + (key,))})
+        for key, value in new.items():
+            if key in old:
+                diff_into(old[key], value, old_cache, new_cache, path + (key,), patch)
+            else:
+                patch.append({"op": "add", "path": json_pointer(path + (key,)), "value": value})
+    elif isinstance(old, list) and isinstance(new, list):
+        diff_arrays(old, new, old_cache, new_cache, path, patch)
+    else:
+        patch.append({"op": "replace", "path": json_pointer(path), "value": new})
+
+def diff_arrays(old, new, old_cache, new_cache, path, patch):
+    # Identical head and tail need no matching at all
+    start = 0
+    while start < min(len(old), len(new)) and \
+            content_hash(old[start], old_cache) == content_hash(new[start], new_cache):
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and \
+            content_hash(old[end_old - 1], old_cache) == content_hash(new[end_new - 1], new_cache):
+        end_old -= 1
+        end_new -= 1
+    old_middle, new_middle = old[start:end_old], new[start:end_new]
+    
+    field = array_key_field(old_middle, new_middle)
+    if field is not None:
+        # Keyed matching: objects with the same id are the same element, even if edited
+        old_tokens = [scalar_bytes(element[field]) for element in old_middle]
+        new_tokens = [scalar_bytes(element[field]) for element in new_middle]
+    else:
+        old_tokens = [content_hash(element, old_cache) for element in old_middle]
+        new_tokens = [content_hash(element, new_cache) for element in new_middle]
+    
+    # Blocks are emitted back to front so earlier indices stay valid while the patch is applied
+    for tag, i1, i2, j1, j2 in reversed(array_opcodes(old_tokens, new_tokens)):
+        if tag == 'equal' and field is None:
+            continue
+        paired = min(i2 - i1, j2 - j1)
+        for k in range(paired):
+            diff_into(old_middle[i1 + k], new_middle[j1 + k], old_cache, new_cache,
+                      path + (start + i1 + k,), patch)
+        for index in range(i2 - 1, i1 + paired - 1, -1):
+            patch.append({"op": "remove", "path": json_pointer(path + (start + index,))})
+        for k in range(paired, j2 - j1):
+            patch.append({"op": "add", "path": json_pointer(path + (start + i1 + k,)),
+                          "value": new_middle[j1 + k]})
+
+def apply_patch(data, patch):
+    """Apply JSON Patch operations in place and return the (possibly new) root"""
+    for operation in patch:
+        op = operation["op"]
+        path = parse_pointer(operation["path"], data)
+        if op in ('move', 'copy'):
+            source = parse_pointer(operation["from"], data)
+            value = copy.deepcopy(get_value_at(data, source))
+            if op == 'move':
+                data = apply_operation(data, 'remove', source)
+                path = parse_pointer(operation["path"], data)
+            op, operation = 'add', dict(operation, value=value)
+        if op == 'test':
+            if get_value_at(data, path) != operation["value"]:
+                raise ValueError(f"test failed at {operation['path']}")
+        elif op == 'add' and path and path[-1] == '-':
+            data = apply_operation(data, 'add', path[:-1] + (len(get_value_at(data, path[:-1])),), operation["value"])
+        elif op in ('add', 'replace'):
+            data = apply_operation(data, op, path, operation["value"])
+        elif op == 'remove':
+            data = apply_operation(data, 'remove', path)
+        else:
+            raise ValueError(f"unknown patch operation {op!r}")
+    return data
+
+def diff_files(old_filename, new_filename):
+    """JSON Patch from one JSON file to another"""
+    return diff_json(read_json_file(old_filename), read_json_file(new_filename))
+
+# Dreiwege-Merge: was nur eine Seite gegenüber der Basis geändert hat, wird übernommen;
+# Änderungen beider Seiten an derselben Stelle sind Konflikte und gehen an prefer.
+
+def merge_json(base, ours, theirs, caches, conflicts, prefer='ours', path=()):
+    """Merge the changes base->ours and base->theirs; conflicting paths are appended to conflicts
+    
+    caches are the content_hash caches of (base, ours, theirs). Unchanged
+    subtrees are returned as they are, so the result shares objects with
+    ours and theirs.
+    """
+    base_cache, ours_cache, theirs_cache = caches
+    ours_hash, theirs_hash = content_hash(ours, ours_cache), content_hash(theirs, theirs_cache)
+    if ours_hash == theirs_hash:
+        return ours
+    base_hash = content_hash(base, base_cache)
+    if base_hash == ours_hash:
+        return theirs
+    if base_hash == theirs_hash:
+        return ours
+    if isinstance(base, dict) and isinstance(ours, dict) and isinstance(theirs, dict):
+        return merge_objects(base, ours, theirs, caches, conflicts, prefer, path)
+    if isinstance(base, list) and isinstance(ours, list) and isinstance(theirs, list):
+        return merge_arrays(base, ours, theirs, caches, conflicts, prefer, path)
+    conflicts.append(path)
+    return ours if prefer == 'ours' else theirs
+
+def merge_objects(base, ours, theirs, caches, conflicts, prefer, path):
+    base_cache, ours_cache, theirs_cache = caches
+    merged = {}
+    for key in itertools.chain(ours, (key for key in theirs if key not in ours)):
+        if key in ours and key in theirs:
+            if key in base:
+                merged[key] = merge_json(base[key], ours[key], theirs[key], caches, conflicts, prefer, path + (key,))
+            elif isinstance(ours[key], (dict, list)) and type(ours[key]) is type(theirs[key]):
+                # Added on both sides: merge against an empty container
+                merged[key] = merge_json(type(ours[key])(), ours[key], theirs[key], caches, conflicts, prefer, path + (key,))
+            elif content_hash(ours[key], ours_cache) == content_hash(theirs[key], theirs_cache):
+                merged[key] = ours[key]
+            else:
+                conflicts.append(path + (key,))
+                merged[key] = ours[key] if prefer == 'ours' else theirs[key]
+        elif key not in base:
+            merged[key] = ours[key] if key in ours else theirs[key]
+        else:
+            # Removed on one side: fine unless the other side changed it
+            side, side_cache, keep = (ours, ours_cache, 'ours') if key in ours else (theirs, theirs_cache, 'theirs')
+            if content_hash(side[key], side_cache) != content_hash(base[key], base_cache):
+                conflicts.append(path + (key,))
+                if prefer == keep:
+                    merged[key] = side[key]
+    return merged
+
+def merge_keyed(base, ours, theirs, field, caches, conflicts, prefer, path):
+    """Merge arrays of objects with an id field like objects keyed by that id; reordering is kept"""
+    sides = [{scalar_bytes(element[field]): element for element in side} for side in (base, ours, theirs)]
+    merged = merge_objects(*sides, caches, conflicts, prefer, path)
+    
+    def reordered(side):
+        return [key for key in side if key in sides[0]] != [key for key in sides[0] if key in side]
+    
+    # The order of the side that reordered wins; elements only the other side has
+    # follow their predecessor from there
+    if reordered(sides[2]) and (prefer == 'theirs' or not reordered(sides[1])):
+        skeleton, other = sides[2], sides[1]
+    else:
+        skeleton, other = sides[1], sides[2]
+    after = {}
+    previous = None
+    for key in other:
+        if key not in skeleton:
+            after.setdefault(previous, []).append(key)
+        previous = key
+    result = []
+    for start in itertools.chain([None], skeleton):
+        stack = [start]
+        while stack:
+            key = stack.pop()
+            if key in merged:
+                result.append(merged[key])
+            stack.extend(reversed(after.get(key, ())))
+    return result
+
+def match_positions(base_tokens, tokens):
+    """Position in tokens of every base element, or None where it was removed or replaced"""
+    matched = [None] * len(base_tokens)
+    start = 0
+    while start < min(len(base_tokens), len(tokens)) and base_tokens[start] == tokens[start]:
+        matched[start] = start
+        start += 1
+    end_base, end = len(base_tokens), len(tokens)
+    while end_base > start and end > start and base_tokens[end_base - 1] == tokens[end - 1]:
+        end_base -= 1
+        end -= 1
+        matched[end_base] = end
+    for i, j, size in matching_blocks(base_tokens[start:end_base], tokens[start:end]):
+        for k in range(size):
+            matched[start + i + k] = start + j + k
+    return matched
+
+def merge_arrays(base, ours, theirs, caches, conflicts, prefer, path):
+    """diff3 over array elements: elements matched on both sides split the arrays into chunks"""
+    base_cache, ours_cache, theirs_cache = caches
+    field = array_key_field(base, ours)
+    if field is not None and array_key_field(base, theirs) == field:
+        return merge_keyed(base, ours, theirs, field, caches, conflicts, prefer, path)
+    base_tokens = [content_hash(element, base_cache) for element in base]
+    ours_matched = match_positions(base_tokens, [content_hash(element, ours_cache) for element in ours])
+    theirs_matched = match_positions(base_tokens, [content_hash(element, theirs_cache) for element in theirs])
+    
+    merged = []
+    i = ours_start = theirs_start = 0
+    for k in itertools.chain((k for k in range(len(base)) if ours_matched[k] is not None and
+                              theirs_matched[k] is not None), [len(base)]):
+        ours_end = ours_matched[k] if k < len(base) else len(ours)
+        theirs_end = theirs_matched[k] if k < len(base) else len(theirs)
+        if ours_end < ours_start or theirs_end < theirs_start:
+            continue  # matched out of order on one side; stays part of the current chunk
+        base_chunk, ours_chunk, theirs_chunk = base[i:k], ours[ours_start:ours_end], theirs[theirs_start:theirs_end]
+        if base_chunk or ours_chunk or theirs_chunk:
+            base_hashes = [content_hash(element, base_cache) for element in base_chunk]
+            ours_hashes = [content_hash(element, ours_cache) for element in ours_chunk]
+            theirs_hashes = [content_hash(element, theirs_cache) for element in theirs_chunk]
+            if ours_hashes == base_hashes or ours_hashes == theirs_hashes:
+                merged.extend(theirs_chunk)
+            elif theirs_hashes == base_hashes:
+                merged.extend(ours_chunk)
+            elif len(base_chunk) == len(ours_chunk) == len(theirs_chunk):
+                # Both sides edited the same elements in place: merge them one by one
+                for offset in range(len(base_chunk)):
+                    merged.append(merge_json(base_chunk[offset], ours_chunk[offset], theirs_chunk[offset],
+                                             caches, conflicts, prefer, path + (len(merged),)))
+            else:
+                conflicts.append(path + (len(merged),))
+                merged.extend(ours_chunk if prefer == 'ours' else theirs_chunk)
+        if k < len(base):
+            merged.append(merge_json(base[k], ours[ours_end], theirs[theirs_end],
+                                     caches, conflicts, prefer, path + (len(merged),)))
+        i, ours_start, theirs_start = k + 1, ours_end + 1, theirs_end + 1
+    return merged
+
+class LazyNode:
+    """Stand-in for an object/array of a streamed file that has not been decoded yet"""
+    __slots__ = ('source', 'start', 'end', 'is_object')
+    
+    def __init__(self, source, start, end, is_object):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.is_object = is_object
+    
+    def load(self, spans=None):
+        """Decode one level; nested containers stay lazy"""
+        return self.source.load_level(self.start, spans=spans)
+    
+    def load_all(self):
+        return self.source.decode(self.start, self.end)
+
+def json_default(value):
+    """json.dumps hook that decodes streamed subtrees while they are written"""
+    if isinstance(value, LazyNode):
+        return value.load_all()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class JSONStreamIndex:
+    """Byte offset index over a JSON file that decodes containers one level at a time
+    
+    Scanning a container only records where its direct members start and end;
+    nested objects and arrays become LazyNode placeholders, so memory stays
+    proportional to what has been opened rather than to the file size.
+    """
+    BLOCK_SIZE = 1 << 20
+    
+    # All patterns match single bytes, so a match can never straddle two blocks
+    STRUCTURE = re.compile(rb'[\[\]{}"]')
+    STRING_END = re.compile(rb'["\\]')
+    SCALAR_END = re.compile(rb'[,\]}\s]')
+    NON_SPACE = re.compile(rb'[^ \t\r\n]')
+    
+    def __init__(self, filename, use_mmap=False):
+        self.file = open(filename, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.block_start = 0
+        self.block = b''
+        self.mapping = None
+        if use_mmap and self.size:
+            # The whole mapping acts as a single block, so no reads are ever issued
+            self.mapping = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.block = self.mapping
+    
+    def close(self):
+        if self.mapping is not None:
+            self.block = b''
+            self.mapping.close()
+        self.file.close()
+    
+    def read(self, start, end):
+        if self.block_start <= start and end <= self.block_start + len(self.block):
+            return self.block[start - self.block_start:end - self.block_start]
+        self.file.seek(start)
+        return self.file.read(end - start)
+    
+    def load_block(self, pos):
+        if not self.block_start <= pos < self.block_start + len(self.block):
+            self.file.seek(pos)
+            self.block_start = pos
+            self.block = self.file.read(self.BLOCK_SIZE)
+    
+    def byte(self, pos):
+        if pos >= self.size:
+            return -1
+        self.load_block(pos)
+        return self.block[pos - self.block_start]
+    
+    def search(self, pattern, pos):
+        """Offset of the next byte matching pattern at or after pos, or self.size"""
+        while pos < self.size:
+            self.load_block(pos)
+            match = pattern.search(self.block, pos - self.block_start)
+            if match:
+                return self.block_start + match.start()
+            pos = self.block_start + len(self.block)
+        return self.size
+    
+    def string_end(self, pos):
+        start = pos
+        pos += 1
+        while True:
+            pos = self.search(self.STRING_END, pos)
+            if pos >= self.size:
+                raise ValueError(f"Unterminated string at byte {start}")
+            if self.byte(pos) == 0x5c:  # backslash escapes the next byte
+                pos += 2
+            else:
+                return pos + 1
+    
+    def value_end(self, pos):
+        """Offset just past the value starting at pos"""
+        first = self.byte(pos)
+        if first == 0x22:
+            return self.string_end(pos)
+        if first not in (0x7b, 0x5b):
+            return self.search(self.SCALAR_END, pos)
+        
+        start = pos
+        depth = 0
+        while pos < self.size:
+            c = self.byte(pos)
+            if c == 0x22:
+                pos = self.string_end(pos)
+            else:
+                depth += 1 if c in (0x7b, 0x5b) else -1
+                pos += 1
+                if depth == 0:
+                    return pos
+            pos = self.search(self.STRUCTURE, pos)
+        raise ValueError(f"Unterminated container at byte {start}")
+    
+    def members(self, start, progress=None, cancelled=None):
+        """Return (is_object, [(key, value_start, value_end), ...]) for the container at start"""
+        is_object = self.byte(start) == 0x7b
+        closing = 0x7d if is_object else 0x5d
+        members = []
+        reported = start
+        pos = self.search(self.NON_SPACE, start + 1)
+        
+        while self.byte(pos) != closing:
+            if is_object:
+                key_end = self.string_end(pos)
+                key = json.loads(self.read(pos, key_end).decode('utf-8'))
+                pos = self.search(self.NON_SPACE, key_end)
+                if self.byte(pos) != 0x3a:
+                    raise ValueError(f"Expecting ':' at byte {pos}")
+                pos = self.search(self.NON_SPACE, pos + 1)
+            else:
+                key = len(members)
+            
+            end = self.value_end(pos)
+            members.append((key, pos, end))
+            pos = self.search(self.NON_SPACE, end)
+            if self.byte(pos) == 0x2c:
+                pos = self.search(self.NON_SPACE, pos + 1)
+            elif self.byte(pos) != closing:
+                raise ValueError(f"Expecting ',' or closing bracket at byte {pos}")
+            
+            if pos - reported >= self.BLOCK_SIZE:
+                reported = pos
+                if cancelled is not None and cancelled.is_set():
+                    raise LoadCancelled()
+                if progress:
+                    progress(pos, self.size)
+        return is_object, members
+    
+    def load_level(self, start, progress=None, cancelled=None, spans=None):
+        """Decode the container at start one level deep; spans, if given, receives key -> (start, end)"""
+        is_object, members = self.members(start, progress, cancelled)
+        result = {} if is_object else []
+        for key, value_start, value_end in members:
+            if spans is not None:
+                spans[key] = (value_start, value_end)
+            first = self.byte(value_start)
+            if first in (0x7b, 0x5b):
+                value = LazyNode(self, value_start, value_end, first == 0x7b)
+            else:
+                value = self.decode(value_start, value_end)
+            if is_object:
+                result[key] = value
+            else:
+                result.append(value)
+        return result
+    
+    def load_root(self, progress=None, cancelled=None, spans=None):
+        start = self.search(self.NON_SPACE, 0)
+        if self.byte(start) in (0x7b, 0x5b):
+            return self.load_level(start, progress, cancelled, spans)
+        return self.decode(start, self.size)
+    
+    def decode(self, start, end):
+        return json.loads(self.read(start, end).decode('utf-8'))
+
+def format_path(path):
+    """JSONPath-style text for a path tuple, e.g. $.items[3].name"""
+    return '$' + ''.join(f"[{key}]" if isinstance(key, int) else f".{key}" for key in path)
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchVocabulary:
+    """Distinct lower-cased texts with trigram postings; each text knows the index entries carrying it
+    
+    Texts longer than MAX_GRAM_TEXT get no postings, so one large string value
+    costs no more than a short one; match() scans them directly instead.
+    """
+    
+    MAX_GRAM_TEXT = 256
+    
+    def __init__(self):
+        self.ids = {}       # text -> text id
+        self.texts = []     # text id -> text, None once unused
+        self.entries = []   # text id -> set of entry ids
+        self.grams = {}     # trigram -> set of text ids
+        self.long = set()   # ids of texts without postings
+    
+    def add(self, text, entry):
+        sid = self.ids.get(text)
+        if sid is None:
+            sid = self.ids[text] = len(self.texts)
+            self.texts.append(text)
+            self.entries.append({entry})
+            if len(text) > self.MAX_GRAM_TEXT:
+                self.long.add(sid)
+                return sid
+            grams = self.grams
+            for gram in trigrams(text):
+                if gram in grams:
+                    grams[gram].add(sid)
+                else:
+                    grams[gram] = {sid}
+        else:
+            self.entries[sid].add(entry)
+        return sid
+    
+    def discard(self, sid, entry):
+        entries = self.entries[sid]
+        entries.discard(entry)
+        if entries:
+            return
+        text = self.texts[sid]
+        del self.ids[text]
+        self.texts[sid] = None
+        if sid in self.long:
+            self.long.discard(sid)
+            return
+        for gram in trigrams(text):
+            sids = self.grams[gram]
+            sids.discard(sid)
+            if not sids:
+                del self.grams[gram]
+    
+    def match(self, term):
+        """Entry ids whose text contains term (already lower-cased)"""
+        texts = self.texts
+        if len(term) < 3:
+            candidates = range(len(texts))
+        else:
+            postings = sorted((self.grams.get(gram, ()) for gram in trigrams(term)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates |= self.long
+        result = set()
+        for sid in candidates:
+            text = texts[sid]
+            if text is not None and term in text:
+                result.update(self.entries[sid])
+        return result
+    
+    def filter(self, test):
+        """Entry ids whose text passes test; used for regular expressions"""
+        result = set()
+        for sid, text in enumerate(self.texts):
+            if text is not None and test(text):
+                result.update(self.entries[sid])
+        return result
+
+class SearchIndex:
+    """Substring index over the keys and scalar values of a document
+    
+    Every member of the document gets an entry id; the entries mirror the
+    document's shape so apply_edit can patch them in place.
+    """
+    
+    def __init__(self, data):
+        self.data = data
+        self.keys = SearchVocabulary()
+        self.values = SearchVocabulary()
+        # Per entry id; removed entries keep a None parent
+        self.parent = []
+        self.key = []
+        self.key_sid = []
+        self.value_sid = []
+        self.children = {}  # entry id -> {key: entry id} for objects, [entry id] for arrays
+        self.root = self.new_entry(None, None)
+        self.fill(self.root, data)
+    
+    def new_entry(self, parent, key):
+        eid = len(self.parent)
+        self.parent.append(parent)
+        self.key.append(key)
+        self.key_sid.append(self.keys.add(key.lower(), eid) if isinstance(key, str) else None)
+        self.value_sid.append(None)
+        return eid
+    
+    def fill(self, eid, value):
+        """Index value and everything below it under entry eid"""
+        new_entry = self.new_entry
+        add_value = self.values.add
+        stack = [(eid, value)]
+        while stack:
+            eid, value = stack.pop()
+            if isinstance(value, dict):
+                children = self.children[eid] = {}
+                for key, child_value in value.items():
+                    child = children[key] = new_entry(eid, key)
+                    stack.append((child, child_value))
+            elif isinstance(value, list):
+                children = self.children[eid] = []
+                for index, child_value in enumerate(value):
+                    child = new_entry(eid, index)
+                    children.append(child)
+                    stack.append((child, child_value))
+            elif not isinstance(value, LazyNode):
+                # Undecoded streaming subtrees stay out of the index until they are loaded
+                self.value_sid[eid] = add_value(str(value).lower(), eid)
+    
+    def clear(self, eid):
+        """Drop the value of entry eid and all entries below it; the entry itself stays"""
+        stack = [eid]
+        while stack:
+            current = stack.pop()
+            sid = self.value_sid[current]
+            if sid is not None:
+                self.values.discard(sid, current)
+                self.value_sid[current] = None
+            children = self.children.pop(current, None)
+            if children is not None:
+                stack.extend(children.values() if isinstance(children, dict) else children)
+            if current != eid:
+                self.drop(current)
+    
+    def drop(self, eid):
+        sid = self.key_sid[eid]
+        if sid is not None:
+            self.keys.discard(sid, eid)
+        self.parent[eid] = self.key[eid] = self.key_sid[eid] = None
+    
+    def renumber(self, entries, start):
+        for index in range(start, len(entries)):
+            self.key[entries[index]] = index
+    
+    def entry_at(self, path):
+        eid = self.root
+        for key in path:
+            eid = self.children[eid][key]
+        return eid
+    
+    def path_of(self, eid):
+        path = []
+        parent, key = self.parent, self.key
+        while parent[eid] is not None:
+            path.append(key[eid])
+            eid = parent[eid]
+        path.reverse()
+        return tuple(path)
+    
+    def update(self, op, path, value=None):
+        """Mirror an apply_edit operation that has already been applied to the data"""
+        parent, key = self.entry_at(path[:-1]), path[-1]
+        children = self.children[parent]
+        if op == 'replace':
+            eid = children[key]
+            self.clear(eid)
+            self.fill(eid, value)
+        elif op == 'rename':
+            eid = children.pop(key)
+            children[value] = eid
+            self.keys.discard(self.key_sid[eid], eid)
+            self.key[eid] = value
+            self.key_sid[eid] = self.keys.add(value.lower(), eid)
+        elif op == 'add':
+            eid = self.new_entry(parent, key)
+            self.fill(eid, value)
+            if isinstance(children, list):
+                children.insert(key, eid)
+                self.renumber(children, key + 1)
+            else:
+                children[key] = eid
+        else:
+            eid = children.pop(key)
+            if isinstance(children, list):
+                self.renumber(children, key)
+            self.clear(eid)
+            self.drop(eid)
+    
+    def search(self, term, keys=True, values=True, limit=None):
+        """Sorted paths of members whose key or scalar value contains term, case-insensitive
+        
+        With limit, only the first limit matches in indexing order are turned into paths.
+        """
+        term = term.lower()
+        found = set()
+        if keys:
+            found |= self.keys.match(term)
+        if values:
+            found |= self.values.match(term)
+        if limit is not None and len(found) > limit:
+            found = sorted(found)[:limit]
+        # Keys under one parent share a type, so plain tuple comparison never mixes str and int
+        return sorted(self.path_of(eid) for eid in found)
+    
+    def query(self, term, scope='all', regex=False, batch=500):
+        """Yield lists of matching paths for scope 'all', 'keys', 'values' or 'path'
+        
+        Raises re.error if regex is set and term is not a valid expression.
+        """
+        if regex:
+            pattern = re.compile(term, re.IGNORECASE)
+            test = lambda text: pattern.search(text) is not None
+        else:
+            term = term.lower()
+            test = lambda text: term in text.lower()
+        
+        if scope == 'path':
+            # Paths are not indexed; walk the entries in document order and test each path string
+            matches = []
+            stack = [(self.root, '$')]
+            while stack:
+                eid, text = stack.pop()
+                if eid != self.root and test(text):
+                    matches.append(self.path_of(eid))
+                    if len(matches) >= batch:
+                        yield matches
+                        matches = []
+                children = self.children.get(eid)
+                if isinstance(children, dict):
+                    stack.extend((child, f"{text}.{key}") for key, child in reversed(children.items()))
+                elif children is not None:
+                    stack.extend((child, f"{text}[{index}]") for index, child in reversed(list(enumerate(children))))
+            if matches:
+                yield matches
+            return
+        
+        found = set()
+        for vocabulary in ((self.keys,) if scope == 'keys' else (self.values,) if scope == 'values'
+                           else (self.keys, self.values)):
+            found |= vocabulary.filter(test) if regex else vocabulary.match(term)
+        paths = sorted(self.path_of(eid) for eid in found)
+        for start in range(0, len(paths), batch):
+            yield paths[start:start + batch]
+
+class EditJournal:
+    """Append-only log of edit operations next to a document, used for crash recovery
+    
+    The first line holds the sha256 of the file the operations apply to; every
+    further line is one operation as JSON. Appending costs only the size of
+    the edit; compact() folds everything into a single snapshot.
+    """
+    
+    def __init__(self, filename):
+        self.filename = filename + '.journal'
+        self.file = None
+        self.base = None
+        self.count = 0
+        self.unsynced = False
+        self.owned = False  # written or resumed by this session; only then release() deletes it
+    
+    def start(self, base_digest):
+        """Begin a new journal for a document whose file has base_digest"""
+        self.close()
+        self.base = base_digest
+        self.file = open(self.filename, 'w', encoding='utf-8')
+        self.file.write(json.dumps({"base": base_digest.hex()}) + '\n')
+        self.file.flush()
+        self.count = 0
+        self.unsynced = True
+        self.owned = True
+    
+    def resume(self, base_digest, count):
+        """Keep appending to an existing journal, e.g. after it was replayed"""
+        self.close()
+        self.base = base_digest
+        self.file = open(self.filename, 'a', encoding='utf-8')
+        self.count = count
+        self.owned = True
+    
+    def append(self, op, path, value=None, index=None):
+        entry = {"op": op, "path": list(path), "value": value, "index": index}
+        self.file.write(json.dumps(entry, ensure_ascii=False, default=json_default) + '\n')
+        self.file.flush()
+        self.count += 1
+        self.unsynced = True
+    
+    def sync(self):
+        if self.file is not None and self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = False
+    
+    def compact(self, data):
+        """Replace the logged operations by one snapshot of data"""
+        encoder = json.JSONEncoder(ensure_ascii=False, default=json_default)
+        chunks = [json.dumps({"base": self.base.hex()}), '\n{"op": "replace", "path": [], "value": ']
+        write_atomic(self.filename, itertools.chain(chunks, encoder.iterencode(data), [', "index": null}\n']),
+                     before_replace=self.close)
+        self.resume(self.base, 1)
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+    
+    def discard(self):
+        """Close and delete the journal, e.g. after a save or a declined recovery"""
+        self.close()
+        self.count = 0
+        self.owned = False
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+    
+    def release(self):
+        """End the session: delete the journal if this session owns it, otherwise only close it
+        
+        A journal left by a crashed session is kept, unless it was offered
+        for recovery and declined; that goes through discard().
+        """
+        if self.owned:
+            self.discard()
+        else:
+            self.close()
+    
+    def read(self):
+        """(base digest hex, [(op, path, value, index)]) of an existing journal, or None
+        
+        A torn last line from a crash mid-write ends the list.
+        """
+        try:
+            with open(self.filename, encoding='utf-8') as f:
+                base = json.loads(f.readline())["base"]
+                operations = []
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    operations.append((entry["op"], tuple(entry["path"]), entry["value"], entry["index"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return base, operations
+
+class FileWatcher:
+    """Polls a file on a background thread and reports when its content changed
+    
+    No inotify: one stat() per interval is cheap. The file is only hashed
+    once a changed mtime/size stayed the same for a further interval, so a
+    file that is still being written is not reported half done. Reported
+    sha256 digests are put into self.changes (None when not hashing).
+    """
+    
+    def __init__(self, filename, interval=1.0):
+        self.filename = filename
+        self.interval = interval
+        self.changes = queue.Queue()
+        self.known = (None, None)  # (mtime/size, sha256) of the version the editor has
+        self.watched = False  # set by the first watch(); before that no version is known
+        self.stop_event = None
+    
+    def watch(self, digest):
+        """Take the file as it is now as known; digest None reports stat changes without hashing"""
+        self.known = (self.stat(), digest)
+        self.watched = True
+        while not self.changes.empty():
+            self.changes.get_nowait()  # reports about versions before this one
+        if self.stop_event is None:
+            self.stop_event = threading.Event()
+            threading.Thread(target=self.run, args=(self.stop_event,), daemon=True).start()
+    
+    def stop(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.stop_event = None
+    
+    def stat(self):
+        try:
+            st = os.stat(self.filename)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def changed(self):
+        """sha256 of the file if it differs from the known version, else None; checked right away"""
+        if not self.watched:
+            return None  # no known version to differ from yet
+        current = self.stat()
+        if current is None or current == self.known[0]:
+            return None
+        digest = self.digest()
+        return digest if digest != self.known[1] else None
+    
+    def digest(self):
+        digest = file_digest(self.filename)
+        if digest is None:
+            raise FileNotFoundError(self.filename)
+        return digest
+    
+    def run(self, stop_event):
+        pending = None
+        while not stop_event.wait(self.interval):
+            current = self.stat()
+            known_stat, known_digest = self.known
+            if current is None or current == known_stat:
+                pending = None
+                continue
+            if current != pending:
+                pending = current  # wait one more interval for the writer to finish
+                continue
+            pending = None
+            try:
+                digest = self.digest() if known_digest is not None else None
+            except OSError:
+                continue
+            if self.known[0] != known_stat:
+                continue  # watch() was called meanwhile, e.g. after our own save
+            self.known = (current, digest if digest is not None else known_digest)
+            if digest is None or digest != known_digest:
+                self.changes.put(digest)
+
+class UndoStack:
+    """Bounded undo/redo history; every entry is an apply_edit operation plus its inverse
+    
+    Operations are (op, path, value, index) tuples. Values are kept by reference:
+    undo and redo run strictly in order, so each one finds the objects in the
+    state it left them.
+    """
+    
+    def __init__(self, limit=500, coalesce_seconds=1.0):
+        self.undo_entries = deque(maxlen=limit)
+        self.redo_entries = []
+        self.coalesce_seconds = coalesce_seconds
+    
+    def clear(self):
+        self.undo_entries.clear()
+        self.redo_entries.clear()
+    
+    def record(self, forward, inverse):
+        now = time.monotonic()
+        self.redo_entries.clear()
+        if self.undo_entries and forward[0] == 'replace':
+            last_forward, last_inverse, stamp = self.undo_entries[-1]
+            if last_forward[0] == 'replace' and last_forward[1] == forward[1] and now - stamp < self.coalesce_seconds:
+                # Quick successive edits of one value undo in a single step
+                self.undo_entries[-1] = (forward, last_inverse, now)
+                return
+        self.undo_entries.append((forward, inverse, now))
+    
+    def pop_undo(self):
+        """Inverse operation of the last edit, or None"""
+        if not self.undo_entries:
+            return None
+        entry = self.undo_entries.pop()
+        self.redo_entries.append(entry)
+        return entry[1]
+    
+    def pop_redo(self):
+        if not self.redo_entries:
+            return None
+        forward, inverse, _ = self.redo_entries.pop()
+        self.undo_entries.append((forward, inverse, 0))  # a redone edit never absorbs the next one
+        return forward
+
+class JSONDocument:
+    """An editable JSON document without any GUI; the Tk editor is a view on one of these
+    
+    All changes go through edit(), which keeps the undo history, the crash
+    journal, the subtree hashes and the search index in step. Paths are
+    tuples of object keys and array indices.
+    """
+    
+    def __init__(self, filename=None, data=None):
+        self.filename = filename
+        self.data = data
+        self.saved_digest = None  # sha256 of the file as last loaded or saved
+        self.base_bytes = None  # the file's bytes as loaded or saved, base of a three-way merge
+        self.history = UndoStack()
+        self.journal = EditJournal(filename) if filename else None
+        
+        # Merkle hashes: current subtree digests and the digests as loaded/saved, both filled on
+        # demand. Containers changed since then keep a shallow copy of their members in originals;
+        # touched holds them and their ancestors, introduced the containers edits brought in.
+        self.hash_cache = {}
+        self.baseline_hashes = None  # None: no change tracking
+        self.baseline_data = None
+        self.originals = {}
+        self.touched = {}
+        self.introduced = {}
+        self.line_count_cache = {}  # lines per container in json.dumps(data, indent=2)
+        self.line_offsets = {}  # id(container) -> (container, lines before each member, dict key positions)
+        self.search_index = None
+        self.edit_version = 0
+    
+    def load(self, progress=None, cancelled=None):
+        """Read and hash self.filename; see read_json_file for progress and cancelled"""
+        hasher, raw = hashlib.sha256(), []
+        self.data = read_json_file(self.filename, progress, cancelled, hasher=hasher, raw=raw)
+        self.saved_digest = hasher.digest()
+        self.base_bytes = raw[0]
+        self.set_baseline()
+        return self
+    
+    def get(self, path):
+        return get_value_at(self.data, path)
+    
+    def has_search_index(self):
+        """Whether search_index belongs to the current self.data"""
+        return self.search_index is not None and self.search_index.data is self.data
+    
+    def get_search_index(self):
+        """The search index of self.data; built here if nobody built it yet"""
+        if not self.has_search_index():
+            self.search_index = SearchIndex(self.data)
+        return self.search_index
+    
+    def query(self, term, scope='all', regex=False):
+        """Yield the paths matching term, see SearchIndex.query"""
+        for batch in self.get_search_index().query(term, scope, regex):
+            yield from batch
+    
+    def check_edit(self, op, path, value=None, index=None):
+        """The operation edit() would apply for these arguments; raises EditError if it does not fit
+        
+        Nothing is changed. An 'add' of an existing object key becomes a 'replace'.
+        """
+        if op not in ('replace', 'add', 'remove', 'rename'):
+            raise EditError(f"unknown edit operation {op!r}")
+        if not path:
+            if op != 'replace' and op != 'add':
+                raise EditError(f"cannot {op} the root")
+            return 'replace'
+        parent_path, key = path[:-1], path[-1]
+        try:
+            container = get_value_at(self.data, parent_path)
+        except (KeyError, IndexError, TypeError):
+            raise EditError(f"{format_path(parent_path)} does not exist") from None
+        if isinstance(container, dict):
+            if not isinstance(key, str):
+                raise EditError(f"object key {key!r} at {format_path(parent_path)} is not a string")
+            if op == 'add':
+                if key in container:
+                    return 'replace'
+                if index is not None and not 0 <= index <= len(container):
+                    raise EditError(f"position {index} is outside {format_path(parent_path)}")
+            elif key not in container:
+                raise EditError(f"{format_path(path)} does not exist")
+            elif op == 'rename':
+                if not isinstance(value, str):
+                    raise EditError(f"new key {value!r} is not a string")
+                if value != key and value in container:
+                    raise EditError(f"{format_path(parent_path + (value,))} already exists")
+        elif isinstance(container, list):
+            if isinstance(key, bool) or not isinstance(key, int):
+                raise EditError(f"{format_path(parent_path)} is an array, {key!r} is not an index")
+            if op == 'rename':
+                raise EditError(f"array elements of {format_path(parent_path)} have no key to rename")
+            if not 0 <= key < len(container) + (op == 'add'):
+                raise EditError(f"index {key} is outside {format_path(parent_path)}")
+        else:
+            raise EditError(f"{format_path(parent_path)} is not an object or array")
+        return op
+    
+    def edit(self, op, path, value=None, index=None, record=True):
+        """Apply one edit to self.data and return the operation actually applied
+        
+        op is 'replace', 'add' (inserts into arrays, sets object keys; an
+        existing key makes it a 'replace'), 'remove' or 'rename' (value is the
+        new key of an object member). index places a new object key; by default
+        it is appended. With record, the inverse operation goes onto the undo
+        stack. An edit that does not fit raises EditError and changes nothing;
+        history and journal only see edits that were applied.
+        """
+        op, inverse = self.apply(op, path, value, index)
+        if record:
+            self.history.record((op, path, value, index), inverse)
+        self.journal_edit(op, path, value, index)
+        return op
+    
+    def apply(self, op, path, value=None, index=None):
+        """Check and apply one edit without history or journal; returns (op, inverse operation)"""
+        op = self.check_edit(op, path, value, index)
+        self.edit_version += 1
+        if not path:
+            inverse = ('replace', (), self.data, None)
+            self.data = value
+            self.line_count_cache.clear()
+            self.line_offsets.clear()
+            self.hash_cache.clear()
+            if self.baseline_hashes is not None and value is not self.baseline_data:
+                self.introduce(value)
+            return op, inverse
+        
+        parent_path, key = path[:-1], path[-1]
+        container = get_value_at(self.data, parent_path)
+        if op == 'replace':
+            inverse = ('replace', path, container[key], None)
+        elif op == 'rename':
+            inverse = ('rename', parent_path + (value,), key, None)
+        elif op == 'add':
+            inverse = ('remove', path, None, None)
+        else:
+            position = None if isinstance(container, list) else list(container).index(key)
+            inverse = ('add', path, container[key], position)
+        
+        old_value = container[key] if op in ('replace', 'remove') else None
+        old_lines = count_lines(old_value, self.line_count_cache) if op in ('replace', 'remove') else 0
+        was_empty = not container
+        ancestors = [self.data]
+        for step in parent_path:
+            ancestors.append(ancestors[-1][step])
+        if self.baseline_hashes is not None:
+            self.track_change(ancestors, op, value)
+        apply_operation(self.data, op, path, value, index)
+        
+        # Hashes of the edited container and its ancestors are stale now, those of a
+        # replaced or removed subtree are garbage
+        for node in ancestors:
+            self.hash_cache.pop(id(node), None)
+        evict_subtree(old_value, self.line_count_cache, self.line_offsets, self.hash_cache)
+        if isinstance(old_value, (dict, list)) and self.introduced.get(id(old_value)) is old_value:
+            # A new subtree is marked again if undo brings it back; new values inside an
+            # original one must stay marked, undo puts the original back as it is
+            evict_subtree(old_value, self.introduced)
+        self.update_line_caches(op, path, ancestors, old_lines, was_empty, value)
+        
+        if self.search_index is not None and self.search_index.data is self.data:
+            self.search_index.update(op, path, value)
+        return op, inverse
+    
+    def update_line_caches(self, op, path, ancestors, old_lines, was_empty, value):
+        """Adjust cached line counts and member offsets along path after an edit
+        
+        Every container on the path grows by the same number of lines, so the
+        counts are shifted instead of recounted; offsets are only cut behind
+        the edited member.
+        """
+        container, key = ancestors[-1], path[-1]
+        new_lines = count_lines(container[key], self.line_count_cache) if op in ('replace', 'add') else 0
+        delta = 0 if op == 'rename' else new_lines - old_lines
+        if op == 'add' and was_empty:
+            delta += 1  # "[]" turns into opening and closing bracket lines
+        elif op == 'remove' and not container:
+            delta -= 1
+        for node in ancestors:
+            entry = self.line_count_cache.get(id(node))
+            if entry is not None and entry[0] is node:
+                if node:
+                    self.line_count_cache[id(node)] = (node, entry[1] + delta)
+                else:
+                    del self.line_count_cache[id(node)]
+        
+        for node, step in zip(ancestors, path):
+            entry = self.line_offsets.get(id(node))
+            if entry is None or entry[0] is not node:
+                continue
+            _, offsets, positions = entry
+            if node is container and positions is not None and op != 'replace':
+                if op == 'rename':
+                    positions[value] = positions.pop(key)
+                    continue
+                if op == 'remove' or next(reversed(container)) != key:
+                    # Keys behind a removed or inserted one moved
+                    del self.line_offsets[id(node)]
+                    continue
+                positions[key] = len(container) - 1
+            position = step if positions is None else positions[step]
+            del offsets[position + 1:]
+    
+    def line_count(self, value):
+        """Lines value spans when dumped with indent=2"""
+        return count_lines(value, self.line_count_cache)
+    
+    def line_of(self, path):
+        """1-based line on which the value at path starts when self.data is dumped with indent=2
+        
+        Member offsets are cached per container, so this costs the depth of
+        path rather than the number of siblings in front of it.
+        """
+        line, node = 1, self.data
+        for key in path:
+            line += 1 + self.member_offset(node, key)
+            node = node[key]
+        return line
+    
+    def member_offset(self, container, key):
+        """Lines taken by the members of container in front of key"""
+        entry = self.line_offsets.get(id(container))
+        if entry is None or entry[0] is not container:
+            positions = {name: i for i, name in enumerate(container)} if isinstance(container, dict) else None
+            entry = (container, [0], positions)
+            self.line_offsets[id(container)] = entry
+        _, offsets, positions = entry
+        position = key if positions is None else positions[key]
+        if position >= len(offsets):
+            start = len(offsets) - 1
+            if positions is None:
+                members = (container[i] for i in range(start, position))
+            else:
+                members = itertools.islice(container.values(), start, position)
+            total = offsets[-1]
+            for member in members:
+                total += count_lines(member, self.line_count_cache)
+                offsets.append(total)
+        return offsets[position]
+    
+    def undo(self):
+        """Revert the last edit; returns the operation applied for it, or None"""
+        operation = self.history.pop_undo()
+        if operation is not None:
+            self.edit(*operation, record=False)
+        return operation
+    
+    def redo(self):
+        operation = self.history.pop_redo()
+        if operation is not None:
+            self.edit(*operation, record=False)
+        return operation
+    
+    def apply_patch(self, patch, edit=None):
+        """Apply JSON Patch operations one by one through edit (default self.edit)
+        
+        Raises ValueError when a 'test' operation fails; earlier operations stay applied.
+        """
+        edit = edit or self.edit
+        for operation in patch:
+            op = operation['op']
+            if op in ('move', 'copy'):
+                source = parse_pointer(operation['from'], self.data)
+                value = copy.deepcopy(get_value_at(self.data, source))
+                if op == 'move':
+                    edit('remove', source)
+                op = 'add'
+            else:
+                value = copy.deepcopy(operation.get('value'))
+            path = parse_pointer(operation['path'], self.data)
+            if path and path[-1] == '-':
+                path = path[:-1] + (len(get_value_at(self.data, path[:-1])),)
+            if op == 'test':
+                if content_hash(get_value_at(self.data, path), {}) != content_hash(value, {}):
+                    raise ValueError(f"test failed at {operation['path']}")
+            elif op == 'remove':
+                edit('remove', path)
+            else:
+                edit(op, path, value)
+    
+    def diff(self, other, other_cache=None):
+        """JSON Patch from the model to other; the model's subtree hashes are reused"""
+        return diff_json(self.data, other, self.hash_cache, other_cache)
+    
+    def save(self, text=None):
+        """Write the model to self.filename, or text that was already parsed into the model"""
+        if text is None and self.data is None and self.saved_digest is None:
+            # Never loaded (or the load was cancelled): writing would replace the file with null
+            raise ValueError(f"{self.filename} was not loaded, nothing to save")
+        encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+        chunks = encoder.iterencode(self.data) if text is None else [text]
+        raw = []
+        self.saved_digest = write_atomic(self.filename, chunks, skip_unchanged=True, raw=raw)
+        self.base_bytes = raw[0]
+        if self.journal is not None:
+            self.journal.discard()
+        self.mark_saved()
+    
+    def journal_edit(self, op, path, value, index):
+        """Log an edit for crash recovery; documents without a known file digest are not journaled"""
+        if self.saved_digest is None or self.journal is None:
+            return
+        try:
+            if self.journal.file is None:
+                self.journal.start(self.saved_digest)
+            self.journal.append(op, path, value, index)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Journal error: {e}")
+            self.journal.close()
+    
+    def sync_journal(self, compact_ops=1000):
+        """Make the journal durable, folding it into one snapshot once it has compact_ops entries"""
+        if self.journal is not None and self.journal.file is not None:
+            if self.journal.count >= compact_ops:
+                self.journal.compact(self.data)
+            self.journal.sync()
+    
+    def recoverable_operations(self):
+        """Operations of a journal left behind by a crash for the file just loaded, or None
+        
+        A journal that is empty, unreadable or written against another version of the file is deleted.
+        """
+        if self.saved_digest is None or self.journal is None or not os.path.exists(self.journal.filename):
+            return None
+        recovered = self.journal.read()
+        if (recovered is None or not recovered[1] or recovered[0] != self.saved_digest.hex()
+                or os.path.getmtime(self.journal.filename) < os.path.getmtime(self.filename)):
+            self.journal.discard()
+            return None
+        return recovered[1]
+    
+    def recover(self, operations):
+        """Replay recoverable_operations() and keep appending to their journal
+        
+        The operations go through apply(), so hashes, line counts and the search
+        index see them like any other edit. An operation that no longer fits
+        ends the replay; the journal is then folded into a snapshot of what was replayed.
+        """
+        replayed = 0
+        for operation in operations:
+            try:
+                self.apply(*operation)
+            except EditError as e:
+                print(f"⚠️ Journal entry {replayed + 1} not replayed: {e}")
+                break
+            replayed += 1
+        self.journal.resume(self.saved_digest, replayed)
+        if replayed < len(operations):
+            self.journal.compact(self.data)
+        return replayed
+    
+    def set_baseline(self):
+        """Take the model as the version on disk and track changes from here
+        
+        Nothing is hashed now; the checks below hash what they compare, once.
+        """
+        self.baseline_data = self.data
+        self.baseline_hashes = dict(self.hash_cache)  # current hashes are the baseline's
+        self.originals = {}
+        self.touched = {}
+        self.introduced = {}
+    
+    def mark_saved(self):
+        """The model is what is on disk now"""
+        if self.baseline_hashes is not None:
+            self.set_baseline()
+    
+    def track_change(self, ancestors, op, value):
+        """Keep what the baseline needs before ancestors[-1] is changed in place"""
+        container = ancestors[-1]
+        if self.introduced.get(id(container)) is container:
+            original = None  # not part of the baseline, nothing to keep
+        else:
+            original = self.originals.get(id(container))
+            if original is None:
+                members = dict(container) if isinstance(container, dict) else list(container)
+                original = self.originals[id(container)] = (container, members)
+            for node in ancestors:
+                self.touched[id(node)] = node
+        if op in ('add', 'replace') and isinstance(value, (dict, list)):
+            # Undo puts removed subtrees back, possibly under a renamed key; only values
+            # that were not members before are new
+            members = None if original is None else original[1].values() if isinstance(container, dict) else original[1]
+            if members is None or not any(member is value for member in members):
+                self.introduce(value)
+    
+    def introduce(self, value):
+        """Remember value and the containers below it as not part of the baseline"""
+        stack = [value] if isinstance(value, (dict, list)) else []
+        while stack:
+            node = stack.pop()
+            self.introduced[id(node)] = node
+            stack.extend(child for child in (node.values() if isinstance(node, dict) else node)
+                         if isinstance(child, (dict, list)))
+    
+    def original_hash(self, value):
+        """content_hash of a baseline value as it was at the last load or save"""
+        if not isinstance(value, (dict, list)):
+            return content_hash(value, None)
+        entry = self.baseline_hashes.get(id(value))
+        if entry is not None and entry[0] is value:
+            return entry[1]
+        if id(value) not in self.touched:
+            return content_hash(value, self.baseline_hashes)
+        original = self.originals.get(id(value))
+        digest = hash_members(value if original is None else original[1], self.original_hash)
+        self.baseline_hashes[id(value)] = (value, digest)
+        return digest
+    
+    def changed(self, value):
+        """Whether a baseline container's content differs from the baseline; untouched ones are not looked at"""
+        if id(value) not in self.touched:
+            return False
+        original = self.originals.get(id(value))
+        members = value if original is None else original[1]
+        if len(members) != len(value):
+            return True
+        if isinstance(value, dict):
+            if any(old != new for old, new in zip(members, value)):
+                return True  # keys renamed or reordered
+            pairs = zip(members.values(), value.values())
+        else:
+            pairs = zip(members, value)
+        for old, new in pairs:
+            if old is new:
+                if isinstance(new, (dict, list)) and self.changed(new):
+                    return True
+            elif not isinstance(old, (dict, list)) and not isinstance(new, (dict, list)):
+                if scalar_bytes(old) != scalar_bytes(new):
+                    return True
+            elif content_hash(new, self.hash_cache) != self.original_hash(old):
+                return True
+        return False
+    
+    def is_modified(self):
+        """Compare the model with the version on disk; None without a baseline"""
+        if self.baseline_hashes is None:
+            return None
+        if self.data is not self.baseline_data:
+            return content_hash(self.data, self.hash_cache) != self.original_hash(self.baseline_data)
+        return self.changed(self.data)
+    
+    def is_dirty(self, value):
+        """Whether a container of the model differs from its version on disk"""
+        if self.introduced.get(id(value)) is value:
+            return True
+        return self.changed(value)
+
+# Stapelverarbeitung: jede Datei läuft in einem eigenen Prozess, Ergebnisse kommen in Fertigstellungsreihenfolge
+
+COMMANDS = ('diff', 'validate', 'format', 'stats')
+
+def json_stats(data):
+    """Counts of the value kinds in a document and its nesting depth"""
+    stats = {"objects": 0, "arrays": 0, "keys": 0, "strings": 0, "numbers": 0, "booleans": 0, "nulls": 0, "depth": 0}
+    stack = [(data, 1)]
+    while stack:
+        value, depth = stack.pop()
+        if isinstance(value, dict):
+            stats["objects"] += 1
+            stats["keys"] += len(value)
+            stack.extend((child, depth + 1) for child in value.values())
+        elif isinstance(value, list):
+            stats["arrays"] += 1
+            stack.extend((child, depth + 1) for child in value)
+        else:
+            kind = ("nulls" if value is None else "booleans" if isinstance(value, bool)
+                    else "strings" if isinstance(value, str) else "numbers")
+            stats[kind] += 1
+        stats["depth"] = max(stats["depth"], depth)
+    return stats
+
+def process_file(command, filename, check=False):
+    """Run a batch command on one file; returns (filename, ok, message or stats dict)"""
+    try:
+        with open(filename, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+    except json.JSONDecodeError as e:
+        return filename, False, f"{e.msg}\n{format_decode_error(e)}"
+    except (OSError, UnicodeDecodeError) as e:
+        return filename, False, str(e)
+    
+    if command == 'validate':
+        return filename, True, "valid"
+    if command == 'stats':
+        stats = json_stats(data)
+        stats["bytes"] = len(raw)
+        return filename, True, stats
+    # Same layout as saving from the editor; a final newline is kept if the file had one
+    formatted = json.dumps(data, indent=2, ensure_ascii=False) + ('\n' if raw.endswith(b'\n') else '')
+    if formatted.encode('utf-8') == raw:
+        return filename, True, "unchanged"
+    if check:
+        return filename, False, "would reformat"
+    try:
+        write_atomic(filename, [formatted])
+    except OSError as e:
+        return filename, False, str(e)
+    return filename, True, "reformatted"
+
+def process_files(command, filenames, check=False):
+    return [process_file(command, filename, check) for filename in filenames]
+
+def expand_paths(patterns):
+    """Files named by paths, globs and directories (searched recursively for *.json), without duplicates"""
+    found = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(glob.escape(pattern), '**', '*.json'), recursive=True))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern]  # missing files are reported by process_file
+        for match in matches:
+            found.setdefault(os.path.normpath(match), None)
+    return list(found)
+
+def run_batch(command, filenames, jobs=None, check=False, quiet=False, as_json=False):
+    """Process files on a process pool and print each result as soon as it is done; returns the exit status"""
+    jobs = jobs or os.cpu_count() or 1
+    # Small files cost less than a round trip to a worker, so each task takes a few of them
+    batch = max(1, min(64, len(filenames) // (jobs * 8)))
+    batches = [filenames[i:i + batch] for i in range(0, len(filenames), batch)]
+    started = time.monotonic()
+    failed = 0
+    
+    def report(results):
+        nonlocal failed
+        for filename, ok, message in results:
+            failed += not ok
+            if as_json:
+                entry = {"file": filename, "ok": ok}
+                entry.update(message if isinstance(message, dict) else {"message": message})
+                print(json.dumps(entry, ensure_ascii=False), flush=True)
+            elif not ok:
+                print(f"❌ {filename}: {message}", flush=True)
+            elif not quiet:
+                if isinstance(message, dict):
+                    message = ", ".join(f"{key}={value}" for key, value in message.items())
+                print(f"✅ {filename}: {message}", flush=True)
+    
+    if jobs == 1 or len(batches) == 1:
+        for filenames_part in batches:
+            report(process_files(command, filenames_part, check))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(process_files, command, filenames_part, check) for filenames_part in batches]
+            for future in concurrent.futures.as_completed(futures):
+                report(future.result())
+    
+    print(f"{len(filenames)} files, {failed} failed, {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+def job_count(text):
+    """argparse type for -j: a whole number of at least 1"""
+    try:
+        jobs = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid job count: {text!r}")
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"job count must be at least 1, got {jobs}")
+    return jobs
+
+def main(argv):
+    """Command line modes that need no display; returns the exit status"""
+    parser = argparse.ArgumentParser(prog="j.py", description="JSON Editor command line tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    diff_parser = commands.add_parser('diff', help="print the JSON Patch (RFC 6902) from one JSON file to another")
+    diff_parser.add_argument('old', help="original JSON file")
+    diff_parser.add_argument('new', help="changed JSON file")
+    for command, help_text in (('validate', "check that files parse, with line/column of the first error"),
+                               ('format', "rewrite files with the editor's indentation"),
+                               ('stats', "count objects, arrays, keys and scalars per file")):
+        batch_parser = commands.add_parser(command, help=help_text)
+        batch_parser.add_argument('paths', nargs='+', help="files, glob patterns or directories")
+        batch_parser.add_argument('-j', '--jobs', type=job_count, help="worker processes (default: number of CPUs)")
+        batch_parser.add_argument('-q', '--quiet', action='store_true', help="only print failures")
+        batch_parser.add_argument('--json', action='store_true', help="print one JSON object per file")
+        if command == 'format':
+            batch_parser.add_argument('--check', action='store_true',
+                                      help="do not write; fail for files that are not formatted")
+    args = parser.parse_args(argv)
+    
+    if args.command != 'diff':
+        filenames = expand_paths(args.paths)
+        if not filenames:
+            print("No JSON files found!", file=sys.stderr)
+            return 2
+        return run_batch(args.command, filenames, args.jobs, getattr(args, 'check', False), args.quiet, args.json)
+    
+    try:
+        patch = diff_files(args.old, args.new)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(patch, indent=2, ensure_ascii=False))
+    return 1 if patch else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# jsoncore.py lives in the repository root, not in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
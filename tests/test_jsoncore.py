@@ -0,0 +1,803 @@
+import copy
+import json
+import os
+import random
+import re
+import stat
+import threading
+
+import pytest
+
+import jsoncore
+from jsoncore import EditError, JSONDocument, apply_patch, diff_json, merge_json
+
+
+def random_value(rng, depth=0):
+    kind = rng.random()
+    if depth > 3 or kind < 0.4:
+        return rng.choice([0, 1, 2, "a", "b", None, True, 2.5])
+    if kind < 0.7:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 6))]
+    return {rng.choice("abcdef"): random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))}
+
+
+def mutate(rng, value, depth=0):
+    """A changed deep copy of value"""
+    value = copy.deepcopy(value)
+    if isinstance(value, list):
+        for _ in range(rng.randint(1, 3)):
+            choice = rng.random()
+            if value and choice < 0.3:
+                del value[rng.randrange(len(value))]
+            elif value and choice < 0.6:
+                i = rng.randrange(len(value))
+                value[i] = mutate(rng, value[i], depth + 1)
+            else:
+                value.insert(rng.randint(0, len(value)), random_value(rng, depth + 1))
+        return value
+    if isinstance(value, dict):
+        for _ in range(rng.randint(1, 3)):
+            choice = rng.random()
+            if value and choice < 0.3:
+                del value[rng.choice(list(value))]
+            elif value and choice < 0.6:
+                key = rng.choice(list(value))
+                value[key] = mutate(rng, value[key], depth + 1)
+            else:
+                value[rng.choice("ghijk")] = random_value(rng, depth + 1)
+        return value
+    return random_value(rng, depth)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_diff_apply_patch_round_trip(seed):
+    rng = random.Random(seed)
+    old = random_value(rng)
+    new = mutate(rng, old)
+    patch = diff_json(old, new)
+    assert apply_patch(copy.deepcopy(old), patch) == new
+    
+    document = JSONDocument(data=copy.deepcopy(old))
+    document.apply_patch(json.loads(json.dumps(patch)))
+    assert document.data == new
+
+
+def test_diff_keyed_array_and_repeats():
+    old = {"items": [{"id": i, "v": i % 3} for i in range(50)] + [1, 1, 1]}
+    new = copy.deepcopy(old)
+    new["items"][10]["v"] = "changed"
+    del new["items"][20]
+    new["items"].insert(5, 1)
+    assert apply_patch(copy.deepcopy(old), diff_json(old, new)) == new
+    keyed_old = [{"id": i, "v": i} for i in range(30)]
+    keyed_new = list(reversed(keyed_old))
+    keyed_new[3] = dict(keyed_new[3], v="x")
+    assert apply_patch(copy.deepcopy(keyed_old), diff_json(keyed_old, keyed_new)) == keyed_new
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_diff_large_repetitive_arrays(seed):
+    # Too large for the exact difflib path: exercises the anchors, the runs and the Myers fallback
+    rng = random.Random(seed)
+    alphabet = rng.choice([3, 40, 5000])
+    old = [rng.randrange(alphabet) for _ in range(3000)]
+    new = list(old)
+    for _ in range(rng.randint(1, 40)):
+        i = rng.randrange(len(new))
+        choice = rng.random()
+        if choice < 0.3:
+            del new[i]
+        elif choice < 0.6:
+            new.insert(i, rng.randrange(alphabet))
+        else:
+            new[i] = "changed"
+    patch = diff_json(old, new)
+    assert apply_patch(list(old), patch) == new
+    blocks = jsoncore.matching_blocks(old, new)
+    assert blocks[-1] == (len(old), len(new), 0)
+    for (i, j, size), (next_i, next_j, _) in zip(blocks, blocks[1:]):
+        assert old[i:i + size] == new[j:j + size]
+        assert i + size <= next_i and j + size <= next_j
+
+
+def test_diff_periodic_array_stays_small():
+    old = [i % 7 for i in range(20000)]
+    new = old[:10000] + ["inserted"] + old[10000:]
+    patch = diff_json(old, new)
+    assert patch == [{"op": "add", "path": "/10000", "value": "inserted"}]
+
+
+def test_diff_identical_is_empty():
+    data = {"a": [1, 2, {"b": None}]}
+    assert diff_json(data, copy.deepcopy(data)) == []
+
+
+def merge(base, ours, theirs, prefer='ours'):
+    conflicts = []
+    return merge_json(base, ours, theirs, ({}, {}, {}), conflicts, prefer), conflicts
+
+
+def test_merge_combines_independent_changes():
+    base = {"a": 1, "b": [1, 2, 3], "c": {"x": 1}}
+    ours = {"a": 2, "b": [1, 2, 3], "c": {"x": 1, "y": 2}}
+    theirs = {"a": 1, "b": [0, 1, 2, 3], "c": {"x": 1}, "d": True}
+    merged, conflicts = merge(base, ours, theirs)
+    assert merged == {"a": 2, "b": [0, 1, 2, 3], "c": {"x": 1, "y": 2}, "d": True}
+    assert conflicts == []
+
+
+def test_merge_reports_conflicts_and_prefers_a_side():
+    base, ours, theirs = {"a": 1}, {"a": 2}, {"a": 3}
+    assert merge(base, ours, theirs) == ({"a": 2}, [("a",)])
+    assert merge(base, ours, theirs, prefer='theirs') == ({"a": 3}, [("a",)])
+
+
+def test_merge_keyed_arrays_by_id():
+    base = [{"id": 1, "v": 1}, {"id": 2, "v": 2}, {"id": 3, "v": 3}]
+    ours = [{"id": 3, "v": 3}, {"id": 2, "v": 2}, {"id": 1, "v": 1}]
+    theirs = [{"id": 1, "v": 1}, {"id": 2, "v": "changed"}, {"id": 3, "v": 3}, {"id": 4, "v": 4}]
+    merged, conflicts = merge(base, ours, theirs)
+    assert conflicts == []
+    # ours reordered, so its order wins; 4 follows its predecessor 3 from theirs
+    assert merged == [{"id": 3, "v": 3}, {"id": 4, "v": 4}, {"id": 2, "v": "changed"}, {"id": 1, "v": 1}]
+
+
+def test_merge_arrays_edits_on_both_sides():
+    base = list(range(10))
+    ours = base[:2] + ["ours"] + base[3:]
+    theirs = base[:8] + ["theirs"] + base[9:]
+    merged, conflicts = merge(base, ours, theirs)
+    assert merged == [0, 1, "ours", 3, 4, 5, 6, 7, "theirs", 9]
+    assert conflicts == []
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_undo_redo_restore_every_state(seed):
+    rng = random.Random(seed)
+    document = JSONDocument(data={"root": random_value(rng), "list": [1, 2, 3]})
+    document.history.coalesce_seconds = 0
+    states = [copy.deepcopy(document.data)]
+    for _ in range(30):
+        if not random_edit(rng, document):
+            continue
+        states.append(copy.deepcopy(document.data))
+    for state in reversed(states[:-1]):
+        assert document.undo() is not None
+        assert document.data == state
+    assert document.undo() is None
+    for state in states[1:]:
+        assert document.redo() is not None
+        assert document.data == state
+
+
+def random_edit(rng, document):
+    """One random edit of a document with a "root" and a "list" key; False if none fitted"""
+    path = random_path(rng, document.data)
+    container = document.get(path[:-1])
+    choice = rng.random()
+    exists = path[-1] in (container if isinstance(container, dict) else range(len(container)))
+    if len(path) == 1:
+        document.edit('replace', path, random_value(rng) if path[0] == "root" else [random_value(rng)])
+    elif exists and isinstance(container, dict) and choice < 0.2:
+        new_key = rng.choice("mnopq")
+        if new_key in container:
+            return False
+        document.edit('rename', path, new_key)
+    elif exists and choice < 0.45:
+        document.edit('remove', path)
+    elif choice < 0.7 and isinstance(container, list):
+        document.edit('add', path, random_value(rng))
+    elif exists:
+        document.edit('replace', path, random_value(rng))
+    else:
+        document.edit('add', path, random_value(rng))
+    return True
+
+
+def containers(value):
+    """Every dict and list in value"""
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (dict, list)):
+            yield node
+            stack.extend(node.values() if isinstance(node, dict) else node)
+
+
+def random_path(rng, data):
+    """Path of an existing value below the root, or of the end of an empty container"""
+    path = (rng.choice(list(data)),)
+    while True:
+        value = jsoncore.get_value_at(data, path)
+        if not isinstance(value, (dict, list)) or rng.random() < 0.4:
+            return path
+        if not value:
+            return path + ("k" if isinstance(value, dict) else 0,)
+        path += (rng.choice(list(value) if isinstance(value, dict) else range(len(value))),)
+
+
+@pytest.mark.parametrize("op, path, value", [
+    ('add', ('name',), 1),           # object key on an array root
+    ('add', (10,), 1),               # index past the end
+    ('remove', (3,), None),
+    ('replace', (-1,), 1),
+    ('rename', (0,), "x"),           # arrays have no keys
+    ('replace', (0, 'a'), 1),        # through a scalar
+])
+def test_edit_rejects_bad_targets_on_arrays(tmp_path, op, path, value):
+    document = journaled_document(tmp_path, [1, 2, 3])
+    with pytest.raises(EditError):
+        document.edit(op, path, value)
+    assert document.data == [1, 2, 3]
+    assert document.undo() is None
+    assert document.journal.count == 0
+
+
+def test_rename_onto_existing_key_is_rejected(tmp_path):
+    document = journaled_document(tmp_path, {"a": 1, "b": 2})
+    with pytest.raises(EditError):
+        document.edit('rename', ('a',), 'b')
+    assert document.data == {"a": 1, "b": 2}
+    assert document.undo() is None
+    assert document.journal.count == 0
+
+
+def test_add_existing_key_becomes_replace():
+    document = JSONDocument(data={"a": 1})
+    assert document.edit('add', ('a',), 2) == 'replace'
+    document.undo()
+    assert document.data == {"a": 1}
+
+
+def journaled_document(tmp_path, data):
+    """Load tmp_path/doc.json, written from data first unless data is None"""
+    filename = tmp_path / "doc.json"
+    if data is not None:
+        filename.write_text(json.dumps(data))
+    return JSONDocument(str(filename)).load()
+
+
+def test_recover_marks_the_document_modified(tmp_path):
+    document = journaled_document(tmp_path, {"a": {"b": 1}, "c": [1, 2]})
+    document.edit('replace', ('a', 'b'), 2)
+    document.edit('add', ('c', 2), 3)
+    document.sync_journal()
+    document.journal.close()  # the session crashes here
+    
+    recovered = journaled_document(tmp_path, None)
+    operations = recovered.recoverable_operations()
+    assert len(operations) == 2
+    assert recovered.recover(operations) == 2
+    assert recovered.data == {"a": {"b": 2}, "c": [1, 2, 3]}
+    assert recovered.is_modified()
+    assert recovered.is_dirty(recovered.data)
+    assert recovered.is_dirty(recovered.data["a"])
+    assert recovered.diff(json.loads((tmp_path / "doc.json").read_text())) != []
+    
+    # Further edits extend the recovered journal instead of replacing it
+    recovered.edit('remove', ('c', 0))
+    recovered.journal.close()
+    again = journaled_document(tmp_path, None)
+    again.recover(again.recoverable_operations())
+    assert again.data == {"a": {"b": 2}, "c": [2, 3]}
+
+
+def test_recover_stops_at_an_entry_that_does_not_fit(tmp_path):
+    document = journaled_document(tmp_path, [1, 2])
+    document.edit('replace', (0,), "x")
+    document.journal.append('add', ('name',), 1)  # written by an older version before validation existed
+    document.journal.append('replace', (1,), "y")
+    document.journal.close()
+    
+    recovered = journaled_document(tmp_path, None)
+    assert recovered.recover(recovered.recoverable_operations()) == 1
+    assert recovered.data == ["x", 2]
+    recovered.journal.close()
+    again = journaled_document(tmp_path, None)
+    again.recover(again.recoverable_operations())
+    assert again.data == ["x", 2]
+
+
+def test_replaced_subtrees_leave_the_caches():
+    document = JSONDocument(data={"big": [[i] for i in range(1000)]})
+    document.set_baseline()
+    document.history = jsoncore.UndoStack(limit=1)
+    document.edit('replace', ("big",), [[i, -1] for i in range(1000)])
+    assert document.is_modified()
+    size, introduced = len(document.hash_cache), len(document.introduced)
+    for round in range(20):
+        document.edit('replace', ("big",), [[i, round] for i in range(1000)])
+        assert document.is_modified()
+    assert len(document.hash_cache) <= size
+    assert len(document.introduced) <= introduced
+
+
+def test_load_hashes_nothing_until_asked(tmp_path):
+    target = tmp_path / "a.json"
+    target.write_text(json.dumps({"a": {"b": [1, 2]}, "c": [{"d": 1}]}))
+    document = JSONDocument(str(target)).load()
+    assert not document.hash_cache and not document.baseline_hashes
+    assert document.is_modified() is False
+    assert not document.is_dirty(document.data["a"])
+    assert not document.hash_cache
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_dirty_checks_match_the_loaded_version(seed):
+    rng = random.Random(seed)
+    document = JSONDocument(data={"root": random_value(rng), "list": [1, [2], {"x": 3}]})
+    document.history.coalesce_seconds = 0
+    document.set_baseline()
+    loaded = json.dumps(document.data)
+    # Every container as loaded, by identity: dirty means "differs from its own loaded version"
+    originals = {id(node): (node, json.dumps(node)) for node in containers(document.data)}
+    for step in range(25):
+        if rng.random() < 0.3:
+            document.undo()
+        else:
+            random_edit(rng, document)
+        assert document.is_modified() == (json.dumps(document.data) != loaded)
+        for node in containers(document.data):
+            original = originals.get(id(node))
+            if original is None or original[0] is not node:
+                assert document.is_dirty(node)
+            else:
+                assert document.is_dirty(node) == (json.dumps(node) != original[1])
+
+
+def test_save_keeps_mode_and_symlink(tmp_path):
+    target = tmp_path / "real.json"
+    target.write_text('{"a": 1}')
+    os.chmod(target, 0o600)
+    link = tmp_path / "link.json"
+    try:
+        link.symlink_to(target)
+    except (OSError, NotImplementedError):
+        pytest.skip("no symlinks here")
+    document = JSONDocument(str(link)).load()
+    document.edit('replace', ('a',), 2)
+    document.save()
+    assert link.is_symlink()
+    assert json.loads(target.read_text()) == {"a": 2}
+    if os.name == 'posix':
+        assert stat.S_IMODE(os.stat(target).st_mode) == 0o600
+
+
+def test_write_atomic_skips_unchanged_content(tmp_path):
+    target = tmp_path / "same.json"
+    digest = jsoncore.write_atomic(str(target), ['{"a": 1}'])
+    before = os.stat(target)
+    assert jsoncore.write_atomic(str(target), ['{"a": ', '1}'], skip_unchanged=True) == digest
+    assert os.stat(target).st_ino == before.st_ino
+    assert not os.path.exists(str(target) + '.tmp')
+
+
+def test_save_overwrites_a_file_changed_by_another_program(tmp_path):
+    target = tmp_path / "a.json"
+    target.write_text('{"a": 1}')
+    document = JSONDocument(str(target)).load()
+    document.save()
+    saved = target.read_text()
+    target.write_text('{"a": 2}')
+    # The model still equals the last save, but the file on disk does not
+    document.save()
+    assert target.read_text() == saved
+    assert document.saved_digest == jsoncore.file_digest(str(target))
+
+
+@pytest.mark.parametrize("text", [None, '{"b": [1, 2]}'])
+def test_save_keeps_the_written_bytes_as_merge_base(tmp_path, text):
+    target = tmp_path / "a.json"
+    target.write_text('{"a": 1}')
+    document = JSONDocument(str(target)).load()
+    if text is not None:
+        document.edit('replace', (), json.loads(text))
+    else:
+        document.edit('add', ('b',), "ü")
+    document.save(text)
+    assert document.base_bytes == target.read_bytes()
+
+
+def test_find_syntax_error_reports_the_position_only():
+    lines = json.dumps({"a": [1, 2, 3]}, indent=2).split('\n')
+    assert jsoncore.find_syntax_error(lines) is None
+    lines[3] = '    2'
+    msg, lineno, colno = jsoncore.find_syntax_error(lines)
+    assert (lineno, colno) == (5, 5) and "delimiter" in msg
+
+
+def test_release_keeps_a_journal_this_session_did_not_write(tmp_path):
+    crashed = journaled_document(tmp_path, {"a": 1})
+    crashed.edit('replace', ('a',), 2)
+    crashed.journal.close()
+    
+    # e.g. a --readonly session, which never offers recovery
+    browsing = journaled_document(tmp_path, None)
+    browsing.journal.release()
+    assert os.path.exists(browsing.journal.filename)
+    
+    session = journaled_document(tmp_path, None)
+    session.recover(session.recoverable_operations())
+    session.journal.release()
+    assert not os.path.exists(session.journal.filename)
+
+
+def dumped_line(data, path):
+    """Line of path found by dumping a marked copy of data"""
+    marked = copy.deepcopy(data)
+    jsoncore.get_value_at(marked, path[:-1])[path[-1]] = "\u0000marker"
+    for number, line in enumerate(json.dumps(marked, indent=2).split('\n'), 1):
+        if "\\u0000marker" in line:
+            return number
+
+
+def all_paths(value, path=()):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield path + (key,)
+            yield from all_paths(child, path + (key,))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield path + (index,)
+            yield from all_paths(child, path + (index,))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_line_of_follows_edits(seed):
+    rng = random.Random(seed)
+    document = JSONDocument(data={"root": random_value(rng), "list": list(range(20))})
+    document.history.coalesce_seconds = 0
+    for _ in range(25):
+        for path in all_paths(document.data):
+            assert document.line_of(path) == dumped_line(document.data, path)
+        assert document.line_count(document.data) == len(json.dumps(document.data, indent=2).split('\n'))
+        path = random_path(rng, document.data)
+        container = document.get(path[:-1])
+        exists = path[-1] in (container if isinstance(container, dict) else range(len(container)))
+        choice = rng.random()
+        if choice < 0.2:
+            document.undo()
+        elif exists and len(path) > 1 and choice < 0.45:
+            document.edit('remove', path)
+        elif exists and isinstance(container, dict) and choice < 0.55:
+            new_key = rng.choice("mnopq")
+            if new_key not in container:
+                document.edit('rename', path, new_key)
+        elif exists and choice < 0.75:
+            document.edit('replace', path, random_value(rng))
+        elif len(path) > 1:
+            document.edit('add', path, random_value(rng))
+
+
+@pytest.mark.parametrize("jobs", ["-1", "0", "x"])
+def test_batch_rejects_bad_job_counts(tmp_path, capsys, jobs):
+    target = tmp_path / "a.json"
+    target.write_text('{"a": 1}')
+    with pytest.raises(SystemExit) as exit_info:
+        jsoncore.main(['validate', str(target), '-j', jobs])
+    assert exit_info.value.code == 2
+    assert "-j/--jobs" in capsys.readouterr().err
+
+
+def test_save_refuses_a_document_that_was_never_loaded(tmp_path):
+    target = tmp_path / "a.json"
+    target.write_text('{"a": 1}')
+    with pytest.raises(ValueError):
+        JSONDocument(str(target)).save()
+    assert target.read_text() == '{"a": 1}'
+
+
+def test_watcher_reports_nothing_before_watch(tmp_path):
+    target = tmp_path / "a.json"
+    target.write_text('{"a": 1}')
+    assert jsoncore.FileWatcher(str(target)).changed() is None
+
+
+def test_watcher_still_checks_after_stop(tmp_path):
+    target = tmp_path / "a.json"
+    target.write_text('{"a": 1}')
+    watcher = jsoncore.FileWatcher(str(target))
+    watcher.watch(jsoncore.file_digest(str(target)))
+    watcher.stop()
+    target.write_text('{"a": 22}')
+    assert watcher.changed() == jsoncore.file_digest(str(target))
+
+
+def brute_search(data, term, scope='all'):
+    """Paths whose key (keys), scalar value (values) or path text (path) contains term"""
+    term = term.lower()
+    found = []
+    stack = [((), data)]
+    while stack:
+        path, value = stack.pop()
+        if path:
+            key = path[-1]
+            if scope in ('all', 'keys') and isinstance(key, str) and term in key.lower():
+                found.append(path)
+            elif scope in ('all', 'values') and not isinstance(value, (dict, list)) and term in str(value).lower():
+                found.append(path)
+            elif scope == 'path' and term in jsoncore.format_path(path).lower():
+                found.append(path)
+        if isinstance(value, dict):
+            stack.extend((path + (key,), child) for key, child in value.items())
+        elif isinstance(value, list):
+            stack.extend((path + (index,), child) for index, child in enumerate(value))
+    return sorted(found)
+
+
+SEARCH_DOC = {"name": "Alpha", "items": [{"name": "beta", "size": 3}, {"label": "Alphabet"}],
+              "nested": {"alpha_key": True, "other": None}}
+
+
+@pytest.mark.parametrize("scope", ['all', 'keys', 'values', 'path'])
+@pytest.mark.parametrize("term", ["alpha", "NAME", "a", "items[1]", "true", "zzz"])
+def test_search_scopes(scope, term):
+    document = JSONDocument(data=copy.deepcopy(SEARCH_DOC))
+    assert sorted(document.query(term, scope)) == brute_search(document.data, term, scope)
+
+
+def test_search_regex():
+    document = JSONDocument(data=copy.deepcopy(SEARCH_DOC))
+    assert sorted(document.query(r"^alpha$", 'values', regex=True)) == [("name",)]
+    assert sorted(document.query(r"^(name|label)$", 'keys', regex=True)) == [
+        ("items", 0, "name"), ("items", 1, "label"), ("name",)]
+    assert sorted(document.query(r"\[\d\]\.size", 'path', regex=True)) == [("items", 0, "size")]
+    with pytest.raises(re.error):
+        list(document.query("(", regex=True))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_search_index_follows_edits(seed):
+    rng = random.Random(seed)
+    document = JSONDocument(data={"root": random_value(rng), "list": [1, 2, 3]})
+    document.history.coalesce_seconds = 0
+    document.get_search_index()
+    for step in range(20):
+        if rng.random() < 0.2:
+            document.undo()
+        else:
+            random_edit(rng, document)
+        assert document.has_search_index()
+        for term in ("a", "b", "ab", "tru", "2.5", "none"):
+            assert document.get_search_index().search(term) == brute_search(document.data, term)
+
+
+def test_search_index_is_rebuilt_for_a_new_root():
+    document = JSONDocument(data=copy.deepcopy(SEARCH_DOC))
+    index = document.get_search_index()
+    document.edit('replace', (), {"gamma": "delta"})
+    assert not document.has_search_index()
+    assert sorted(document.query("delta")) == [("gamma",)]
+    assert document.search_index is not index
+
+
+def test_search_long_texts_have_no_postings():
+    vocabulary = jsoncore.SearchVocabulary()
+    long_text = "x" * 5000 + "needle" + "y" * 5000
+    sid = vocabulary.add(long_text, 1)
+    vocabulary.add("short needle", 2)
+    assert sid in vocabulary.long
+    assert all(sid not in sids for sids in vocabulary.grams.values())
+    assert vocabulary.match("needle") == {1, 2}
+    assert vocabulary.match("xne") == {1}
+    vocabulary.discard(sid, 1)
+    assert not vocabulary.long and vocabulary.match("needle") == {2}
+
+
+STREAM_DOC = {
+    "name": "stream \"quoted\" \\ [not {a container",
+    "numbers": [1, -2.5e3, True, None, "ü€😀"],
+    "nested": {"deep": {"deeper": [[], {}, [1, [2, [3]]]]}, "empty": {}},
+    "items": [{"id": i, "text": "x" * (i % 7), "tags": ["a", "b"][:i % 3]} for i in range(40)],
+}
+
+
+def stream_file(tmp_path, data, indent=None):
+    target = tmp_path / "stream.json"
+    target.write_text(json.dumps(data, indent=indent, ensure_ascii=False), encoding='utf-8')
+    return str(target)
+
+
+def materialize(value):
+    """Decode every LazyNode below value one level at a time"""
+    if isinstance(value, jsoncore.LazyNode):
+        value = value.load()
+    if isinstance(value, dict):
+        return {key: materialize(child) for key, child in value.items()}
+    if isinstance(value, list):
+        return [materialize(child) for child in value]
+    return value
+
+
+@pytest.fixture(params=[(False, None), (True, None), (False, 7)], ids=["read", "mmap", "tiny-blocks"])
+def stream_options(request, monkeypatch):
+    use_mmap, block_size = request.param
+    if block_size is not None:
+        # Every structure then straddles block boundaries
+        monkeypatch.setattr(jsoncore.JSONStreamIndex, "BLOCK_SIZE", block_size)
+    return use_mmap
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_stream_index_decodes_one_level_at_a_time(tmp_path, stream_options, indent):
+    index = jsoncore.JSONStreamIndex(stream_file(tmp_path, STREAM_DOC, indent), stream_options)
+    try:
+        root = index.load_root()
+        assert list(root) == list(STREAM_DOC)
+        assert root["name"] == STREAM_DOC["name"]
+        for key in ("numbers", "nested", "items"):
+            assert isinstance(root[key], jsoncore.LazyNode)
+            assert root[key].is_object == isinstance(STREAM_DOC[key], dict)
+            assert root[key].load_all() == STREAM_DOC[key]
+        nested = root["nested"].load()
+        assert isinstance(nested["deep"], jsoncore.LazyNode) and isinstance(nested["empty"], jsoncore.LazyNode)
+        assert nested["empty"].load() == {}
+        assert materialize(root) == STREAM_DOC
+    finally:
+        index.close()
+
+
+def test_stream_spans_locate_each_member(tmp_path, stream_options):
+    index = jsoncore.JSONStreamIndex(stream_file(tmp_path, STREAM_DOC, 2), stream_options)
+    try:
+        spans = {}
+        root = index.load_root(spans=spans)
+        assert list(spans) == list(STREAM_DOC)
+        for key, (start, end) in spans.items():
+            assert index.decode(start, end) == STREAM_DOC[key]
+        item_spans = {}
+        items = root["items"].load(item_spans)
+        assert list(item_spans) == list(range(len(STREAM_DOC["items"])))
+        for position, (start, end) in item_spans.items():
+            assert index.decode(start, end) == STREAM_DOC["items"][position]
+            assert isinstance(items[position], jsoncore.LazyNode)
+    finally:
+        index.close()
+
+
+def test_stream_index_reads_files_larger_than_a_block(tmp_path):
+    data = {"rows": [{"id": i, "text": "row %d " % i + "x" * 1000} for i in range(3000)], "tail": "end"}
+    filename = stream_file(tmp_path, data, 2)
+    assert os.path.getsize(filename) > 2 * jsoncore.JSONStreamIndex.BLOCK_SIZE
+    reports = []
+    index = jsoncore.JSONStreamIndex(filename)
+    try:
+        root = index.load_root(progress=lambda done, total: reports.append(done))
+        assert root["tail"] == "end"
+        rows = root["rows"].load()
+        assert len(rows) == 3000 and rows[-1].load() == data["rows"][-1]
+        assert reports and all(done <= index.size for done in reports)
+        reports.clear()
+        index.members(root["rows"].start, lambda done, total: reports.append(done))
+        assert len(reports) >= 2 and reports == sorted(reports)
+    finally:
+        index.close()
+
+
+def test_stream_index_can_be_cancelled(tmp_path, monkeypatch):
+    monkeypatch.setattr(jsoncore.JSONStreamIndex, "BLOCK_SIZE", 64)
+    cancelled = threading.Event()
+    cancelled.set()
+    index = jsoncore.JSONStreamIndex(stream_file(tmp_path, list(range(1000))))
+    try:
+        with pytest.raises(jsoncore.LoadCancelled):
+            index.load_root(cancelled=cancelled)
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("text", ['{"a": "open', '[1, 2', '{"a" 1}', '[1 2]'])
+def test_stream_index_rejects_broken_files(tmp_path, text):
+    target = tmp_path / "broken.json"
+    target.write_text(text)
+    index = jsoncore.JSONStreamIndex(str(target))
+    try:
+        with pytest.raises(ValueError):
+            materialize(index.load_root())
+    finally:
+        index.close()
+
+
+def test_save_streamed_document_over_its_own_file(tmp_path, stream_options):
+    filename = stream_file(tmp_path, STREAM_DOC)
+    index = jsoncore.JSONStreamIndex(filename, stream_options)
+    document = JSONDocument(filename)
+    document.data = index.load_root()
+    # Part of the document decoded and edited, the rest still lazy
+    document.edit('replace', ("nested",), document.data["nested"].load(), record=False)
+    document.edit('replace', ("nested", "empty"), {"filled": 1})
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False, default=jsoncore.json_default)
+    jsoncore.write_atomic(filename, encoder.iterencode(document.data), before_replace=index.close)
+    expected = copy.deepcopy(STREAM_DOC)
+    expected["nested"]["empty"] = {"filled": 1}
+    with open(filename, encoding='utf-8') as f:
+        assert json.load(f) == expected
+
+
+def batch_files(tmp_path):
+    (tmp_path / "good.json").write_text('{"a": [1, "x", null, true], "b": {"c": 2.5}}')
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "formatted.json").write_text('{\n  "z": 1\n}\n')
+    (tmp_path / "bad.json").write_text('{\n  "a": 1,\n  "b" 2\n}')
+    return tmp_path
+
+
+def json_lines(text):
+    return {os.path.basename(entry["file"]): entry for entry in map(json.loads, text.splitlines())}
+
+
+def test_batch_validate_reports_each_file(tmp_path, capsys):
+    batch_files(tmp_path)
+    assert jsoncore.main(['validate', str(tmp_path)]) == 1
+    out = capsys.readouterr().out
+    assert "✅" in out and "good.json: valid" in out and "formatted.json: valid" in out
+    assert "❌" in out and "bad.json: Expecting ':' delimiter" in out and "Line 3, Column 7" in out
+    
+    assert jsoncore.main(['validate', '-q', str(tmp_path / "*.json")]) == 1
+    out = capsys.readouterr().out
+    assert "bad.json" in out and "good.json" not in out and "✅" not in out
+    assert jsoncore.main(['validate', str(tmp_path / "good.json"), str(tmp_path / "sub")]) == 0
+    assert jsoncore.main(['validate', str(tmp_path / "none" / "*.json")]) == 2
+
+
+def test_batch_validate_json_output(tmp_path, capsys):
+    batch_files(tmp_path)
+    assert jsoncore.main(['validate', '--json', str(tmp_path), str(tmp_path / "missing.json")]) == 1
+    entries = json_lines(capsys.readouterr().out)
+    assert set(entries) == {"good.json", "formatted.json", "bad.json", "missing.json"}
+    assert entries["good.json"] == {"file": str(tmp_path / "good.json"), "ok": True, "message": "valid"}
+    assert entries["bad.json"]["ok"] is False and "Line 3" in entries["bad.json"]["message"]
+    assert entries["missing.json"]["ok"] is False
+
+
+def test_batch_format_rewrites_and_checks(tmp_path, capsys):
+    batch_files(tmp_path)
+    good = tmp_path / "good.json"
+    before = good.read_text()
+    assert jsoncore.main(['format', '--check', str(good), str(tmp_path / "sub")]) == 1
+    assert "would reformat" in capsys.readouterr().out and good.read_text() == before
+    
+    assert jsoncore.main(['format', str(good), str(tmp_path / "sub")]) == 0
+    out = capsys.readouterr().out
+    assert "good.json: reformatted" in out and "formatted.json: unchanged" in out
+    assert good.read_text() == json.dumps(json.loads(before), indent=2)
+    assert (tmp_path / "sub" / "formatted.json").read_text() == '{\n  "z": 1\n}\n'
+    assert jsoncore.main(['format', '--check', str(good)]) == 0
+    
+    assert jsoncore.main(['format', str(tmp_path / "bad.json")]) == 1
+    assert (tmp_path / "bad.json").read_text() == '{\n  "a": 1,\n  "b" 2\n}'
+
+
+def test_batch_stats_json_output(tmp_path, capsys):
+    batch_files(tmp_path)
+    assert jsoncore.main(['stats', '--json', str(tmp_path / "good.json")]) == 0
+    entry = json_lines(capsys.readouterr().out)["good.json"]
+    assert entry == {"file": str(tmp_path / "good.json"), "ok": True, "objects": 2, "arrays": 1, "keys": 3,
+                     "strings": 1, "numbers": 2, "booleans": 1, "nulls": 1, "depth": 3,
+                     "bytes": os.path.getsize(tmp_path / "good.json")}
+    assert jsoncore.main(['stats', str(tmp_path / "good.json")]) == 0
+    assert "objects=2, arrays=1, keys=3" in capsys.readouterr().out
+
+
+def test_batch_runs_on_a_process_pool(tmp_path, capsys):
+    for i in range(20):
+        (tmp_path / f"f{i}.json").write_text(json.dumps({"i": i}) if i % 5 else "{")
+    assert jsoncore.main(['validate', '-j', '2', '--json', str(tmp_path)]) == 1
+    entries = json_lines(capsys.readouterr().out)
+    assert len(entries) == 20
+    assert all(entry["ok"] == (int(name[1:-5]) % 5 != 0) for name, entry in entries.items())
+
+
+def test_diff_command(tmp_path, capsys):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text('{"a": [1, 2, 3], "b": "x"}')
+    new.write_text('{"a": [1, 3, 4], "c": true}')
+    assert jsoncore.main(['diff', str(old), str(old)]) == 0
+    assert json.loads(capsys.readouterr().out) == []
+    assert jsoncore.main(['diff', str(old), str(new)]) == 1
+    patch = json.loads(capsys.readouterr().out)
+    assert apply_patch(json.loads(old.read_text()), patch) == json.loads(new.read_text())
+    assert jsoncore.main(['diff', str(old), str(tmp_path / "missing.json")]) == 2
+    assert "Error" in capsys.readouterr().err
+    (tmp_path / "bad.json").write_text("{")
+    assert jsoncore.main(['diff', str(old), str(tmp_path / "bad.json")]) == 2